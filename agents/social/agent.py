@@ -1,7 +1,7 @@
 import datetime
 from zoneinfo import ZoneInfo
 from google.adk.agents import LoopAgent, LlmAgent, BaseAgent
-from social.instavibe import get_person_posts,get_person_friends,get_person_id_by_name,get_person_attended_events
+from social.instavibe import get_person_posts,get_person_friends,get_person_id_by_name,get_person_attended_events,get_people_profiles,get_friend_suggestions
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event, EventActions
 from typing import AsyncGenerator
@@ -1,81 +1,68 @@
 # spanner_data_fetchers.py
 
-import os
 from dotenv import load_dotenv
+import os
 import traceback
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import json # For example usage printing
 
-from google.cloud import spanner
 from google.cloud.spanner_v1 import param_types
 from google.api_core import exceptions
 
+from spanner_data import get_database, Query, register, warm_up, fetch_all
+from spanner_data.queries import PERSON_IDS_BY_NAMES_QUERY # Shared with the web app
+from spanner_data.graph import is_symmetric_edge
+from social.social_graph import LocalSocialGraph
+
 load_dotenv()
-# --- Spanner Configuration ---
-INSTANCE_ID = os.environ.get("SPANNER_INSTANCE_ID", "instavibe-graph-instance")
-DATABASE_ID = os.environ.get("SPANNER_DATABASE_ID", "graphdb")
-PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
 
-if not PROJECT_ID:
-    print("Warning: GOOGLE_CLOUD_PROJECT environment variable not set.")
+# --- Local Graph Configuration ---
+# With SOCIAL_GRAPH_LOCAL enabled, the person lookups below are answered from an
+# in-process snapshot of the SocialGraph (see social_graph.py) instead of one
+# Spanner query per tool call.
+SOCIAL_GRAPH_LOCAL = os.environ.get("SOCIAL_GRAPH_LOCAL", "false").lower() in ("1", "true", "yes")
+# Optional file the graph is saved to and restored from at startup. It is a
+# pickle: keep it in a directory only this service can write to. Files not
+# owned by the service's user, or writable by others, are ignored.
+SOCIAL_GRAPH_SNAPSHOT = os.environ.get("SOCIAL_GRAPH_SNAPSHOT") or None
+SOCIAL_GRAPH_REFRESH_SECONDS = float(os.environ.get("SOCIAL_GRAPH_REFRESH_SECONDS", "30"))
+SPANNER_WARMUP = os.environ.get("SPANNER_WARMUP", "true").lower() in ("1", "true", "yes")
+
+# Posts returned per person unless the caller asks for more; everything the
+# tools return ends up in the model's context.
+DEFAULT_POST_LIMIT = int(os.environ.get("SOCIAL_DEFAULT_POST_LIMIT", "20"))
 
 # --- Spanner Client Initialization ---
-db_instance = None
-spanner_client = None
-try:
-    if PROJECT_ID:
-        spanner_client = spanner.Client(project=PROJECT_ID)
-        instance = spanner_client.instance(INSTANCE_ID)
-        database = instance.database(DATABASE_ID)
-        print(f"Attempting to connect to Spanner: {instance.name}/databases/{database.name}")
-
-        if not database.exists():
-             print(f"Error: Database '{database.name}' does not exist in instance '{instance.name}'.")
-             db_instance = None
-        else:
-            print("Spanner database connection check successful.")
-            db_instance = database
-    else:
-        print("Skipping Spanner client initialization due to missing GOOGLE_CLOUD_PROJECT.")
-
-except exceptions.NotFound:
-    print(f"Error: Spanner instance '{INSTANCE_ID}' not found in project '{PROJECT_ID}'.")
-    db_instance = None
-except Exception as e:
-    print(f"An unexpected error occurred during Spanner initialization: {e}")
-    db_instance = None
+# Uses the same pooled data-access layer as the Instavibe web app (instavibe/spanner_data).
+db_instance = get_database()
+
+local_graph = (
+    LocalSocialGraph(db_instance, snapshot_path=SOCIAL_GRAPH_SNAPSHOT, refresh_seconds=SOCIAL_GRAPH_REFRESH_SECONDS)
+    if SOCIAL_GRAPH_LOCAL and db_instance else None
+)
 
 def run_sql_query(sql, params=None, param_types=None, expected_fields=None):
     """
     Executes a standard SQL query against the Spanner database.
+
+    `sql` is either a registered Query (see below) or a statement string,
+    which then needs `param_types` and `expected_fields`.
     Returns: list[dict] or None on error.
     """
     if not db_instance:
         print("Error: Database connection is not available.")
         return None
 
-    results_list = []
+    if not isinstance(sql, Query) and not expected_fields:
+        print("Error: expected_fields must be provided to run_sql_query.")
+        return None
+
     print(f"--- Executing SQL Query ---")
     # print(f"SQL: {sql}")
 
     try:
-        with db_instance.snapshot() as snapshot:
-            results = snapshot.execute_sql(
-                sql,
-                params=params,
-                param_types=param_types
-            )
-
-            field_names = expected_fields
-            if not field_names:
-                 print("Error: expected_fields must be provided to run_sql_query.")
-                 return None
-
-            for row in results:
-                if len(field_names) != len(row):
-                     print(f"Warning: Mismatch between field names ({len(field_names)}) and row values ({len(row)}). Skipping row: {row}")
-                     continue
-                results_list.append(dict(zip(field_names, row)))
+        query = sql if isinstance(sql, Query) else Query(sql=sql, fields=tuple(expected_fields), param_types=param_types or {})
+        results_list = fetch_all(db_instance, query, params=params)
 
     except (exceptions.NotFound, exceptions.PermissionDenied, exceptions.InvalidArgument) as spanner_err:
         print(f"Spanner SQL Query Error ({type(spanner_err).__name__}): {spanner_err}")
@@ -91,34 +78,25 @@ def run_sql_query(sql, params=None, param_types=None, expected_fields=None):
 def run_graph_query( graph_sql, params=None, param_types=None, expected_fields=None):
     """
     Executes a Spanner Graph Query (GQL).
+
+    `graph_sql` is either a registered Query (see below) or a statement
+    string, which then needs `param_types` and `expected_fields`.
     Returns: list[dict] or None on error.
     """
     if not db_instance:
         print("Error: Database connection is not available.")
         return None
 
-    results_list = []
+    if not isinstance(graph_sql, Query) and not expected_fields:
+        print("Error: expected_fields must be provided to run_graph_query.")
+        return None
+
     print(f"--- Executing Graph Query ---")
     # print(f"GQL: {graph_sql}") # Uncomment for verbose query logging
 
     try:
-        with db_instance.snapshot() as snapshot:
-            results = snapshot.execute_sql(
-                graph_sql,
-                params=params,
-                param_types=param_types
-            )
-
-            field_names = expected_fields
-            if not field_names:
-                 print("Error: expected_fields must be provided to run_graph_query.")
-                 return None
-
-            for row in results:
-                if len(field_names) != len(row):
-                     print(f"Warning: Mismatch between field names ({len(field_names)}) and row values ({len(row)}). Skipping row: {row}")
-                     continue
-                results_list.append(dict(zip(field_names, row)))
+        query = graph_sql if isinstance(graph_sql, Query) else Query(sql=graph_sql, fields=tuple(expected_fields), param_types=param_types or {})
+        results_list = fetch_all(db_instance, query, params=params)
 
     except (exceptions.NotFound, exceptions.PermissionDenied, exceptions.InvalidArgument) as spanner_err:
         print(f"Spanner Graph Query Error ({type(spanner_err).__name__}): {spanner_err}")
@@ -129,3 +107,414 @@ def run_graph_query( graph_sql, params=None, param_types=None, expected_fields=N
         return None
 
     return results_list
+
+
+# --- Queries ---
+# Registered, like the web app's, so warm_up_queries() compiles them when the
+# agent starts and their metrics are reported under these names. Rows are
+# dicts (not Records): the tools convert them in place before returning.
+
+PERSON_ID_BY_NAME_QUERY = register(Query(
+    name="social_person_id_by_name",
+    sql="SELECT person_id FROM Person WHERE name = @name LIMIT 1",
+    fields=("person_id",),
+    param_types={"name": param_types.STRING},
+))
+
+# Post filters are nullable parameters: @since and @sentiment match every post
+# when NULL. PostByAuthor (author_id, post_timestamp DESC) is read newest first.
+_POST_FILTER_TYPES = {"since": param_types.TIMESTAMP, "sentiment": param_types.STRING, "limit": param_types.INT64}
+
+PERSON_POSTS_GRAPH_QUERY = register(Query(
+    name="social_person_posts",
+    sql="""
+        Graph SocialGraph
+        MATCH (author:Person)-[w:Wrote]->(post:Post)
+        WHERE author.person_id = @person_id
+          AND (@since IS NULL OR post.post_timestamp >= @since)
+          AND (@sentiment IS NULL OR post.sentiment = @sentiment)
+        RETURN post.post_id, post.author_id, post.text, post.sentiment, post.post_timestamp, author.name AS author_name
+        ORDER BY post.post_timestamp DESC
+        LIMIT @limit
+    """,
+    fields=("post_id", "author_id", "text", "sentiment", "post_timestamp", "author_name"),
+    param_types={"person_id": param_types.STRING, **_POST_FILTER_TYPES},
+))
+
+# Friendship edges are matched undirected unless the deployed graph stores them
+# in both directions (FriendAdjacency), where a directed match is one seek per
+# person and needs no DISTINCT. See _friends_query.
+PERSON_FRIENDS_GRAPH_QUERY = register(Query(
+    name="social_person_friends",
+    sql="""
+        Graph SocialGraph
+        MATCH (p:Person {person_id: @person_id})-[f:Friendship]-(friend:Person)
+        RETURN DISTINCT friend.person_id, friend.name
+        ORDER BY friend.name
+    """,
+    fields=("person_id", "name"),
+    param_types={"person_id": param_types.STRING},
+))
+
+PERSON_FRIENDS_DIRECTED_GRAPH_QUERY = register(Query(
+    name="social_person_friends_directed",
+    sql="""
+        Graph SocialGraph
+        MATCH (p:Person {person_id: @person_id})-[f:Friendship]->(friend:Person)
+        RETURN friend.person_id, friend.name
+        ORDER BY friend.name
+    """,
+    fields=("person_id", "name"),
+    param_types={"person_id": param_types.STRING},
+))
+
+PERSON_ATTENDED_EVENTS_GRAPH_QUERY = register(Query(
+    name="social_person_attended_events",
+    sql="""
+        Graph SocialGraph
+        MATCH (p:Person)-[att:Attended]->(e:Event)
+        WHERE p.person_id = @person_id
+        RETURN e.event_id, e.name, e.event_date, att.attendance_time
+        ORDER BY e.event_date DESC
+    """,
+    fields=("event_id", "name", "event_date", "attendance_time"),
+    param_types={"person_id": param_types.STRING},
+))
+
+FRIEND_SUGGESTIONS_QUERY = register(Query(
+    name="social_friend_suggestions",
+    sql="""
+        SELECT candidate_id, candidate_name, mutual_friends, shared_events, score, computed_time
+        FROM FriendSuggestion@{FORCE_INDEX=FriendSuggestionByScore}
+        WHERE person_id = @person_id
+        ORDER BY score DESC
+        LIMIT @limit
+    """,
+    fields=("candidate_id", "candidate_name", "mutual_friends", "shared_events", "score", "computed_time"),
+    param_types={"person_id": param_types.STRING, "limit": param_types.INT64},
+))
+
+
+# The same relations for a whole group, each row tagged with the person it belongs to.
+# A graph query can only limit the whole result, so the group's posts are read
+# in SQL: one newest-first PostByAuthor range per person, each cut at @limit.
+PEOPLE_POSTS_QUERY = register(Query(
+    name="social_people_posts",
+    sql="""
+        SELECT author.person_id AS for_person_id, post.post_id, post.author_id, post.text, post.sentiment,
+               post.post_timestamp, author.name AS author_name
+        FROM Person AS author,
+            UNNEST(ARRAY(
+                SELECT AS STRUCT p.post_id, p.author_id, p.text, p.sentiment, p.post_timestamp
+                FROM Post@{FORCE_INDEX=PostByAuthor} AS p
+                WHERE p.author_id = author.person_id
+                  AND (@since IS NULL OR p.post_timestamp >= @since)
+                  AND (@sentiment IS NULL OR p.sentiment = @sentiment)
+                ORDER BY p.post_timestamp DESC
+                LIMIT @limit
+            )) AS post
+        WHERE author.person_id IN UNNEST(@person_ids)
+        ORDER BY post.post_timestamp DESC
+    """,
+    fields=("for_person_id", "post_id", "author_id", "text", "sentiment", "post_timestamp", "author_name"),
+    param_types={"person_ids": param_types.Array(param_types.STRING), **_POST_FILTER_TYPES},
+))
+
+PEOPLE_FRIENDS_GRAPH_QUERY = register(Query(
+    name="social_people_friends",
+    sql="""
+        Graph SocialGraph
+        MATCH (p:Person)-[f:Friendship]-(friend:Person)
+        WHERE p.person_id IN UNNEST(@person_ids)
+        RETURN DISTINCT p.person_id AS for_person_id, friend.person_id, friend.name
+        ORDER BY friend.name
+    """,
+    fields=("for_person_id", "person_id", "name"),
+    param_types={"person_ids": param_types.Array(param_types.STRING)},
+))
+
+PEOPLE_FRIENDS_DIRECTED_GRAPH_QUERY = register(Query(
+    name="social_people_friends_directed",
+    sql="""
+        Graph SocialGraph
+        MATCH (p:Person)-[f:Friendship]->(friend:Person)
+        WHERE p.person_id IN UNNEST(@person_ids)
+        RETURN p.person_id AS for_person_id, friend.person_id, friend.name
+        ORDER BY friend.name
+    """,
+    fields=("for_person_id", "person_id", "name"),
+    param_types={"person_ids": param_types.Array(param_types.STRING)},
+))
+
+PEOPLE_ATTENDED_EVENTS_GRAPH_QUERY = register(Query(
+    name="social_people_attended_events",
+    sql="""
+        Graph SocialGraph
+        MATCH (p:Person)-[att:Attended]->(e:Event)
+        WHERE p.person_id IN UNNEST(@person_ids)
+        RETURN p.person_id AS for_person_id, e.event_id, e.name, e.event_date, att.attendance_time
+        ORDER BY e.event_date DESC
+    """,
+    fields=("for_person_id", "event_id", "name", "event_date", "attendance_time"),
+    param_types={"person_ids": param_types.Array(param_types.STRING)},
+))
+
+
+def warm_up_queries():
+    """Validates the registered queries against the schema and warms their plans; failures are only logged."""
+    if not db_instance:
+        return
+    try:
+        outcomes = warm_up(db_instance)
+    except Exception as e:
+        print(f"Error warming up queries: {e}")
+        return
+    failed = [name for name, error in outcomes.items() if error is not None]
+    if failed:
+        print(f"{len(failed)} registered queries failed validation: {', '.join(failed)}")
+
+
+def _friends_query(undirected, directed):
+    """The directed friends query if the deployed graph stores Friendship edges both ways, else the undirected one."""
+    return directed if is_symmetric_edge(db_instance, "Friendship") else undirected
+
+
+def _local_snapshot():
+    """The local graph snapshot, or None when disabled or unavailable (callers then query Spanner)."""
+    if local_graph is None:
+        return None
+    try:
+        return local_graph.snapshot()
+    except Exception as e:
+        print(f"Local social graph unavailable, querying Spanner instead: {e}")
+        return None
+
+
+def _isoformat_fields(rows, *fields):
+    """Converts datetime values of `fields` to ISO strings, in place."""
+    for row in rows:
+        for field in fields:
+            if isinstance(row.get(field), datetime):
+                row[field] = row[field].isoformat()
+    return rows
+
+
+def _post_filters(limit, days, sentiment):
+    """
+    Values of the @since, @sentiment and @limit parameters of the post queries.
+
+    Unused filters are passed as NULL, so every combination runs the same
+    registered statement and plan.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=days) if days and days > 0 else None
+    return {"since": since, "sentiment": sentiment or None, "limit": max(int(limit), 0)}
+
+
+def _filter_local_posts(posts, filters):
+    """Applies _post_filters to newest-first posts from the local snapshot."""
+    since, sentiment = filters["since"], filters["sentiment"]
+    kept = [
+        post for post in posts
+        if (since is None or (post['post_timestamp'] is not None and post['post_timestamp'] >= since))
+        and (sentiment is None or post['sentiment'] == sentiment)
+    ]
+    return kept[:filters["limit"]]
+
+
+def get_person_id_by_name(name: str):
+    """
+    Looks up a person's ID by their exact name.
+
+    Args:
+        name: The person's name.
+
+    Returns:
+        str or None: The person_id of the first person with that name, or None
+                     if there is no such person or on error.
+    """
+    snapshot = _local_snapshot()
+    if snapshot is not None:
+        return snapshot.person_id_by_name(name)
+
+    results = run_sql_query(PERSON_ID_BY_NAME_QUERY, params={"name": name})
+
+    if not results:
+        return None
+    return results[0].get('person_id')
+
+
+def get_person_posts(person_id: str, limit: int = DEFAULT_POST_LIMIT, days: int = 0, sentiment: str = ""):
+    """
+    Fetches the most recent posts written by a person, newest first.
+
+    Args:
+        person_id: The ID of the person.
+        limit: Maximum number of posts to return.
+        days: Only posts from the last this many days (0 for any time).
+        sentiment: Only posts with this sentiment, e.g. "positive" (empty for any).
+
+    Returns:
+        list[dict] or None: Posts with post_id, author_id, text, sentiment,
+                            post_timestamp (ISO string) and author_name, or
+                            None on error.
+    """
+    filters = _post_filters(limit, days, sentiment)
+    snapshot = _local_snapshot()
+    if snapshot is not None:
+        return _isoformat_fields(_filter_local_posts(snapshot.posts(person_id), filters), 'post_timestamp')
+
+    results = run_graph_query(PERSON_POSTS_GRAPH_QUERY, params={"person_id": person_id, **filters})
+
+    if results is None:
+        return None
+    return _isoformat_fields(results, 'post_timestamp')
+
+
+def get_person_friends(person_id: str):
+    """
+    Fetches a person's friends, ordered by name.
+
+    Args:
+        person_id: The ID of the person.
+
+    Returns:
+        list[dict] or None: Friends as {person_id, name}, or None on error.
+    """
+    snapshot = _local_snapshot()
+    if snapshot is not None:
+        return snapshot.friends(person_id)
+
+    query = _friends_query(PERSON_FRIENDS_GRAPH_QUERY, PERSON_FRIENDS_DIRECTED_GRAPH_QUERY)
+    return run_graph_query(query, params={"person_id": person_id})
+
+
+def get_person_attended_events(person_id: str):
+    """
+    Fetches the events a person attended, latest event first.
+
+    Args:
+        person_id: The ID of the person.
+
+    Returns:
+        list[dict] or None: Events with event_id, name, event_date and
+                            attendance_time (ISO strings), or None on error.
+    """
+    snapshot = _local_snapshot()
+    if snapshot is not None:
+        return _isoformat_fields(snapshot.attended_events(person_id), 'event_date', 'attendance_time')
+
+    results = run_graph_query(PERSON_ATTENDED_EVENTS_GRAPH_QUERY, params={"person_id": person_id})
+
+    if results is None:
+        return None
+    return _isoformat_fields(results, 'event_date', 'attendance_time')
+
+
+def _group_by_person(rows, person_ids, key='for_person_id'):
+    """Splits rows tagged with `key` into one list per person ID, dropping the tag."""
+    grouped = {person_id: [] for person_id in person_ids}
+    for row in rows:
+        grouped.setdefault(row.pop(key), []).append(row)
+    return grouped
+
+
+def get_people_profiles(names: list[str], posts_per_person: int = DEFAULT_POST_LIMIT, days: int = 0, sentiment: str = ""):
+    """
+    Fetches the posts, friends and attended events of several people at once.
+
+    Costs one query per relation for the whole group (plus one to resolve the
+    names), instead of one query per person and relation.
+
+    Args:
+        names: The people's exact names.
+        posts_per_person: Maximum number of posts per person, newest first.
+        days: Only posts from the last this many days (0 for any time).
+        sentiment: Only posts with this sentiment (empty for any).
+
+    Returns:
+        dict or None: For every requested name, None if no such person exists,
+                      otherwise a dict with person_id, posts, friends and
+                      attended_events shaped like get_person_posts,
+                      get_person_friends and get_person_attended_events.
+                      None on error.
+    """
+    names = list(dict.fromkeys(names))
+    filters = _post_filters(posts_per_person, days, sentiment)
+    snapshot = _local_snapshot()
+    if snapshot is not None:
+        profiles = {}
+        for name in names:
+            person_id = snapshot.person_id_by_name(name)
+            profiles[name] = None if person_id is None else {
+                "person_id": person_id,
+                "posts": _isoformat_fields(_filter_local_posts(snapshot.posts(person_id), filters), 'post_timestamp'),
+                "friends": snapshot.friends(person_id),
+                "attended_events": _isoformat_fields(snapshot.attended_events(person_id), 'event_date', 'attendance_time'),
+            }
+        return profiles
+
+    people = run_sql_query(PERSON_IDS_BY_NAMES_QUERY, params={"names": names})
+    if people is None:
+        return None
+
+    # Like get_person_id_by_name, a name shared by several people resolves to one of them
+    person_id_by_name = {}
+    for person in people:
+        person_id_by_name.setdefault(person['name'], person['person_id'])
+    person_ids = list(dict.fromkeys(person_id_by_name.values()))
+    if not person_ids:
+        return {name: None for name in names}
+
+    params = {"person_ids": person_ids}
+    posts = run_sql_query(PEOPLE_POSTS_QUERY, params={**params, **filters})
+    friends = run_graph_query(_friends_query(PEOPLE_FRIENDS_GRAPH_QUERY, PEOPLE_FRIENDS_DIRECTED_GRAPH_QUERY), params=params)
+    events = run_graph_query(PEOPLE_ATTENDED_EVENTS_GRAPH_QUERY, params=params)
+    if posts is None or friends is None or events is None:
+        return None
+
+    posts_by_person = _group_by_person(_isoformat_fields(posts, 'post_timestamp'), person_ids)
+    friends_by_person = _group_by_person(friends, person_ids)
+    events_by_person = _group_by_person(_isoformat_fields(events, 'event_date', 'attendance_time'), person_ids)
+
+    profiles = {}
+    for name in names:
+        person_id = person_id_by_name.get(name)
+        profiles[name] = None if person_id is None else {
+            "person_id": person_id,
+            "posts": posts_by_person[person_id],
+            "friends": friends_by_person[person_id],
+            "attended_events": events_by_person[person_id],
+        }
+    return profiles
+
+
+def get_friend_suggestions(person_id: str, limit: int = 10):
+    """
+    Suggests people a person may know: friends of their friends, ranked by
+    mutual friends and events attended together.
+
+    Suggestions are precomputed (instavibe/friend_suggestions.py), so this is
+    one read of the FriendSuggestionByScore index.
+
+    Args:
+        person_id: The ID of the person.
+        limit: Maximum number of suggestions (best first).
+
+    Returns:
+        list[dict] or None: Suggestions with candidate_id, candidate_name,
+                            mutual_friends, shared_events, score and
+                            computed_time (ISO string), or None on error.
+    """
+    results = run_sql_query(FRIEND_SUGGESTIONS_QUERY, params={"person_id": person_id, "limit": limit})
+
+    if results is None:
+        return None
+
+    for suggestion in results:
+        if isinstance(suggestion.get('computed_time'), datetime):
+            suggestion['computed_time'] = suggestion['computed_time'].isoformat()
+    return results
+
+
+if SPANNER_WARMUP:
+    warm_up_queries()
@@ -0,0 +1,449 @@
+# social_graph.py
+#
+# In-process snapshot of the SocialGraph for the social agent's tool calls.
+#
+# A profile/summary loop asks for the same people's friends, posts and events
+# over and over; with SOCIAL_GRAPH_LOCAL enabled those calls are answered from
+# memory instead of one Spanner round trip each. Edges (Friendship, Attended,
+# Wrote, Mentioned) are kept in compressed sparse row (CSR) form: for every
+# source node an offset into one flat array of edge ids, so a node's
+# neighbours are a single slice.
+#
+# The snapshot is loaded once from Spanner (or from a snapshot file, if
+# present) and then refreshed incrementally: every table carries a commit
+# timestamp, so a refresh only reads rows committed after the last one. The
+# app never deletes rows, so additions are all a refresh has to apply.
+#
+# Applying them is incremental too. Each snapshot indexes the edges of one
+# compacted CSR plus, per source node, the edges appended since; a refresh
+# only groups its new edges, and the CSR is rebuilt once the appended edges
+# outgrow a fraction of it, so the cost per new edge stays constant on average.
+# Published snapshots are never modified: node attributes are copied before an
+# update, and a snapshot ignores nodes and edges added after it.
+#
+# Snapshot files are pickles, and unpickling runs code. They are only loaded
+# when owned by this process's user and writable by nobody else; point
+# SOCIAL_GRAPH_SNAPSHOT at a directory only this service can write to.
+
+import logging
+import os
+import pickle
+import stat
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from google.cloud.spanner_v1 import param_types
+
+log = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_SNAPSHOT_FORMAT = 2
+
+# Edges appended since the last CSR build, as a fraction of the edges in it
+# (and at least _COMPACT_MIN_EDGES), before the CSR is rebuilt.
+_COMPACT_FRACTION = 0.25
+_COMPACT_MIN_EDGES = 4096
+
+# Rows committed after @since (the previous refresh's read timestamp), per table.
+_DELTA_QUERIES = {
+    "persons": "SELECT person_id, name, create_time FROM Person WHERE create_time > @since",
+    "events": "SELECT event_id, name, event_date, create_time FROM Event WHERE create_time > @since",
+    "posts": "SELECT post_id, author_id, text, sentiment, post_timestamp, create_time FROM Post WHERE create_time > @since",
+    "friendships": "SELECT person_id_a, person_id_b, friendship_time FROM Friendship WHERE friendship_time > @since",
+    "attendance": "SELECT person_id, event_id, attendance_time FROM Attendance WHERE attendance_time > @since",
+    "mentions": "SELECT post_id, mentioned_person_id, mention_time FROM Mention WHERE mention_time > @since",
+}
+
+
+def _csr(num_sources, sources):
+    """
+    Groups edge ids by source node.
+
+    Args:
+        num_sources (int): Number of source nodes.
+        sources (array): The source node of every edge, indexed by edge id.
+
+    Returns:
+        tuple[array, array]: `offsets` (num_sources + 1 entries) and `edge_ids`;
+        the edges of node n are edge_ids[offsets[n]:offsets[n + 1]].
+    """
+    offsets = array("q", [0]) * (num_sources + 1)
+    for source in sources:
+        offsets[source + 1] += 1
+    for node in range(num_sources):
+        offsets[node + 1] += offsets[node]
+    cursor = array("q", offsets[:-1])
+    edge_ids = array("q", [0]) * len(sources)
+    for edge_id, source in enumerate(sources):
+        edge_ids[cursor[source]] = edge_id
+        cursor[source] += 1
+    return offsets, edge_ids
+
+
+class _Adjacency:
+    """
+    The edge ids of the first `num_edges` edges of an _EdgeList, by source node.
+
+    Edges up to `base_edges` are in a CSR (see _csr); later ones are tuples in
+    `pending`. Instances are never modified, so a snapshot can keep using one
+    while later refreshes extend the edge list.
+    """
+
+    def __init__(self, offsets, edge_ids, base_edges, pending, num_edges):
+        self._offsets = offsets
+        self._edge_ids = edge_ids
+        self.base_edges = base_edges
+        self.pending = pending
+        self.num_edges = num_edges
+
+    @classmethod
+    def build(cls, num_sources, sources):
+        """Groups every edge in `sources` into a fresh CSR."""
+        offsets, edge_ids = _csr(num_sources, sources)
+        return cls(offsets, edge_ids, len(sources), {}, len(sources))
+
+    def extend(self, num_sources, sources):
+        """
+        Returns an _Adjacency that also covers the edges appended to `sources`.
+
+        Only the new edges are grouped, unless the pending ones have outgrown
+        the CSR; then everything is rebuilt into one.
+        """
+        num_edges = len(sources)
+        if num_edges == self.num_edges:
+            return self
+        if num_edges - self.base_edges > max(_COMPACT_MIN_EDGES, self.base_edges * _COMPACT_FRACTION):
+            return _Adjacency.build(num_sources, sources)
+        added = {}
+        for edge_id in range(self.num_edges, num_edges):
+            added.setdefault(sources[edge_id], []).append(edge_id)
+        pending = dict(self.pending)
+        for source, edge_ids in added.items():
+            pending[source] = pending.get(source, ()) + tuple(edge_ids)
+        return _Adjacency(self._offsets, self._edge_ids, self.base_edges, pending, num_edges)
+
+    def edge_ids(self, source):
+        """The ids of the edges leaving `source`, oldest first."""
+        offsets = self._offsets
+        base = self._edge_ids[offsets[source]:offsets[source + 1]] if source + 1 < len(offsets) else ()
+        return [*base, *self.pending.get(source, ())]
+
+
+class _NodeTable:
+    """
+    Append-only node store: external id -> dense index, plus per-node attributes.
+
+    Attribute columns handed to a snapshot (see `share`) are copied before an
+    existing node is updated, so the snapshot keeps seeing the previous values.
+    """
+
+    def __init__(self, *attributes):
+        self.ids = []
+        self.index = {}
+        self.attributes = {name: [] for name in attributes}
+        self._copied = set() # Columns copied since the last share(), safe to update in place
+
+    def share(self):
+        """The attribute columns, for a snapshot; later updates go to copies."""
+        self._copied.clear()
+        return dict(self.attributes)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, node_id, **values):
+        """Adds or updates a node and returns its index."""
+        position = self.index.get(node_id)
+        if position is None:
+            position = len(self.ids)
+            self.ids.append(node_id)
+            for name, column in self.attributes.items():
+                column.append(values.get(name))
+            self.index[node_id] = position
+        else:
+            for name, value in values.items():
+                column = self.attributes[name]
+                if column[position] == value:
+                    continue
+                if name not in self._copied:
+                    column = self.attributes[name] = list(column)
+                    self._copied.add(name)
+                column[position] = value
+        return position
+
+
+class _EdgeList:
+    """Append-only edge store as parallel arrays (source, target) plus an optional payload."""
+
+    def __init__(self):
+        self.sources = array("q")
+        self.targets = array("q")
+        self.payload = []
+
+    def __len__(self):
+        return len(self.sources)
+
+    def add(self, source, target, payload=None):
+        self.sources.append(source)
+        self.targets.append(target)
+        self.payload.append(payload)
+
+
+class GraphSnapshot:
+    """
+    An immutable, queryable view of the graph as of `as_of`.
+
+    Node ids and edge lists are shared with later snapshots; they are only
+    appended to, and this view only looks at the nodes and edges it indexed.
+    It keeps its own references to the attribute columns, which are copied
+    rather than changed in place (see _NodeTable).
+    """
+
+    def __init__(self, store, as_of, previous=None):
+        """
+        Args:
+            store (_GraphStore): Everything loaded so far.
+            as_of (datetime): The read timestamp the store is complete up to.
+            previous (GraphSnapshot, optional): An earlier snapshot of the same
+                store; only the edges added since it are indexed.
+        """
+        self.as_of = as_of
+        self._store = store
+        self._num_persons = len(store.persons)
+        self._person_names = store.persons.share()["name"]
+        self._event_attributes = store.events.share()
+        self._post_attributes = store.posts.share()
+        self._person_by_name = store.person_by_name
+        self._friends = self._index(store.friendships, previous and previous._friends)
+        self._attended = self._index(store.attendance, previous and previous._attended)
+        self._wrote = self._index(store.wrote, previous and previous._wrote)
+        self._mentioned = self._index(store.mentions, previous and previous._mentioned)
+
+    def _index(self, edges, earlier):
+        if earlier is None:
+            return _Adjacency.build(self._num_persons, edges.sources)
+        return earlier.extend(self._num_persons, edges.sources)
+
+    def _neighbours(self, adjacency, edges, person_id):
+        position = self._store.persons.index.get(person_id)
+        if position is None or position >= self._num_persons:
+            return []
+        return [(edges.targets[e], edges.payload[e]) for e in adjacency.edge_ids(position)]
+
+    def person_id_by_name(self, name):
+        # Names resolve to the first person loaded with that name, like a LIMIT 1 lookup
+        position = self._person_by_name.get(name)
+        if position is None or position >= self._num_persons:
+            return None
+        return self._store.persons.ids[position]
+
+    def friends(self, person_id):
+        persons = self._store.persons
+        names = self._person_names
+        friends = {target: names[target] for target, _ in self._neighbours(self._friends, self._store.friendships, person_id)}
+        return sorted(({"person_id": persons.ids[target], "name": name} for target, name in friends.items()),
+                      key=lambda friend: (friend["name"] or "", friend["person_id"]))
+
+    def posts(self, person_id):
+        posts = self._store.posts
+        attributes = self._post_attributes
+        author_position = self._store.persons.index.get(person_id)
+        author_name = self._person_names[author_position] if author_position is not None and author_position < self._num_persons else None
+        rows = [
+            {
+                "post_id": posts.ids[target],
+                "author_id": person_id,
+                "text": attributes["text"][target],
+                "sentiment": attributes["sentiment"][target],
+                "post_timestamp": attributes["post_timestamp"][target],
+                "author_name": author_name,
+            }
+            for target, _ in self._neighbours(self._wrote, self._store.wrote, person_id)
+        ]
+        rows.sort(key=lambda post: post["post_timestamp"] or _EPOCH, reverse=True)
+        return rows
+
+    def attended_events(self, person_id):
+        events = self._store.events
+        attributes = self._event_attributes
+        rows = [
+            {
+                "event_id": events.ids[target],
+                "name": attributes["name"][target],
+                "event_date": attributes["event_date"][target],
+                "attendance_time": attendance_time,
+            }
+            for target, attendance_time in self._neighbours(self._attended, self._store.attendance, person_id)
+        ]
+        rows.sort(key=lambda event: event["event_date"] or _EPOCH, reverse=True)
+        return rows
+
+    def mentioning_posts(self, person_id):
+        """Post IDs that mention the person."""
+        return [self._store.posts.ids[target] for target, _ in self._neighbours(self._mentioned, self._store.mentions, person_id)]
+
+
+class _GraphStore:
+    """Everything loaded so far, in a form that can be pickled to a snapshot file."""
+
+    def __init__(self):
+        self.persons = _NodeTable("name")
+        self.events = _NodeTable("name", "event_date")
+        self.posts = _NodeTable("text", "sentiment", "post_timestamp")
+        self.friendships = _EdgeList()  # Person -> Person, both directions
+        self.attendance = _EdgeList()   # Person -> Event, payload attendance_time
+        self.wrote = _EdgeList()        # Person -> Post
+        self.mentions = _EdgeList()     # Person -> Post that mentions them
+        self.person_by_name = {}        # name -> position of the first person with it
+        self.high_water = _EPOCH        # Everything committed up to here is loaded
+        self.skipped = 0                # Edges whose endpoint was not loaded
+
+    def apply(self, delta):
+        """Adds the rows of one refresh; nodes first, so the edges can resolve them."""
+        persons, events, posts = self.persons, self.events, self.posts
+        renamed = False
+        for person_id, name, _ in delta["persons"]:
+            position = persons.index.get(person_id)
+            renamed = renamed or (position is not None and persons.attributes["name"][position] != name)
+            position = persons.add(person_id, name=name)
+            self.person_by_name.setdefault(name, position)
+        if renamed:
+            # A rename can change which person a name resolves to; published
+            # snapshots keep the previous index
+            self.person_by_name = {}
+            for position, name in enumerate(persons.attributes["name"]):
+                self.person_by_name.setdefault(name, position)
+        for event_id, name, event_date, _ in delta["events"]:
+            events.add(event_id, name=name, event_date=event_date)
+        for post_id, author_id, text, sentiment, post_timestamp, _ in delta["posts"]:
+            post = posts.add(post_id, text=text, sentiment=sentiment, post_timestamp=post_timestamp)
+            author = persons.index.get(author_id)
+            if author is None:
+                self.skipped += 1
+            else:
+                self.wrote.add(author, post)
+        for person_id_a, person_id_b, friendship_time in delta["friendships"]:
+            a, b = persons.index.get(person_id_a), persons.index.get(person_id_b)
+            if a is None or b is None:
+                self.skipped += 1
+                continue
+            self.friendships.add(a, b, friendship_time)
+            self.friendships.add(b, a, friendship_time)
+        for person_id, event_id, attendance_time in delta["attendance"]:
+            person, event = persons.index.get(person_id), events.index.get(event_id)
+            if person is None or event is None:
+                self.skipped += 1
+                continue
+            self.attendance.add(person, event, attendance_time)
+        for post_id, person_id, mention_time in delta["mentions"]:
+            person, post = persons.index.get(person_id), posts.index.get(post_id)
+            if person is None or post is None:
+                self.skipped += 1
+                continue
+            self.mentions.add(person, post, mention_time)
+
+
+class LocalSocialGraph:
+    """
+    A lazily refreshed in-memory SocialGraph.
+
+    `snapshot()` returns the current GraphSnapshot and, when it is older than
+    `refresh_seconds`, first reads the rows committed since. Only one caller
+    refreshes at a time; concurrent callers keep using the current snapshot.
+    """
+
+    def __init__(self, database, snapshot_path=None, refresh_seconds=30.0):
+        self._database = database
+        self._snapshot_path = snapshot_path
+        self._refresh_seconds = refresh_seconds
+        self._store = _GraphStore()
+        self._snapshot = None
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        if snapshot_path and os.path.exists(snapshot_path):
+            self._load_file(snapshot_path)
+
+    def _load_file(self, path):
+        # Unpickling runs code: only load files this process's user wrote (see save)
+        try:
+            with open(path, "rb") as f:
+                info = os.fstat(f.fileno())
+                if info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+                    log.warning("Ignoring social graph snapshot %s: not owned by this user, or writable by others", path)
+                    return
+                version, store = pickle.load(f)
+        except Exception as e:
+            log.warning("Could not load social graph snapshot %s: %s", path, e)
+            return
+        if version != _SNAPSHOT_FORMAT:
+            log.warning("Ignoring social graph snapshot %s with format %s", path, version)
+            return
+        self._store = store
+        self._snapshot = GraphSnapshot(store, store.high_water)
+        log.info("Loaded social graph snapshot %s as of %s", path, store.high_water)
+
+    def save(self, path=None):
+        """Writes the loaded graph to `path` (default: the configured snapshot path)."""
+        with self._lock:
+            self._save_locked(path or self._snapshot_path)
+
+    def _save_locked(self, path):
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path) # Created afresh below, so nobody else can own it
+        with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as f:
+            pickle.dump((_SNAPSHOT_FORMAT, self._store), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def refresh(self):
+        """Reads everything committed since the last refresh and publishes a new snapshot."""
+        with self._lock:
+            return self._refresh_locked()
+
+    def _refresh_locked(self):
+        store = self._store
+        # Read slightly in the past: a commit timestamp is never later than the
+        # read timestamp of a snapshot that sees it, so rows committed after
+        # `as_of` are picked up by the next refresh.
+        as_of = datetime.now(timezone.utc) - timedelta(seconds=1)
+        if self._snapshot is not None and as_of <= store.high_water:
+            return self._snapshot
+        started = time.monotonic()
+        delta = {}
+        with self._database.snapshot(read_timestamp=as_of, multi_use=True) as snapshot:
+            for name, sql in _DELTA_QUERIES.items():
+                delta[name] = list(snapshot.execute_sql(
+                    sql, params={"since": store.high_water}, param_types={"since": param_types.TIMESTAMP},
+                ))
+        new_rows = sum(len(rows) for rows in delta.values())
+        store.apply(delta)
+        store.high_water = as_of
+        if new_rows or self._snapshot is None:
+            # Only the new edges are indexed (see _Adjacency.extend)
+            self._snapshot = GraphSnapshot(store, as_of, previous=self._snapshot)
+            if self._snapshot_path:
+                self._save_locked(self._snapshot_path)
+        self._refreshed_at = time.monotonic()
+        log.debug("Social graph refreshed to %s with %d new rows in %.3fs", as_of, new_rows, time.monotonic() - started)
+        return self._snapshot
+
+    def snapshot(self):
+        """Returns the current snapshot, refreshing it first if it is due."""
+        current = self._snapshot
+        if current is None:
+            with self._lock:
+                return self._snapshot or self._refresh_locked()
+        if time.monotonic() - self._refreshed_at < self._refresh_seconds:
+            return current
+        if not self._lock.acquire(blocking=False):
+            return current # Another caller is already refreshing
+        try:
+            return self._refresh_locked()
+        except Exception as e:
+            log.warning("Social graph refresh failed, serving the snapshot as of %s: %s", current.as_of, e)
+            self._refreshed_at = time.monotonic()
+            return current
+        finally:
+            self._lock.release()
@@ -0,0 +1,6 @@
+# social/__init__.py imports the ADK agent, so the graph module is imported on
+# its own, from the package directory.
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "social"))
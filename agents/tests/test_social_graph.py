@@ -0,0 +1,119 @@
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import social_graph
+from social_graph import GraphSnapshot, LocalSocialGraph, _GraphStore, _csr
+
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _delta(persons=(), events=(), posts=(), friendships=(), attendance=(), mentions=()):
+    return {
+        "persons": [(person_id, name, T0) for person_id, name in persons],
+        "events": [(event_id, name, event_date, T0) for event_id, name, event_date in events],
+        "posts": [(post_id, author_id, text, "positive", timestamp, T0) for post_id, author_id, text, timestamp in posts],
+        "friendships": [(a, b, T0) for a, b in friendships],
+        "attendance": [(person_id, event_id, T0) for person_id, event_id in attendance],
+        "mentions": [(post_id, person_id, T0) for post_id, person_id in mentions],
+    }
+
+
+@pytest.fixture
+def store():
+    store = _GraphStore()
+    store.apply(_delta(
+        persons=[("p1", "Alice"), ("p2", "Bob"), ("p3", "Carol"), ("p4", "Alice")],
+        events=[("e1", "Meetup", T0), ("e2", "Concert", T0 + timedelta(days=3))],
+        posts=[("post1", "p1", "old", T0), ("post2", "p1", "new", T0 + timedelta(hours=1)), ("post3", "p2", "hi", T0)],
+        friendships=[("p1", "p2"), ("p1", "p3"), ("p2", "p3"), ("p1", "missing")],
+        attendance=[("p1", "e1"), ("p1", "e2"), ("p3", "e2")],
+        mentions=[("post3", "p1")],
+    ))
+    return store
+
+
+def test_csr_groups_edges_by_source():
+    offsets, edge_ids = _csr(3, [2, 0, 2, 1, 0])
+    groups = [sorted(edge_ids[offsets[n]:offsets[n + 1]]) for n in range(3)]
+    assert groups == [[1, 4], [3], [0, 2]]
+
+
+def test_neighbour_lookups(store):
+    snapshot = GraphSnapshot(store, T0)
+    assert snapshot.friends("p1") == [{"person_id": "p2", "name": "Bob"}, {"person_id": "p3", "name": "Carol"}]
+    assert [f["person_id"] for f in snapshot.friends("p3")] == ["p1", "p2"] # Both directions, by name
+    assert [post["post_id"] for post in snapshot.posts("p1")] == ["post2", "post1"] # Newest first
+    assert snapshot.posts("p1")[0]["author_name"] == "Alice"
+    assert [event["event_id"] for event in snapshot.attended_events("p1")] == ["e2", "e1"]
+    assert snapshot.mentioning_posts("p1") == ["post3"]
+    assert snapshot.friends("p4") == [] and snapshot.friends("nobody") == []
+    assert store.skipped == 1 # The friendship with an unknown person
+
+
+def test_names_resolve_to_the_first_person_loaded(store):
+    snapshot = GraphSnapshot(store, T0)
+    assert snapshot.person_id_by_name("Alice") == "p1"
+    assert snapshot.person_id_by_name("Nobody") is None
+
+
+def test_snapshots_ignore_later_nodes_edges_and_updates(store):
+    before = GraphSnapshot(store, T0)
+    store.apply(_delta(
+        persons=[("p5", "Dave"), ("p2", "Robert")], # New person, and a rename
+        events=[("e1", "Renamed meetup", T0)],
+        friendships=[("p1", "p5")],
+    ))
+    after = GraphSnapshot(store, T0 + timedelta(minutes=1), previous=before)
+
+    assert [f["name"] for f in before.friends("p1")] == ["Bob", "Carol"]
+    assert before.person_id_by_name("Dave") is None and before.friends("p5") == []
+    assert before.attended_events("p1")[1]["name"] == "Meetup"
+    assert [f["name"] for f in after.friends("p1")] == ["Carol", "Dave", "Robert"]
+    assert after.person_id_by_name("Robert") == "p2" and after.person_id_by_name("Bob") is None
+    assert after.attended_events("p1")[1]["name"] == "Renamed meetup"
+
+
+def test_incremental_snapshots_match_a_full_rebuild(monkeypatch):
+    monkeypatch.setattr(social_graph, "_COMPACT_MIN_EDGES", 16) # Compact several times
+    rng = random.Random(5)
+    store, snapshot, people = _GraphStore(), None, []
+    for step in range(40):
+        new_people = [f"p{len(people) + i}" for i in range(rng.randrange(4))]
+        people += new_people
+        friendships = [tuple(rng.sample(people, 2)) for _ in range(rng.randrange(12))] if len(people) > 1 else []
+        store.apply(_delta(persons=[(p, f"Name {p}") for p in new_people], friendships=friendships))
+        snapshot = GraphSnapshot(store, T0, previous=snapshot)
+        rebuilt = GraphSnapshot(store, T0)
+        for person_id in people:
+            assert snapshot.friends(person_id) == rebuilt.friends(person_id), (step, person_id)
+    assert snapshot._friends.base_edges > 0 and snapshot._friends.num_edges == len(store.friendships)
+
+
+def test_refresh_without_new_edges_reuses_the_index(store):
+    first = GraphSnapshot(store, T0)
+    second = GraphSnapshot(store, T0, previous=first)
+    assert second._friends is first._friends
+
+
+def test_snapshot_file_round_trip(store, tmp_path):
+    path = str(tmp_path / "graph.pickle")
+    graph = LocalSocialGraph(None)
+    graph._store = store
+    graph.save(path)
+    assert os.stat(path).st_mode & 0o777 == 0o600
+
+    loaded = LocalSocialGraph(None, snapshot_path=path)
+    assert loaded._snapshot is not None
+    assert loaded._snapshot.friends("p1") == GraphSnapshot(store, T0).friends("p1")
+
+
+def test_snapshot_files_writable_by_others_are_not_loaded(store, tmp_path):
+    path = str(tmp_path / "graph.pickle")
+    graph = LocalSocialGraph(None)
+    graph._store = store
+    graph.save(path)
+    os.chmod(path, 0o666)
+    assert LocalSocialGraph(None, snapshot_path=path)._snapshot is None
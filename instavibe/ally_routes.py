@@ -1,12 +1,14 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, Response, stream_with_context
 import json 
-import traceback 
+import logging
 # REPLACE ME TO ADD IMPORT
 
 
 # It's good practice to use a Blueprint for organizing routes
 ally_bp = Blueprint('ally', __name__, template_folder='templates')
 
+log = logging.getLogger(__name__)
+
 def get_all_people_for_ally_page():
     """
     Fetches all people from the Person table to be listed as friends.
@@ -15,38 +17,29 @@ def get_all_people_for_ally_page():
     try:
         # Import here to avoid circular dependencies at module load time
         # and ensure app.py's db and run_query are initialized.
-        from app import db as main_app_db, run_query as main_app_run_query
+        from app import db as main_app_db, run_query as main_app_run_query, ALL_PEOPLE_QUERY
         # param_types might be needed if run_query is called with params
         # from google.cloud.spanner_v1 import param_types as main_app_param_types
 
         if not main_app_db:
-            print("Error in ally_routes.get_all_people_for_ally_page: main_app_db is not available from app.py.")
+            log.error("get_all_people_for_ally_page: main_app_db is not available from app.py.")
             return [] # Return empty list if db connection failed
 
-        sql = """
-            SELECT person_id, name
-            FROM Person
-            ORDER BY name
-        """
-        fields = ["person_id", "name"]
         # The run_query function in your app.py uses the global 'db' from app.py
-        people = main_app_run_query(sql, expected_fields=fields)
+        people = main_app_run_query(ALL_PEOPLE_QUERY)
         return people
     except ImportError:
-        print("ERROR in ally_routes.get_all_people_for_ally_page: Could not import db or run_query from app.py. Check app.py structure and execution.")
+        log.error("get_all_people_for_ally_page: Could not import db or run_query from app.py. Check app.py structure and execution.")
         return [] # Fallback to empty list
     except Exception as e:
-        print(f"Error fetching people in ally_routes.get_all_people_for_ally_page: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error fetching people in get_all_people_for_ally_page: %s", e)
         return []
 
 @ally_bp.route('/introvert-ally', methods=['GET'])
 def introvert_ally_page():
     """Renders the Introvert Ally page."""
-    print("--- DEBUG: introvert_ally_page route CALLED (ally_routes.py) ---")
     friends_list = get_all_people_for_ally_page()
-    print(f"--- DEBUG: Friends data from DB for ally page: {friends_list} ---")
+    log.debug("Friends data from DB for ally page: %s", friends_list)
     if friends_list is None: # Should be an empty list on error from get_all_people_for_ally_page
         friends_list = []
         flash("Could not load the list of people from the database.", "warning")
@@ -77,68 +70,84 @@ def submit_introvert_ally_request():
         session.pop('ally_plan_details', None)
         session.pop('ally_agent_thoughts', None) # This is now handled by SSE stream
 
-        print(f"Introvert Ally Request Received, redirecting to review page for streaming:")
-        print(f"  Date: {date}")
-        print(f"  Location: {location_preference}")
-        print(f"  Selected Friends: {selected_friend_names_list}")
+        log.info("Introvert Ally request received, redirecting to review page for streaming",
+                 extra={"planned_date": date, "location": location_preference, "selected_friends": selected_friend_names_list})
 
         return redirect(url_for('ally.introvert_ally_review_page'))
 
     return redirect(url_for('ally.introvert_ally_page')) # Fallback redirect
 
+def sse_message(event_type, data):
+    """Formats one Server-Sent Event whose data is `data` encoded as JSON."""
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+def plan_stream_messages(ally_params, on_finished=None):
+    """
+    Yields the SSE messages of one plan-generation run.
+
+    Shared by the Flask route below and the async streaming route in asgi.py.
+
+    Args:
+        ally_params (dict): The 'ally_request_params' stored by the submit route.
+        on_finished (Callable[[dict], None], optional): Called with the final
+            plan (or error payload) once the agent has produced it.
+    """
+    log.debug("SSE plan stream started for %s", ally_params.get('user_name', 'Unknown User'))
+    try:
+        for event_data in call_agent_for_plan(
+            user_name=ally_params['user_name'],
+            planned_date=ally_params['planned_date'],
+            location_n_perference=ally_params['location_n_perference'],
+            selected_friend_names_list=ally_params['selected_friend_names_list']
+        ):
+            event_type = event_data.get("type", "thought") 
+            # Ensure data is JSON serializable, especially for complex objects or None
+            data_to_send = event_data.get("data")
+            try:
+                data_payload = json.dumps(data_to_send)
+            except TypeError as te:
+                log.warning("TypeError serializing data for SSE event '%s': %s. Data: %r", event_type, te, data_to_send)
+                # Fallback or skip this event if it's not critical, or send an error event
+                data_payload = json.dumps({"error": "Data serialization issue", "original_type": str(type(data_to_send))})
+                event_type = "thought_error" # Custom event type for this specific issue
+            message_to_send = f"event: {event_type}\ndata: {data_payload}\n\n" # Moved outside the try-except for json.dumps
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("SSE yielding event='%s', data_preview='%s...'", event_type, data_payload[:100])
+            yield message_to_send
+
+            if event_type == "plan_complete" or event_type == "error": # Note: 'error' here is a custom event from call_agent_for_plan
+                log.info("Plan generation finished with type: %s.", event_type)
+                if on_finished:
+                    on_finished(data_to_send) # Original data, not the json string
+        
+        log.debug("call_agent_for_plan loop finished normally. Yielding stream_end.")
+        yield sse_message("stream_end", {}) # Ensure valid JSON for stream_end
+
+    except Exception as e:
+        log.exception("Exception during plan stream or from call_agent_for_plan: %s", e)
+        error_payload_data = {
+            "message": f"Server error during plan generation: {str(e)}",
+            "raw_output": "Check server console logs for full traceback."
+        }
+        yield sse_message("error", error_payload_data) # This is the SSE 'error' event type
+        if on_finished:
+            on_finished(error_payload_data) # Store error for potential page reload
+    finally:
+        log.debug("SSE plan stream ending.")
+
 @ally_bp.route('/introvert-ally/stream-plan')
 def stream_introvert_ally_plan():
     ally_params = session.get('ally_request_params')
     if not ally_params:
         def error_stream():
-            yield f"event: error\ndata: {json.dumps({'message': 'Missing plan parameters in session.'})}\n\n"
+            yield sse_message("error", {'message': 'Missing plan parameters in session.'})
         return Response(stream_with_context(error_stream()), mimetype='text/event-stream')
 
-    def generate_stream():
-        print(f"--- PY_SSE: generate_stream called for {ally_params.get('user_name', 'Unknown User')} ---")
-        try:
-            for event_data in call_agent_for_plan(
-                user_name=ally_params['user_name'],
-                planned_date=ally_params['planned_date'],
-                location_n_perference=ally_params['location_n_perference'],
-                selected_friend_names_list=ally_params['selected_friend_names_list']
-            ):
-                event_type = event_data.get("type", "thought") 
-                # Ensure data is JSON serializable, especially for complex objects or None
-                data_to_send = event_data.get("data")
-                try:
-                    data_payload = json.dumps(data_to_send)
-                except TypeError as te:
-                    print(f"!!! PY_SSE: TypeError serializing data for event '{event_type}': {te}. Data: {data_to_send} !!!")
-                    # Fallback or skip this event if it's not critical, or send an error event
-                    data_payload = json.dumps({"error": "Data serialization issue", "original_type": str(type(data_to_send))})
-                    event_type = "thought_error" # Custom event type for this specific issue
-                message_to_send = f"event: {event_type}\ndata: {data_payload}\n\n" # Moved outside the try-except for json.dumps
-                print(f"--- PY_SSE: Yielding to client: event='{event_type}', data_preview='{data_payload[:100]}...' ---")
-                yield message_to_send
-
-                if event_type == "plan_complete" or event_type == "error": # Note: 'error' here is a custom event from call_agent_for_plan
-                    session['ally_plan_details'] = data_to_send # Store original data, not json string
-                    session.modified = True # Explicitly mark session as modified
-                    print(f"--- PY_SSE: Plan generation finished with type: {event_type}. Stored in session. ---")
-            
-            print(f"--- PY_SSE: call_agent_for_plan loop finished normally. Yielding stream_end. ---")
-            yield f"event: stream_end\ndata: {json.dumps({})}\n\n" # Ensure valid JSON for stream_end
-
-        except Exception as e:
-            print(f"!!! PY_SSE: EXCEPTION during generate_stream or from call_agent_for_plan: {str(e)} !!!")
-            traceback.print_exc() # Print full traceback to server console
-            error_payload_data = {
-                "message": f"Server error during plan generation: {str(e)}",
-                "raw_output": "Check server console logs for full traceback."
-            }
-            error_payload_json = json.dumps(error_payload_data)
-            yield f"event: error\ndata: {error_payload_json}\n\n" # This is the SSE 'error' event type
-            session['ally_plan_details'] = error_payload_data # Store error for potential page reload
-            session.modified = True # Explicitly mark session as modified
-        finally:
-            print(f"--- PY_SSE: generate_stream function is ending. ---")       
-    return Response(stream_with_context(generate_stream()), mimetype='text/event-stream')
+    def store_plan(plan_details):
+        session['ally_plan_details'] = plan_details
+        session.modified = True # Explicitly mark session as modified
+
+    return Response(stream_with_context(plan_stream_messages(ally_params, on_finished=store_plan)), mimetype='text/event-stream')
 
 @ally_bp.route('/introvert-ally/review', methods=['GET'])
 def introvert_ally_review_page():
@@ -163,25 +172,22 @@ def confirm_introvert_ally_plan():
     confirmed_plan_json_str = request.form.get('confirmed_plan_json')
     edited_invite_message = request.form.get('edited_invite_message')
     
-    print(f"--- [DEBUG] Confirming Plan ---")
-    print(f"--- [DEBUG] confirmed_plan_json from form: {confirmed_plan_json_str[:200] if confirmed_plan_json_str else 'None'}...") # Log preview
-    if confirmed_plan_json_str:
-        print(f"--- [DEBUG] Raw 'confirmed_plan_json' from form (first 200 chars): {confirmed_plan_json_str[:200]}...")
-    else:
-        print(f"--- [DEBUG] Raw 'confirmed_plan_json' from form: None or Empty")
-    print(f"--- [DEBUG] Edited invite message from form: {edited_invite_message}")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Confirming plan; confirmed_plan_json from form (first 200 chars): %s...",
+                  confirmed_plan_json_str[:200] if confirmed_plan_json_str else None)
+        log.debug("Edited invite message from form: %s", edited_invite_message)
 
     confirmed_plan = None
     if confirmed_plan_json_str:
         try:
             confirmed_plan = json.loads(confirmed_plan_json_str)
-            print(f"--- [DEBUG] Successfully parsed 'confirmed_plan_json' from form.")
+            log.debug("Successfully parsed 'confirmed_plan_json' from form.")
         except json.JSONDecodeError as e:
-            print(f"--- [DEBUG] JSONDecodeError when parsing 'confirmed_plan_json' from form: {e}")
+            log.warning("JSONDecodeError when parsing 'confirmed_plan_json' from form: %s", e)
             confirmed_plan = None # Ensure it's None if parsing fails
 
     if not confirmed_plan or (isinstance(confirmed_plan, dict) and "error" in confirmed_plan):
-        print(f"--- [DEBUG] Plan is invalid or missing. Plan content: {confirmed_plan}")
+        log.warning("Plan is invalid or missing. Plan content: %s", confirmed_plan)
         flash("Cannot confirm an invalid or missing plan.", "danger")
         return redirect(url_for('ally.introvert_ally_page'))
 
@@ -203,22 +209,21 @@ def confirm_introvert_ally_plan():
         "edited_invite_message": edited_invite_message,
         "agent_session_user_id": str(user_name_for_posting) # Or a new UUID for this agent interaction
     }
-    print(f"--- [DEBUG] Stored ally_post_params: {session['ally_post_params']}")
+    log.debug("Stored ally_post_params: %s", session['ally_post_params'])
 
     # Clear the session variables related to plan generation
     session.pop('ally_plan_details', None) # This was for SSE state, less critical now for confirm
     session.pop('ally_agent_thoughts', None) # Also for SSE display
     # session.pop('ally_request_params', None) # Keep this for now, as user_name_for_posting uses it. Clear after post_status.
     session.modified = True
-    print(f"--- [DEBUG] Cleared plan generation session variables. Redirecting to post_status_page. ---")
+    log.debug("Cleared plan generation session variables. Redirecting to post_status_page.")
     # flash(f"Plan '{confirmed_plan.get('event_name', 'Unnamed Plan')}' confirmed. Now proceeding to post...", "info")
     return redirect(url_for('ally.introvert_ally_post_status_page'))
 
 @ally_bp.route('/introvert-ally/post-status', methods=['GET'])
 def introvert_ally_post_status_page():
     """Renders the page that will show the live status of event/post creation."""
-    print(f"--- [DEBUG] Entered introvert_ally_post_status_page ---")
-    print(f"--- [DEBUG] ally_post_params from session at post_status_page: {session.get('ally_post_params')}")
+    log.debug("ally_post_params from session at post_status_page: %s", session.get('ally_post_params'))
     # Parameters for post_plan_event are expected to be in session['ally_post_params']
     if not session.get('ally_post_params'):
         flash("No posting parameters found. Please confirm a plan first.", "warning")
@@ -227,31 +232,42 @@ def introvert_ally_post_status_page():
     plan_name = session['ally_post_params'].get('confirmed_plan', {}).get('event_name', 'Your Plan')
     return render_template('introvert_ally_post_status.html', title=f"Posting Status for: {plan_name}")
 
+def post_status_messages(post_params, on_finished=None):
+    """
+    Yields the SSE messages of one event/post creation run.
+
+    Shared by the Flask route below and the async streaming route in asgi.py.
+
+    Args:
+        post_params (dict): The 'ally_post_params' stored by the confirm route.
+        on_finished (Callable[[], None], optional): Called after the agent is
+            done, before the final 'stream_end' message.
+    """
+    log.info("Starting event/post creation for %s", post_params['user_name'])
+    for event_data in post_plan_event( # Calling with positional arguments
+        post_params['user_name'],
+        post_params['confirmed_plan'],
+        post_params['edited_invite_message'],
+        post_params['agent_session_user_id']
+    ):
+        yield sse_message(event_data.get("type", "thought"), event_data.get("data"))
+
+    # After the generator finishes
+    log.info("post_plan_event finished for %s", post_params['user_name'])
+    if on_finished:
+        on_finished()
+    yield sse_message("stream_end", {})
+
 @ally_bp.route('/introvert-ally/stream-post-status')
 def stream_post_status():
     post_params = session.get('ally_post_params')
     if not post_params:
         def error_stream():
-            yield f"event: error\ndata: {json.dumps({'message': 'Missing posting parameters in session.'})}\n\n"
+            yield sse_message("error", {'message': 'Missing posting parameters in session.'})
         return Response(stream_with_context(error_stream()), mimetype='text/event-stream')
 
-    def generate_post_stream():
-        print(f"--- PY_SSE (Post Status): Starting event/post creation for {post_params['user_name']} ---")
-        for event_data in post_plan_event( # Calling with positional arguments
-            post_params['user_name'],
-            post_params['confirmed_plan'],
-            post_params['edited_invite_message'],
-            post_params['agent_session_user_id']
-        ):
-            event_type = event_data.get("type", "thought")
-            data_payload = json.dumps(event_data.get("data"))
-            yield f"event: {event_type}\ndata: {data_payload}\n\n"
-        
-        # After the generator finishes
-        print(f"--- PY_SSE (Post Status): post_plan_event finished. Setting flash message. ---")
+    def finish_posting():
         flash(f"Event '{post_params.get('confirmed_plan',{}).get('event_name','Unknown Event')}' and post creation process finished!", "success")
         session.pop('ally_post_params', None) # Clean up session
-        yield f"event: stream_end\ndata: {json.dumps({})}\n\n"
 
-    return Response(stream_with_context(generate_post_stream()), mimetype='text/event-stream')
-    
+    return Response(stream_with_context(post_status_messages(post_params, on_finished=finish_posting)), mimetype='text/event-stream')
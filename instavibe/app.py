@@ -1,66 +1,111 @@
 import os
+import json
+import hashlib
+import hmac
 from datetime import datetime, timezone
 from dotenv import load_dotenv
-from flask import Flask, render_template, abort, flash, request, jsonify
+from flask import Flask, render_template, abort, flash, request, session, jsonify, make_response, Response, stream_with_context, get_template_attribute
+from flask.json.provider import DefaultJSONProvider
 from google.cloud import spanner
 from google.cloud.spanner_v1 import param_types
 from google.api_core import exceptions
 import humanize 
 import uuid
-import traceback
+from itertools import groupby
+from operator import itemgetter
+import logging
+import threading
 from dateutil import parser 
+from logging_setup import configure_logging
+from event_summary import EVENT_SUMMARY_COLUMNS, event_summary_row
+from feed_cursor import encode_feed_cursor, decode_feed_cursor
 from ally_routes import ally_bp 
+from spanner_data import get_database, Query, register, warm_up, iter_rows, fetch_all, load_page, exact_staleness, TTLCache, MISSING, insert_rows, insert_in_chunks, ndjson_lines, json_array_chunks, json_default, render_prometheus
+from spanner_data.queries import PERSON_IDS_BY_NAMES_QUERY # Shared with the social agent
+from spanner_data.graph import is_symmetric_edge
+
+
+configure_logging()
+log = logging.getLogger(__name__)
+
+
+class SpannerJSONProvider(DefaultJSONProvider):
+    """JSON provider for jsonify and |tojson that also encodes Records and ISO 8601 timestamps."""
+
+    @staticmethod
+    def default(o):
+        try:
+            return json_default(o)
+        except TypeError:
+            return DefaultJSONProvider.default(o)
 
 
 app = Flask(__name__)
+app.json = SpannerJSONProvider(app)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "a_default_secret_key_for_dev") 
 app.register_blueprint(ally_bp)
 
 load_dotenv()
 # --- Spanner Configuration ---
-INSTANCE_ID = "instavibe-graph-instance" # Replace if different
-DATABASE_ID = "graphdb" # Replace if different
+INSTANCE_ID = os.environ.get("SPANNER_INSTANCE_ID", "instavibe-graph-instance")
+DATABASE_ID = os.environ.get("SPANNER_DATABASE_ID", "graphdb")
 PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
 APP_HOST = os.environ.get("APP_HOST", "0.0.0.0")
 APP_PORT = os.environ.get("APP_PORT","8080")
 GOOGLE_MAPS_API_KEY = os.environ.get("GOOGLE_MAPS_API_KEY")
 GOOGLE_MAPS_MAP_KEY = os.environ.get('GOOGLE_MAPS_MAP_ID')
+# How old the home feed and events panel may be. Stale reads are served by the
+# nearest replica instead of the leader; set to 0 for strong reads.
+FEED_STALENESS_SECONDS = float(os.environ.get("FEED_STALENESS_SECONDS", "10"))
+FEED_STALENESS = exact_staleness(FEED_STALENESS_SECONDS)
+FEED_PAGE_SIZE = int(os.environ.get("FEED_PAGE_SIZE", "20"))
+FEED_MAX_PAGE_SIZE = 100
+# Most recent posts shown on a person's page
+PERSON_POSTS_LIMIT = int(os.environ.get("PERSON_POSTS_LIMIT", "50"))
+# In-process cache for rarely changing lookups (seconds / entries per cache; 0 disables)
+CACHE_PERSON_TTL = float(os.environ.get("CACHE_PERSON_TTL", "300"))
+CACHE_FRIENDS_TTL = float(os.environ.get("CACHE_FRIENDS_TTL", "120"))
+CACHE_EVENT_TTL = float(os.environ.get("CACHE_EVENT_TTL", "60"))
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "2048"))
+# Rendered HTML fragments (events panel, post cards). Relative times such as
+# "5 minutes ago" inside a fragment may lag by up to the TTL; 0 disables.
+FRAGMENT_CACHE_TTL = float(os.environ.get("FRAGMENT_CACHE_TTL", "30"))
+FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get("FRAGMENT_CACHE_MAX_ENTRIES", "4096"))
+# HTTP caching of the feed and event pages by browsers and a CDN (seconds).
+# Within max-age a response is served from cache; for stale-while-revalidate
+# seconds more it is still served while being revalidated in the background.
+HTTP_CACHE_MAX_AGE = int(os.environ.get("HTTP_CACHE_MAX_AGE", "10"))
+HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.environ.get("HTTP_CACHE_STALE_WHILE_REVALIDATE", "60"))
+# Compile every registered query once at startup so first requests skip query compilation
+SPANNER_WARMUP = os.environ.get("SPANNER_WARMUP", "true").lower() in ("1", "true", "yes")
+# Set by gunicorn.conf.py: the preloading master must not open gRPC channels or
+# start pool threads, so each worker connects after the fork instead.
+SPANNER_DEFER_CONNECT = os.environ.get("SPANNER_DEFER_CONNECT", "false").lower() in ("1", "true", "yes")
+# Bulk ingestion (/api/posts:batch, /api/events:batch): items per request and per commit
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "1000"))
+POST_BATCH_CHUNK_SIZE = int(os.environ.get("POST_BATCH_CHUNK_SIZE", "500"))
+EVENT_BATCH_CHUNK_SIZE = int(os.environ.get("EVENT_BATCH_CHUNK_SIZE", "100"))
+# Bearer token the Prometheus scraper must send to /metrics. Unset, the endpoint
+# is not served at all: query names, latencies and errors are internal.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN") or None
 
 
 if not PROJECT_ID:
     raise ValueError("GOOGLE_CLOUD_PROJECT environment variable not set.")
 
 # --- Spanner Client Initialization ---
+# The database handle is backed by the shared, pre-warmed session pool in
+# spanner_data. connect_database() (below the query definitions) opens it at
+# import time, or in each gunicorn worker when SPANNER_DEFER_CONNECT is set.
 db = None
-try:
-    spanner_client = spanner.Client(project=PROJECT_ID)
-    instance = spanner_client.instance(INSTANCE_ID)
-    database = instance.database(DATABASE_ID)
-    print(f"Attempting to connect to Spanner: {instance.name}/databases/{database.name}")
-
-    # Ensure database exists - crucial check
-    if not database.exists():
-         print(f"Error: Database '{database.name}' does not exist in instance '{instance.name}'.")
-         print("Please create the database and the required tables/schema.")
-         # You might want to exit or handle this more gracefully depending on deployment
-         # For now, we'll let it fail later if db is None
-    else:
-        print("Database connection check successful (database exists).")
-        db = database # Assign database object if it exists
 
-except exceptions.NotFound:
-    print(f"Error: Spanner instance '{INSTANCE_ID}' not found in project '{PROJECT_ID}'.")
-    # Handle error appropriately - exit, default behavior, etc.
-except Exception as e:
-    print(f"An unexpected error occurred during Spanner initialization: {e}")
-    # Handle error
-
-def run_query(sql, params=None, param_types=None, expected_fields=None): # Add expected_fields
+def run_query(sql, params=None, param_types=None, expected_fields=None, raise_errors=False): # Add expected_fields
     """
     Executes a SQL query against the Spanner database.
 
     Args:
-        sql (str): The SQL query string.
+        sql (str or Query): The SQL query string, or a Query that already
+                            carries its param_types and expected fields.
         params (dict, optional): Dictionary of query parameters. Defaults to None.
         param_types (dict, optional): Dictionary mapping parameter names to their
                                       Spanner types (e.g., spanner.param_types.STRING).
@@ -69,225 +114,470 @@ def run_query(sql, params=None, param_types=None, expected_fields=None): # Add e
                                                 expected column names in the order
                                                 they appear in the SELECT statement.
                                                 Required if results.fields fails.
+        raise_errors (bool, optional): Re-raise query errors after reporting
+                                       them instead of returning []. Loaders
+                                       whose result is cached use it, so a
+                                       failed read is never cached as empty.
     """
     if not db:
-        print("Error: Database connection is not available.")
+        log.error("Database connection is not available.")
         raise ConnectionError("Spanner database connection not initialized.")
 
-    results_list = []
-    print(f"--- Executing SQL ---")
-    print(f"SQL: {sql}")
-    if params:
-        print(f"Params: {params}")
-    print("----------------------")
+    if isinstance(sql, Query):
+        query = sql
+        sql, param_types, expected_fields = query.sql, query.param_types, query.fields
+    else:
+        query = Query(sql=sql, fields=tuple(expected_fields or ()), param_types=param_types or {}, records=True)
+
+    # Per-query logging is DEBUG only; arguments are formatted only if it is enabled
+    log.debug("Executing SQL: %s", sql, extra={"query": query.label(), "params": params})
+
+    if not expected_fields:
+        log.debug("expected_fields not provided to run_query. Using result set metadata.")
 
     try:
-        with db.snapshot() as snapshot:
-            results = snapshot.execute_sql(
-                sql,
-                params=params,
-                param_types=param_types
-            )
-
-            # --- MODIFICATION START ---
-            # Define field names based on the expected_fields argument
-            # This avoids accessing results.fields which caused the error
-            field_names = expected_fields
-            if not field_names:
-                 # Fallback or raise error if expected_fields were not provided
-                 # For now, let's try the potentially failing way if not provided
-                 print("Warning: expected_fields not provided to run_query. Attempting dynamic lookup.")
-                 try:
-                     field_names = [field.name for field in results.fields]
-                 except AttributeError as e:
-                     print(f"Error accessing results.fields even as fallback: {e}")
-                     print("Cannot process results without field names.")
-                     # Decide: raise error or return empty list?
-                     raise ValueError("Could not determine field names for query results.") from e
-
-
-            print(f"Using field names: {field_names}")
-            # --- MODIFICATION END ---
-
-            for row in results:
-                # Now zip the known field names with the row values (which are lists)
-                if len(field_names) != len(row):
-                     print(f"Warning: Mismatch between number of field names ({len(field_names)}) and row values ({len(row)})")
-                     print(f"Fields: {field_names}")
-                     print(f"Row: {row}")
-                     # Skip this row or handle error appropriately
-                     continue # Skip malformed row for now
-                results_list.append(dict(zip(field_names, row)))
-
-            print(f"Query successful, fetched {len(results_list)} rows.")
+        results_list = fetch_all(db, query, params=params)
+        log.debug("Query %s fetched %d rows.", query.label(), len(results_list))
 
     except (exceptions.NotFound, exceptions.PermissionDenied, exceptions.InvalidArgument) as spanner_err:
-        print(f"Spanner Error ({type(spanner_err).__name__}): {spanner_err}")
+        log.error("Spanner Error (%s): %s", type(spanner_err).__name__, spanner_err, extra={"query": query.label()})
         flash(f"Database error: {spanner_err}", "danger")
+        if raise_errors:
+            raise
         return []
     except ValueError as e: # Catch the ValueError we might raise above
-         print(f"Query Processing Error: {e}")
+         log.error("Query Processing Error: %s", e, extra={"query": query.label()})
          flash("Internal error processing query results.", "danger")
+         if raise_errors:
+             raise
          return []
     except Exception as e:
-        print(f"An unexpected error occurred during query execution or processing: {e}")
-        traceback.print_exc()
+        log.exception("An unexpected error occurred during query execution or processing: %s", e)
         flash(f"An unexpected server error occurred while fetching data.", "danger")
         raise e
 
     return results_list
 
-# --- HOW TO CALL IT ---
+# --- Caches ---
+# Fronts the person, friends, name and event lookups. Writes below invalidate
+# the entries they affect on this replica; other replicas catch up within the TTL.
+person_cache = TTLCache("person", maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_PERSON_TTL)
+person_by_name_cache = TTLCache("person_by_name", maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_PERSON_TTL)
+friends_cache = TTLCache("friends", maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_FRIENDS_TTL)
+event_details_cache = TTLCache("event_details", maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_EVENT_TTL)
 
-def get_all_posts_with_author_db():
-    """Fetch all posts and join with author information from Spanner."""
-    sql = """
+
+def invalidate_person_cache(person_id):
+    """Drops the cached profile entries of a person after a write that touches them."""
+    person_cache.invalidate(person_id)
+    friends_cache.invalidate(person_id)
+
+# --- Fragment Caching ---
+# Rendered HTML for the parts of a page that are identical for every visitor.
+# Post cards are keyed by post alone: posts are never edited, so a card only
+# changes with the post. List-level fragments (the events panel) embed a data
+# version instead; a write bumps it, so later renders miss and the stale
+# fragments simply age out. Like the caches above, versions are per process.
+fragment_cache = TTLCache("fragments", maxsize=FRAGMENT_CACHE_MAX_ENTRIES, ttl=FRAGMENT_CACHE_TTL)
+_data_versions = {"events": 0}
+_data_versions_lock = threading.Lock()
+
+
+@app.template_global()
+def data_version(kind):
+    """Returns the current version of a kind of data (currently only "events")."""
+    return _data_versions[kind]
+
+
+def bump_data_version(kind):
+    """Marks every fragment built from `kind` as stale after a write."""
+    with _data_versions_lock:
+        _data_versions[kind] += 1
+
+
+@app.template_global()
+def cached_fragment(key, render, *args, **kwargs):
+    """
+    Returns the cached HTML for `key`, calling `render(*args, **kwargs)` on a miss.
+
+    `render` is usually a macro, whose result is already-escaped Markup.
+    Include a `data_version(...)` in `key` for fragments listing data this app
+    writes; fragments of immutable rows can be keyed by the row alone.
+    """
+    return fragment_cache.get_or_load(key, lambda: render(*args, **kwargs))
+
+
+def render_events_panel(all_events_attendance):
+    """Renders the events sidebar shared by the home and profile pages."""
+    return get_template_attribute("_macros.html", "render_events_panel")(all_events_attendance)
+
+# --- HTTP Caching ---
+# Columns written with spanner.COMMIT_TIMESTAMP. The newest one among the rows
+# a response is built from is its Last-Modified.
+COMMIT_TIMESTAMP_FIELDS = ("create_time", "update_time", "friendship_time", "attendance_time")
+# Feed and event pages may be served by a CDN for a few seconds; profiles are
+# stored but revalidated on every request, which is cheap with an ETag.
+SHARED_CACHE_CONTROL = f"public, max-age={HTTP_CACHE_MAX_AGE}, stale-while-revalidate={HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+def page_validators(*parts):
+    """
+    Computes a weak ETag and Last-Modified for a response built from `parts`.
+
+    Args:
+        *parts: The row lists (Records or dicts) a response is rendered from,
+                or (etag, last_modified) pairs of parts validated earlier,
+                such as a cached fragment.
+
+    Returns:
+        tuple[str, datetime or None]: A digest of every row's values and the
+                                      newest commit timestamp among the rows.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    last_modified = None
+    for part in parts:
+        if isinstance(part, tuple):
+            etag, modified = part
+            digest.update(etag.encode())
+            if modified is not None and (last_modified is None or modified > last_modified):
+                last_modified = modified
+            continue
+        digest.update(b"\x1e")
+        for row in part:
+            digest.update(repr(tuple(row.values())).encode())
+            for field in COMMIT_TIMESTAMP_FIELDS:
+                modified = row.get(field)
+                if modified is not None and (last_modified is None or modified > last_modified):
+                    last_modified = modified
+    return digest.hexdigest(), last_modified
+
+
+def conditional_response(validators, cache_control, render):
+    """
+    Answers a GET with 304 Not Modified when the client's copy is current.
+
+    `render` is only called when the body is needed. Responses carrying
+    flashed messages belong to one visitor and are returned without validators.
+
+    Args:
+        validators (tuple[str, datetime or None]): From `page_validators`.
+        cache_control (str): The Cache-Control header to send.
+        render (Callable): Produces the full response body.
+    """
+    if "_flashes" in session:
+        return render()
+
+    etag, last_modified = validators
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        # HTTP dates have one-second resolution
+        not_modified = (last_modified is not None and request.if_modified_since is not None
+                        and last_modified.replace(microsecond=0) <= request.if_modified_since)
+
+    response = Response(status=304) if not_modified else make_response(render())
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+# --- Queries ---
+# Each query is defined once and shared by the single-fetch helpers below and
+# the page loaders, which run a whole page's reads in one snapshot. Queries
+# default to strong reads; the feed and events panel declare FEED_STALENESS.
+# Rows come back as compact, read-only Records (see spanner_data.records).
+# Every query is registered so warm_up_queries() can compile it at startup.
+
+POSTS_WITH_AUTHOR_QUERY = register(Query(
+    name="posts_with_author",
+    records=True,
+    sql="""
         SELECT
             p.post_id, p.author_id, p.text, p.sentiment, p.post_timestamp,
             author.name as author_name
         FROM Post AS p
         JOIN Person AS author ON p.author_id = author.person_id
         ORDER BY p.post_timestamp DESC
-    """
+    """,
     # Define the fields exactly as they appear in the SELECT statement
-    fields = ["post_id", "author_id", "text", "sentiment", "post_timestamp", "author_name"]
-    return run_query(sql, expected_fields=fields) # Pass the list here
-
-def get_person_db(person_id):
-    """Fetch a single person's details from Spanner."""
-    sql = """
-        SELECT person_id, name, age
+    fields=("post_id", "author_id", "text", "sentiment", "post_timestamp", "author_name"),
+    staleness=FEED_STALENESS,
+))
+
+# Keyset pagination over the PostByTimestamp index. Rows come back in index
+# order (post_timestamp DESC, then the primary key post_id ASC), so a page is
+# a bounded range scan that resumes right after the previous page's last post.
+# Posts without a post_timestamp have no place in that order, and no cursor
+# could point past them, so the feed leaves them out.
+FEED_FIRST_PAGE_QUERY = register(Query(
+    name="feed_first_page",
+    records=True,
+    sql="""
+        SELECT
+            p.post_id, p.author_id, p.text, p.sentiment, p.post_timestamp,
+            author.name as author_name, p.create_time
+        FROM Post@{FORCE_INDEX=PostByTimestamp} AS p
+        JOIN Person AS author ON p.author_id = author.person_id
+        WHERE p.post_timestamp IS NOT NULL
+        ORDER BY p.post_timestamp DESC, p.post_id
+        LIMIT @limit
+    """,
+    fields=("post_id", "author_id", "text", "sentiment", "post_timestamp", "author_name", "create_time"),
+    param_types={"limit": param_types.INT64},
+    staleness=FEED_STALENESS,
+))
+
+# The cursor condition leads with a bound on post_timestamp alone, which is a
+# range seek on the index; the OR only breaks ties within that timestamp. As a
+# top-level OR the planner may scan from the start of the index instead.
+FEED_PAGE_AFTER_QUERY = register(Query(
+    name="feed_page_after",
+    records=True,
+    sql="""
+        SELECT
+            p.post_id, p.author_id, p.text, p.sentiment, p.post_timestamp,
+            author.name as author_name, p.create_time
+        FROM Post@{FORCE_INDEX=PostByTimestamp} AS p
+        JOIN Person AS author ON p.author_id = author.person_id
+        WHERE p.post_timestamp <= @after_timestamp
+          AND (p.post_timestamp < @after_timestamp OR p.post_id > @after_post_id)
+        ORDER BY p.post_timestamp DESC, p.post_id
+        LIMIT @limit
+    """,
+    fields=("post_id", "author_id", "text", "sentiment", "post_timestamp", "author_name", "create_time"),
+    param_types={
+        "after_timestamp": param_types.TIMESTAMP,
+        "after_post_id": param_types.STRING,
+        "limit": param_types.INT64,
+    },
+    staleness=FEED_STALENESS,
+))
+
+PERSON_QUERY = register(Query(
+    name="person",
+    records=True,
+    sql="""
+        SELECT person_id, name, age, create_time
         FROM Person
         WHERE person_id = @person_id
-    """
-    params = {"person_id": person_id}
-    param_types_map = {"person_id": param_types.STRING} # Renamed variable
-    fields = ["person_id", "name", "age"]
-    results = run_query(sql, params=params, param_types=param_types_map, expected_fields=fields)
-    return results[0] if results else None
-
-def get_posts_by_person_db(person_id):
-    """Fetch posts written by a specific person from Spanner."""
-    sql = """
+    """,
+    fields=("person_id", "name", "age", "create_time"),
+    param_types={"person_id": param_types.STRING},
+))
+
+# PostByAuthor is ordered like the result, so the scan stops after @limit rows.
+# @since and @sentiment are optional filters (NULL matches every post).
+POSTS_BY_PERSON_QUERY = register(Query(
+    name="posts_by_person",
+    records=True,
+    sql="""
         SELECT
             p.post_id, p.author_id, p.text, p.sentiment, p.post_timestamp,
-            author.name as author_name
-        FROM Post AS p
+            author.name as author_name, p.create_time
+        FROM Post@{FORCE_INDEX=PostByAuthor} AS p
         JOIN Person AS author ON p.author_id = author.person_id
         WHERE p.author_id = @person_id
+          AND (@since IS NULL OR p.post_timestamp >= @since)
+          AND (@sentiment IS NULL OR p.sentiment = @sentiment)
         ORDER BY p.post_timestamp DESC
-    """
-    params = {"person_id": person_id}
-    param_types_map = {"person_id": param_types.STRING}
-    fields = ["post_id", "author_id", "text", "sentiment", "post_timestamp", "author_name"]
-    return run_query(sql, params=params, param_types=param_types_map, expected_fields=fields)
-
-def get_friends_db(person_id):
-    """Fetch friends of a specific person from Spanner."""
-    sql = """
-        SELECT DISTINCT
-            friend.person_id, friend.name
-        FROM Friendship AS f
-        JOIN Person AS friend ON
-            (f.person_id_a = @person_id AND f.person_id_b = friend.person_id) OR
-            (f.person_id_b = @person_id AND f.person_id_a = friend.person_id)
-        WHERE f.person_id_a = @person_id OR f.person_id_b = @person_id
+        LIMIT @limit
+    """,
+    fields=("post_id", "author_id", "text", "sentiment", "post_timestamp", "author_name", "create_time"),
+    param_types={
+        "person_id": param_types.STRING,
+        "since": param_types.TIMESTAMP,
+        "sentiment": param_types.STRING,
+        "limit": param_types.INT64,
+    },
+))
+
+# A friendship is stored once, as (person_id_a, person_id_b). Each direction is
+# its own seek: the primary key for person_id_a, FriendshipByPersonB for
+# person_id_b. An OR across both columns would scan the whole table instead,
+# so the cost here depends on the person's friend count, not the table size.
+FRIENDSHIP_FRIENDS_QUERY = Query(
+    name="friends",
+    records=True,
+    sql="""
+        SELECT
+            friend.person_id, friend.name,
+            MAX(f.friendship_time) AS friendship_time
+        FROM (
+            SELECT person_id_b AS friend_id, friendship_time
+            FROM Friendship
+            WHERE person_id_a = @person_id
+            UNION ALL
+            SELECT person_id_a AS friend_id, friendship_time
+            FROM Friendship@{FORCE_INDEX=FriendshipByPersonB}
+            WHERE person_id_b = @person_id
+        ) AS f
+        JOIN@{JOIN_METHOD=APPLY_JOIN} Person AS friend ON friend.person_id = f.friend_id
+        GROUP BY friend.person_id, friend.name
         ORDER BY friend.name
-    """
-    params = {"person_id": person_id}
-    param_types_map = {"person_id": param_types.STRING}
-    fields = ["person_id", "name"]
-    return run_query(sql, params=params, param_types=param_types_map, expected_fields=fields)
+    """,
+    fields=("person_id", "name", "friendship_time"),
+    param_types={"person_id": param_types.STRING},
+)
+
+# When the SocialGraph's Friendship edge is defined over FriendAdjacency, a
+# person's friends are one range of rows interleaved under their Person row
+# (see friend_adjacency.py).
+ADJACENCY_FRIENDS_QUERY = Query(
+    name="friends_adjacency",
+    records=True,
+    sql="""
+        SELECT friend.person_id, friend.name, adj.friendship_time
+        FROM FriendAdjacency AS adj
+        JOIN@{JOIN_METHOD=APPLY_JOIN} Person AS friend ON friend.person_id = adj.friend_id
+        WHERE adj.person_id = @person_id
+        ORDER BY friend.name
+    """,
+    fields=("person_id", "name", "friendship_time"),
+    param_types={"person_id": param_types.STRING},
+)
 
+def friends_query():
+    """
+    The friends query for the table the deployed graph's Friendship edge is on.
 
-def get_all_events_with_attendees_db():
-    """Fetch all events and their attendees from Spanner."""
-    # Get all events first
-    event_sql = """
-        SELECT event_id, name, event_date
-        FROM Event
+    Decided from the graph definition (see spanner_data.graph), like every
+    other friends reader, not from this process's FRIEND_ADJACENCY: after
+    setup.py switches tables, FriendAdjacency may be missing or no longer
+    written to.
+    """
+    return ADJACENCY_FRIENDS_QUERY if db and is_symmetric_edge(db, "Friendship") else FRIENDSHIP_FRIENDS_QUERY
+
+# The events sidebar reads the EventSummary read model (see event_summary.py):
+# one range scan over an index that stores every column it needs, instead of
+# the 50 latest events plus a join of their Attendance rows to Person.
+EVENT_SUMMARIES_QUERY = register(Query(
+    name="event_summaries",
+    records=True,
+    sql="""
+        SELECT event_id, name, event_date, attendee_count, attendee_ids, attendee_names, update_time
+        FROM EventSummary@{FORCE_INDEX=EventSummaryByDate}
         ORDER BY event_date DESC
         LIMIT 50
-    """
-    event_fields = ["event_id", "name", "event_date"]
-    events = run_query(event_sql, expected_fields=event_fields)
-    if not events:
-        return []
-
-    events_with_attendees = {event['event_id']: {'details': event, 'attendees': []} for event in events}
-    event_ids = list(events_with_attendees.keys())
-
-    # Fetch attendees
-    attendee_sql = """
+    """,
+    fields=("event_id", "name", "event_date", "attendee_count", "attendee_ids", "attendee_names", "update_time"),
+    staleness=FEED_STALENESS,
+))
+
+# One row per (event, attendee), with every row of an event adjacent so the
+# export can group them while streaming. Events without attendees get one row
+# with NULL person columns.
+ALL_EVENTS_WITH_ATTENDEES_QUERY = register(Query(
+    name="all_events_with_attendees",
+    records=True,
+    sql="""
         SELECT
-            a.event_id,
-            p.person_id, p.name
-        FROM Attendance AS a
-        JOIN Person AS p ON a.person_id = p.person_id
-        WHERE a.event_id IN UNNEST(@event_ids)
-        ORDER BY a.event_id, p.name
-    """
-    params = {"event_ids": event_ids}
-    param_types_map = {"event_ids": param_types.Array(param_types.STRING)}
-    attendee_fields = ["event_id", "person_id", "name"]
-    all_attendees = run_query(attendee_sql, params=params, param_types=param_types_map, expected_fields=attendee_fields)
-
-    for attendee in all_attendees:
-        event_id = attendee['event_id']
-        if event_id in events_with_attendees:
-            # No change needed here, attendee is already a dict
-            events_with_attendees[event_id]['attendees'].append(attendee)
-
-    return [events_with_attendees[event['event_id']] for event in events]
-
-def get_event_details_with_locations_attendees_db(event_id):
-    """
-    Fetch full details for a single event, including its description,
-    locations, and attendees.
-    """
-    if not db:
-        raise ConnectionError("Spanner database connection not initialized.")
-
-    event_details = {}
-
-    # 1. Fetch Event basic details (including new description)
-    event_sql = """
-        SELECT event_id, name, description, event_date
+            e.event_id, e.name, e.description, e.event_date,
+            p.person_id, p.name AS person_name
+        FROM Event AS e
+        LEFT JOIN Attendance AS a ON e.event_id = a.event_id
+        LEFT JOIN Person AS p ON a.person_id = p.person_id
+        ORDER BY e.event_date DESC, e.event_id, p.name
+    """,
+    fields=("event_id", "name", "description", "event_date", "person_id", "person_name"),
+    staleness=FEED_STALENESS,
+))
+
+EVENT_QUERY = register(Query(
+    name="event",
+    records=True,
+    sql="""
+        SELECT event_id, name, description, event_date, create_time
         FROM Event
         WHERE event_id = @event_id
-    """
-    params = {"event_id": event_id}
-    param_types_map = {"event_id": param_types.STRING}
-    event_fields = ["event_id", "name", "description", "event_date"]
-    event_result = run_query(event_sql, params=params, param_types=param_types_map, expected_fields=event_fields)
-
-    if not event_result:
-        return None # Event not found
-    event_details = event_result[0]
-
-    # 2. Fetch Event Locations
-    locations_sql = """
-        SELECT l.location_id, l.name, l.description, l.latitude, l.longitude, l.address
+    """,
+    fields=("event_id", "name", "description", "event_date", "create_time"),
+    param_types={"event_id": param_types.STRING},
+))
+
+EVENT_LOCATIONS_QUERY = register(Query(
+    name="event_locations",
+    records=True,
+    sql="""
+        SELECT l.location_id, l.name, l.description, l.latitude, l.longitude, l.address, el.create_time
         FROM Location AS l
         JOIN EventLocation AS el ON l.location_id = el.location_id
         WHERE el.event_id = @event_id
         ORDER BY l.name
-    """
-    # Params and param_types_map are the same as for event_sql
-    location_fields = ["location_id", "name", "description", "latitude", "longitude", "address"]
-    event_details["locations"] = run_query(locations_sql, params=params, param_types=param_types_map, expected_fields=location_fields)
-
-    # 3. Fetch Event Attendees
-    attendees_sql = """
-        SELECT p.person_id, p.name
+    """,
+    fields=("location_id", "name", "description", "latitude", "longitude", "address", "create_time"),
+    param_types={"event_id": param_types.STRING},
+))
+
+EVENT_ATTENDEES_QUERY = register(Query(
+    name="event_attendees",
+    records=True,
+    sql="""
+        SELECT p.person_id, p.name, a.attendance_time
         FROM Person AS p
         JOIN Attendance AS a ON p.person_id = a.person_id
         WHERE a.event_id = @event_id
         ORDER BY p.name
-    """
-    # Params and param_types_map are the same
-    attendee_fields = ["person_id", "name"]
-    event_details["attendees"] = run_query(attendees_sql, params=params, param_types=param_types_map, expected_fields=attendee_fields)
+    """,
+    fields=("person_id", "name", "attendance_time"),
+    param_types={"event_id": param_types.STRING},
+))
+
+
+ALL_PEOPLE_QUERY = register(Query(
+    name="all_people",
+    records=True,
+    sql="""
+        SELECT person_id, name
+        FROM Person
+        ORDER BY name
+    """,
+    fields=("person_id", "name"),
+))
+
+PERSON_ID_BY_NAME_QUERY = register(Query(
+    name="person_id_by_name",
+    records=True,
+    sql="SELECT person_id FROM Person WHERE name = @name LIMIT 1",
+    fields=("person_id",),
+    param_types={"name": param_types.STRING},
+))
+
+# Point reads on the primary key, for denormalizing attendee names on write.
+PERSON_NAMES_BY_IDS_QUERY = register(Query(
+    name="person_names_by_ids",
+    records=True,
+    sql="""
+        SELECT person_id, name
+        FROM Person
+        WHERE person_id IN UNNEST(@person_ids)
+    """,
+    fields=("person_id", "name"),
+    param_types={"person_ids": param_types.Array(param_types.STRING)},
+))
+
+
+def _events_from_summaries(summaries):
+    """Shapes EventSummary rows like the sidebar expects, preserving the event order."""
+    return [
+        {
+            'details': summary,
+            'attendees': [
+                {'person_id': person_id, 'name': name}
+                for person_id, name in zip(summary['attendee_ids'] or [], summary['attendee_names'] or [])
+            ],
+            'attendee_count': summary['attendee_count'],
+        }
+        for summary in summaries
+    ]
+
+
+def _assemble_event_details(event, locations, attendees):
+    """Combines the event row with its locations and attendees for the detail page."""
+    event_details = dict(event)
+    event_details["locations"] = [dict(loc) for loc in locations]
+    event_details["attendees"] = attendees
 
     # Convert datetimes to ISO format if they are not already strings
     if isinstance(event_details.get('event_date'), datetime):
@@ -300,6 +590,261 @@ def get_event_details_with_locations_attendees_db(event_id):
     return event_details
 
 
+def _feed_page_read(after=None, limit=FEED_PAGE_SIZE):
+    """Returns the (Query, params) pair for one feed page, fetching one extra row to detect a next page."""
+    if after is None:
+        return FEED_FIRST_PAGE_QUERY, {"limit": limit + 1}
+    after_timestamp, after_post_id = after
+    return FEED_PAGE_AFTER_QUERY, {
+        "after_timestamp": after_timestamp,
+        "after_post_id": after_post_id,
+        "limit": limit + 1,
+    }
+
+
+def _split_feed_page(rows, limit):
+    """Trims the look-ahead row and returns (posts, next_cursor)."""
+    posts = rows[:limit]
+    next_cursor = encode_feed_cursor(posts[-1]) if len(rows) > limit else None
+    return posts, next_cursor
+
+
+def get_feed_page_db(after=None, limit=FEED_PAGE_SIZE):
+    """
+    Fetch one page of the home feed, newest first.
+
+    Args:
+        after (tuple[datetime, str], optional): The (post_timestamp, post_id) of
+                                                the last post already shown.
+        limit (int): Maximum number of posts to return.
+
+    Returns:
+        tuple[list[dict], str or None]: The posts and the cursor for the next
+                                        page (None when this is the last page).
+    """
+    query, params = _feed_page_read(after, limit)
+    return _split_feed_page(run_query(query, params=params), limit)
+
+
+def get_all_posts_with_author_db():
+    """Fetch all posts and join with author information from Spanner."""
+    return run_query(POSTS_WITH_AUTHOR_QUERY)
+
+def get_person_db(person_id):
+    """Fetch a single person's details from the cache or Spanner."""
+    def _load():
+        results = run_query(PERSON_QUERY, params={"person_id": person_id})
+        return results[0] if results else None
+    return person_cache.get_or_load(person_id, _load)
+
+def _posts_by_person_params(person_id, limit=PERSON_POSTS_LIMIT, since=None, sentiment=None):
+    return {"person_id": person_id, "since": since, "sentiment": sentiment, "limit": limit}
+
+def get_posts_by_person_db(person_id, limit=PERSON_POSTS_LIMIT, since=None, sentiment=None):
+    """
+    Fetch the most recent posts written by a specific person from Spanner.
+
+    Args:
+        person_id (str): The author's ID.
+        limit (int): Maximum number of posts, newest first.
+        since (datetime, optional): Only posts at or after this time.
+        sentiment (str, optional): Only posts with this sentiment.
+    """
+    return run_query(POSTS_BY_PERSON_QUERY, params=_posts_by_person_params(person_id, limit, since, sentiment))
+
+def get_friends_db(person_id):
+    """Fetch friends of a specific person from the cache or Spanner."""
+    try:
+        return friends_cache.get_or_load(person_id, lambda: run_query(friends_query(), params={"person_id": person_id}, raise_errors=True))
+    except (exceptions.NotFound, exceptions.PermissionDenied, exceptions.InvalidArgument, ValueError):
+        return [] # Already logged and flashed by run_query; not cached, so the next request retries
+
+
+def get_all_events_with_attendees_db():
+    """Fetch the 50 most recent events and their first attendees from the EventSummary table."""
+    return _events_from_summaries(run_query(EVENT_SUMMARIES_QUERY))
+
+def get_event_details_with_locations_attendees_db(event_id):
+    """
+    Fetch full details for a single event, including its description,
+    locations, and attendees. Served from the cache when possible.
+    """
+    page = load_event_page_db(event_id)
+    return page["event"] if page else None
+
+
+def iter_all_posts_with_author_db():
+    """Stream all posts with their author's name from Spanner, one row at a time."""
+    return iter_rows(db, POSTS_WITH_AUTHOR_QUERY)
+
+def iter_all_events_with_attendees_db():
+    """
+    Stream every event with its attendees from Spanner, one event at a time.
+
+    Only the rows of the current event are held in memory.
+    """
+    rows = iter_rows(db, ALL_EVENTS_WITH_ATTENDEES_QUERY)
+    try:
+        for _, event_rows in groupby(rows, key=itemgetter('event_id')):
+            event_rows = list(event_rows)
+            first = event_rows[0]
+            yield {
+                "event_id": first['event_id'],
+                "name": first['name'],
+                "description": first['description'],
+                "event_date": first['event_date'],
+                "attendees": [
+                    {"person_id": row['person_id'], "name": row['person_name']}
+                    for row in event_rows if row['person_id'] is not None
+                ],
+            }
+    finally:
+        rows.close() # Release the snapshot if the client stops reading early
+
+
+# --- Page Loaders ---
+# Each loader issues all of a page's reads concurrently inside one read-only
+# snapshot, so the page is rendered from a consistent view in one round trip.
+
+def _events_panel_reads(reads):
+    """
+    Looks up the rendered events panel, adding its reads to `reads` on a miss.
+
+    Returns:
+        tuple: The fragment key and the cached (html, validators) pair, or
+               MISSING. The key is taken before reading, so a concurrent write
+               can only leave the fresh render under an already outdated key.
+    """
+    key = ("events_panel", data_version("events"))
+    panel = fragment_cache.get(key)
+    if panel is MISSING:
+        reads["event_summaries"] = (EVENT_SUMMARIES_QUERY, None)
+    return key, panel
+
+def _events_panel_from_page(key, panel, page):
+    """Renders and caches the events panel, with its validators, if it was not cached."""
+    if panel is MISSING:
+        panel = (
+            render_events_panel(_events_from_summaries(page["event_summaries"])),
+            page_validators(page["event_summaries"]),
+        )
+        fragment_cache.set(key, panel)
+    return panel
+
+def load_home_page_db():
+    """Fetch the first page of the home feed and the (rendered) events panel."""
+    reads = {"posts": _feed_page_read()}
+    panel_key, events_panel = _events_panel_reads(reads)
+    page = load_page(db, reads)
+    posts, next_cursor = _split_feed_page(page["posts"], FEED_PAGE_SIZE)
+    events_panel, panel_validators = _events_panel_from_page(panel_key, events_panel, page)
+    return {
+        "posts": posts,
+        "next_feed_cursor": next_cursor,
+        "events_panel": events_panel,
+        "validators": page_validators(posts, panel_validators),
+    }
+
+def load_person_page_db(person_id):
+    """
+    Fetch a person with their posts, friends and the (rendered) events panel.
+
+    Returns:
+        dict or None: The page bundle, or None if the person does not exist.
+    """
+    params = {"person_id": person_id}
+    reads = {"posts": (POSTS_BY_PERSON_QUERY, _posts_by_person_params(person_id))}
+    # Only read what the caches cannot answer; misses ride along in the same snapshot.
+    panel_key, events_panel = _events_panel_reads(reads)
+    person = person_cache.get(person_id)
+    if person is MISSING:
+        reads["person"] = (PERSON_QUERY, params)
+    friends = friends_cache.get(person_id)
+    if friends is MISSING:
+        reads["friends"] = (friends_query(), params)
+
+    page = load_page(db, reads)
+    if person is MISSING:
+        person = page["person"][0] if page["person"] else None
+        if person is None:
+            return None
+        person_cache.set(person_id, person)
+    if friends is MISSING:
+        friends = page["friends"]
+        friends_cache.set(person_id, friends)
+    events_panel, panel_validators = _events_panel_from_page(panel_key, events_panel, page)
+    return {
+        "person": person,
+        "person_posts": page["posts"],
+        "friends": friends,
+        "events_panel": events_panel,
+        "validators": page_validators([person], page["posts"], friends, panel_validators),
+    }
+
+
+def load_event_page_db(event_id):
+    """
+    Fetch an event with its locations and attendees, and the page's validators.
+    Served from the cache when possible.
+
+    Returns:
+        dict or None: The page bundle, or None if the event does not exist.
+    """
+    def _load():
+        page = load_page(db, {
+            "event": (EVENT_QUERY, {"event_id": event_id}),
+            "locations": (EVENT_LOCATIONS_QUERY, {"event_id": event_id}),
+            "attendees": (EVENT_ATTENDEES_QUERY, {"event_id": event_id}),
+        })
+        if not page["event"]:
+            return None # Event not found
+        return {
+            "event": _assemble_event_details(page["event"][0], page["locations"], page["attendees"]),
+            "validators": page_validators(page["event"], page["locations"], page["attendees"]),
+        }
+    return event_details_cache.get_or_load(event_id, _load)
+
+
+# --- Query Warm-up ---
+def warm_up_queries():
+    """
+    Validates every registered query against the schema and warms its plan.
+
+    Failures are logged, not raised: a replica still serves the queries that
+    compiled, and the broken one fails on first use as it would have anyway.
+    """
+    if not db:
+        return
+    try:
+        outcomes = warm_up(db)
+    except Exception as e:
+        log.error("Error warming up queries: %s", e)
+        return
+    failed = [name for name, error in outcomes.items() if error is not None]
+    if failed:
+        log.warning("%d registered queries failed validation: %s", len(failed), ", ".join(failed))
+    else:
+        log.info("Warmed up %d registered queries.", len(outcomes))
+
+
+def connect_database():
+    """Opens the pooled Spanner database for this process and warms the registered queries."""
+    global db
+    db = get_database()
+    if not db:
+        log.error("Spanner database '%s' on instance '%s' could not be initialized.", DATABASE_ID, INSTANCE_ID)
+    else:
+        log.info("Spanner session pool ready for %s/databases/%s", INSTANCE_ID, DATABASE_ID)
+        # Only the variant the deployed graph uses is warmed; the other table may not exist
+        register(friends_query())
+        if SPANNER_WARMUP:
+            warm_up_queries()
+    return db
+
+if not SPANNER_DEFER_CONNECT:
+    connect_database()
+
+
 # --- Custom Jinja Filter ---
 @app.template_filter('humanize_datetime')
 def _jinja2_filter_humanize_datetime(value, default="just now"):
@@ -350,59 +895,155 @@ def _jinja2_filter_humanize_datetime(value, default="just now"):
 
 
 def get_person_by_name_db(name):
-    """Fetch a person's ID by their name from Spanner."""
+    """Fetch a person's ID by their name from the cache or Spanner."""
     if not db:
-        print("Error: Database connection is not available.")
+        log.error("Database connection is not available.")
         raise ConnectionError("Spanner database connection not initialized.")
 
-    sql = "SELECT person_id FROM Person WHERE name = @name LIMIT 1"
-    params = {"name": name}
-    param_types_map = {"name": param_types.STRING}
-    fields = ["person_id"] # Expected field from the SELECT
-    try:
-        results = run_query(sql, params=params, param_types=param_types_map, expected_fields=fields)
+    def _load():
+        results = run_query(PERSON_ID_BY_NAME_QUERY, params={"name": name})
         return results[0]['person_id'] if results else None
+    try:
+        return person_by_name_cache.get_or_load(name, _load)
     except Exception as e:
-        print(f"Error fetching person by name '{name}': {e}")
+        log.error("Error fetching person by name '%s': %s", name, e)
         # Optionally re-raise or return None based on desired error handling
         raise e # Re-raise to be caught by the API endpoint handler
 
+def get_person_ids_by_names_db(names):
+    """
+    Resolve many person names to IDs with one Spanner query.
+
+    Cached names are answered locally; the rest are looked up together with
+    `IN UNNEST(@names)` over the PersonByName index, which covers both columns.
+
+    Args:
+        names (list[str]): Person names; duplicates are allowed.
+
+    Returns:
+        dict[str, str]: Maps each name that exists to its person_id. Names that
+                        are missing from the result were not found.
+    """
+    if not db:
+        log.error("Database connection is not available.")
+        raise ConnectionError("Spanner database connection not initialized.")
+
+    resolved = {}
+    to_fetch = []
+    for name in dict.fromkeys(names): # De-duplicate, keep order
+        person_id = person_by_name_cache.get(name)
+        if person_id is MISSING:
+            to_fetch.append(name)
+        else:
+            resolved[name] = person_id
+
+    if to_fetch:
+        for row in run_query(PERSON_IDS_BY_NAMES_QUERY, params={"names": to_fetch}):
+            # Like get_person_by_name_db, the first match wins if a name is not unique
+            if row['name'] not in resolved:
+                resolved[row['name']] = row['person_id']
+                person_by_name_cache.set(row['name'], row['person_id'])
+    return resolved
+
+def get_person_names_db(person_ids):
+    """
+    Resolve many person IDs to names, from the person cache or with one Spanner query.
+
+    Args:
+        person_ids (list[str]): Person IDs; duplicates are allowed.
+
+    Returns:
+        dict[str, str]: Maps each ID that exists to its name.
+    """
+    resolved = {}
+    to_fetch = []
+    for person_id in dict.fromkeys(person_ids):
+        person = person_cache.get(person_id)
+        if person is MISSING or person is None:
+            to_fetch.append(person_id)
+        else:
+            resolved[person_id] = person['name']
+
+    if to_fetch:
+        for row in run_query(PERSON_NAMES_BY_IDS_QUERY, params={"person_ids": to_fetch}):
+            resolved[row['person_id']] = row['name']
+    return resolved
+
+# --- Row Builders ---
+# Map a validated post / event to the (table, columns, rows) triples written by
+# spanner_data.insert_rows, so single and bulk writes produce the same rows.
+POST_COLUMNS = ["post_id", "author_id", "text", "sentiment", "post_timestamp", "create_time"]
+EVENT_COLUMNS = ["event_id", "name", "description", "event_date", "create_time"]
+LOCATION_COLUMNS = ["location_id", "name", "description", "latitude", "longitude", "address", "create_time"]
+EVENT_LOCATION_COLUMNS = ["event_id", "location_id", "create_time"]
+ATTENDANCE_COLUMNS = ["event_id", "person_id", "attendance_time"]
+
+def _post_table_rows(post):
+    """Rows for one post dict with post_id, author_id, text and sentiment."""
+    return [("Post", POST_COLUMNS, [(
+        post["post_id"], post["author_id"], post["text"], post.get("sentiment"),
+        datetime.now(timezone.utc), # Use current UTC time for post_timestamp
+        spanner.COMMIT_TIMESTAMP   # Use commit time for create_time
+    )])]
+
+def _event_table_rows(event, person_names):
+    """
+    Rows for one event dict with event_id, event_name, description, event_date,
+    locations and attendee_ids, including its EventSummary row.
+
+    `person_names` maps attendee IDs to names (see get_person_names_db); like
+    the sidebar's former join, attendees without a Person row are left out of
+    the summary.
+    """
+    event_id = event["event_id"]
+    attendee_ids = event.get("attendee_ids") or []
+    location_rows = []
+    event_location_rows = []
+    for loc_data in event["locations"]:
+        location_id = str(uuid.uuid4())
+        location_rows.append((
+            location_id, loc_data.get("name"), loc_data.get("description"),
+            float(loc_data.get("latitude", 0.0)), float(loc_data.get("longitude", 0.0)), # Ensure float
+            loc_data.get("address"), spanner.COMMIT_TIMESTAMP
+        ))
+        event_location_rows.append((event_id, location_id, spanner.COMMIT_TIMESTAMP))
+    return [
+        ("Event", EVENT_COLUMNS, [(event_id, event["event_name"], event["description"], event["event_date"], spanner.COMMIT_TIMESTAMP)]),
+        ("Location", LOCATION_COLUMNS, location_rows),
+        ("EventLocation", EVENT_LOCATION_COLUMNS, event_location_rows),
+        ("Attendance", ATTENDANCE_COLUMNS, [(event_id, attendee_id, spanner.COMMIT_TIMESTAMP) for attendee_id in attendee_ids]),
+        ("EventSummary", EVENT_SUMMARY_COLUMNS, [event_summary_row(
+            event_id, event["event_name"], event["event_date"],
+            [(attendee_id, person_names[attendee_id]) for attendee_id in dict.fromkeys(attendee_ids) if attendee_id in person_names],
+        )]),
+    ]
+
 # --- Helper function to insert a post ---
 def add_post_db(post_id, author_id, text, sentiment=None):
     """Inserts a new post into the Spanner database."""
     if not db:
-        print("Error: Database connection is not available for insert.")
+        log.error("Database connection is not available for insert.")
         raise ConnectionError("Spanner database connection not initialized.")
 
-    def _insert_post(transaction):
-        transaction.insert(
-            table="Post",
-            columns=[
-                "post_id", "author_id", "text", "sentiment",
-                "post_timestamp", "create_time"
-            ],
-            values=[(
-                post_id, author_id, text, sentiment,
-                datetime.now(timezone.utc), # Use current UTC time for post_timestamp
-                spanner.COMMIT_TIMESTAMP   # Use commit time for create_time
-            )]
-        )
-        print(f"Transaction attempting to insert post_id: {post_id}")
-
     try:
-        db.run_in_transaction(_insert_post)
-        print(f"Successfully inserted post_id: {post_id}")
+        insert_rows(db, _post_table_rows({"post_id": post_id, "author_id": author_id, "text": text, "sentiment": sentiment}))
+        log.debug("Inserted post_id: %s", post_id)
+        invalidate_person_cache(author_id)
         return True
     except Exception as e:
-        print(f"Error inserting post (id: {post_id}): {e}")
-        # Log the full traceback for detailed debugging if needed
-        # traceback.print_exc()
+        log.error("Error inserting post (id: %s): %s", post_id, e)
         return False # Indicate failure
 
 def add_full_event_with_details_db(event_id, event_name, description, event_date, locations_data, attendee_ids):
     """
     Inserts a new event with its title, description, multiple locations,
-    and its first attendee into Spanner within a transaction.
+    and its attendees into Spanner as one batched commit, together with the
+    event's EventSummary row.
+
+    All rows are assembled per table first and written with a single blind
+    write (`database.batch()`). The only read, of the attendees' names for the
+    summary, happens before the commit, so the path needs no read-write
+    transaction and holds no locks.
 
     Args:
         event_id (str): The unique ID for the new event.
@@ -414,92 +1055,132 @@ def add_full_event_with_details_db(event_id, event_name, description, event_date
         attendee_ids (list[str]): A list of person_ids for the attendees.
 
     Returns:
-        bool: True if the transaction was successful, False otherwise.
+        CommitResult or bool: The commit timestamp and stats if the commit
+                              succeeded (truthy), False otherwise.
     """
     if not db:
-        print("Error: Database connection is not available for full event insert.")
+        log.error("Database connection is not available for full event insert.")
         raise ConnectionError("Spanner database connection not initialized.")
 
-    def _insert_event_and_attendee(transaction):
-        # Insert into Event table (Simplified Schema)
-        transaction.insert(
-            table="Event",
-            columns=[
-                "event_id", "name", "description", "event_date", "create_time"
-            ],
-            values=[(
-                event_id, event_name, description, event_date,
-                spanner.COMMIT_TIMESTAMP
-            )]
-        )
-        print(f"Transaction attempting to insert event_id: {event_id}")
-
-        # Insert Locations and EventLocation links
-        for loc_data in locations_data:
-            location_id = str(uuid.uuid4())
-            transaction.insert(
-                table="Location",
-                columns=["location_id", "name", "description", "latitude", "longitude", "address", "create_time"],
-                values=[(
-                    location_id, loc_data.get("name"), loc_data.get("description"),
-                    float(loc_data.get("latitude", 0.0)), float(loc_data.get("longitude", 0.0)), # Ensure float
-                    loc_data.get("address"), spanner.COMMIT_TIMESTAMP
-                )]
-            )
-            print(f"Transaction attempting to insert location_id: {location_id} for event {event_id}")
-            transaction.insert(
-                table="EventLocation",
-                columns=["event_id", "location_id", "create_time"],
-                values=[(event_id, location_id, spanner.COMMIT_TIMESTAMP)]
-            )
-            print(f"Transaction attempting to link event {event_id} with location {location_id}")
-
-        # Insert each attendee into Attendance table
-        if attendee_ids:
-            for attendee_id_to_add in attendee_ids:
-                transaction.insert(
-                    table="Attendance",
-                    columns=["event_id", "person_id", "attendance_time"],
-                    values=[(event_id, attendee_id_to_add, spanner.COMMIT_TIMESTAMP)]
-                )
-                print(f"Transaction attempting to insert attendee {attendee_id_to_add} for event {event_id} into Attendance")
-
+    event = {
+        "event_id": event_id, "event_name": event_name, "description": description,
+        "event_date": event_date, "locations": locations_data, "attendee_ids": attendee_ids,
+    }
     try:
-        db.run_in_transaction(_insert_event_and_attendee)
-        print(f"Successfully inserted event {event_id} with details and attendees {attendee_ids}")
-        return True
+        person_names = get_person_names_db(attendee_ids or [])
+        result = insert_rows(db, _event_table_rows(event, person_names))
+        log.debug("Inserted event %s with %d locations and %d attendees", event_id, len(locations_data), len(attendee_ids or []),
+                  extra={"rows": result.row_count, "mutations": result.mutation_count, "committed": result.commit_timestamp})
+        event_details_cache.invalidate(event_id)
+        for attendee_id in attendee_ids or []:
+            invalidate_person_cache(attendee_id)
+        bump_data_version("events")
+        return result
     except Exception as e:
-        print(f"Error inserting full event (event_id: {event_id}, attendee_ids: {attendee_ids}): {e}")
-        traceback.print_exc() # Log detailed error
+        log.exception("Error inserting full event (event_id: %s, attendee_ids: %s): %s", event_id, attendee_ids, e)
         return False # Indicate failure
 
+def add_posts_db(posts):
+    """
+    Inserts many posts, committing them in chunks of POST_BATCH_CHUNK_SIZE.
+
+    Args:
+        posts (list[dict]): Posts with post_id, author_id, text and sentiment.
+
+    Returns:
+        dict[str, CommitResult or Exception]: The outcome of the commit that
+                                              carried each post, keyed by post_id.
+    """
+    if not db:
+        log.error("Database connection is not available for batch insert.")
+        raise ConnectionError("Spanner database connection not initialized.")
+
+    outcomes = {}
+    for chunk, result in insert_in_chunks(db, posts, _post_table_rows, POST_BATCH_CHUNK_SIZE):
+        if isinstance(result, Exception):
+            log.error("Error inserting chunk of %d posts: %s", len(chunk), result)
+        else:
+            log.info("Inserted chunk of %d posts", len(chunk),
+                     extra={"mutations": result.mutation_count, "committed": result.commit_timestamp})
+            for author_id in {post["author_id"] for post in chunk}:
+                invalidate_person_cache(author_id)
+        for post in chunk:
+            outcomes[post["post_id"]] = result
+    return outcomes
+
+def add_events_db(events):
+    """
+    Inserts many events with their locations, attendees and EventSummary rows,
+    committing them in chunks of EVENT_BATCH_CHUNK_SIZE. An event is never
+    split across commits.
+
+    Args:
+        events (list[dict]): Events with event_id, event_name, description,
+                             event_date, locations and attendee_ids.
+
+    Returns:
+        dict[str, CommitResult or Exception]: The outcome of the commit that
+                                              carried each event, keyed by event_id.
+    """
+    if not db:
+        log.error("Database connection is not available for batch insert.")
+        raise ConnectionError("Spanner database connection not initialized.")
+
+    person_names = get_person_names_db([attendee_id for event in events for attendee_id in event["attendee_ids"]])
+    outcomes = {}
+    for chunk, result in insert_in_chunks(db, events, lambda event: _event_table_rows(event, person_names), EVENT_BATCH_CHUNK_SIZE):
+        if isinstance(result, Exception):
+            log.error("Error inserting chunk of %d events: %s", len(chunk), result)
+        else:
+            log.info("Inserted chunk of %d events", len(chunk),
+                     extra={"rows": result.row_count, "mutations": result.mutation_count, "committed": result.commit_timestamp})
+            for event in chunk:
+                event_details_cache.invalidate(event["event_id"])
+                for attendee_id in event["attendee_ids"]:
+                    invalidate_person_cache(attendee_id)
+            bump_data_version("events")
+        for event in chunk:
+            outcomes[event["event_id"]] = result
+    return outcomes
+
 # --- Routes ---
 @app.route('/')
 def home():
-    """Home page: Shows all posts and the events panel."""
+    """Home page: Shows the first page of posts and the events panel."""
     all_posts = []
-    all_events_attendance = [] # Initialize
+    next_feed_cursor = None
+    events_panel = None # Initialize
+    validators = None
 
     if not db:
         flash("Database connection not available. Cannot load page data.", "danger")
     else:
         try:
-            # Fetch both posts and events
-            all_posts = get_all_posts_with_author_db()
-            all_events_attendance = get_all_events_with_attendees_db() # Fetch events
+            # Fetch both posts and events in one snapshot
+            page = load_home_page_db()
+            all_posts = page["posts"]
+            next_feed_cursor = page["next_feed_cursor"]
+            events_panel = page["events_panel"]
+            validators = page["validators"]
         except Exception as e:
              flash(f"Failed to load page data: {e}", "danger")
              # Ensure variables are defined even on error
              all_posts = []
-             all_events_attendance = []
-
-    return render_template(
-        'index.html',
-        posts=all_posts,
-        all_events_attendance=all_events_attendance, # Pass events to template
-        google_maps_api_key=GOOGLE_MAPS_API_KEY, # For potential future use on home page
-        google_maps_map_id=GOOGLE_MAPS_MAP_KEY # Pass it to the template
-    )
+             events_panel = None
+
+    def _render():
+        return render_template(
+            'index.html',
+            posts=all_posts,
+            next_feed_cursor=next_feed_cursor, # Infinite scroll continues from here via /api/feed
+            events_panel=events_panel, # Pre-rendered (and usually cached) events sidebar
+            google_maps_api_key=GOOGLE_MAPS_API_KEY, # For potential future use on home page
+            google_maps_map_id=GOOGLE_MAPS_MAP_KEY # Pass it to the template
+        )
+
+    if validators is None:
+        return _render() # Error state: never cached
+    return conditional_response(validators, SHARED_CACHE_CONTROL, _render)
 
 
 @app.route('/person/<string:person_id>')
@@ -510,27 +1191,17 @@ def person_profile(person_id):
         abort(503) # Service Unavailable
 
     try:
-        person = get_person_db(person_id)
-        if not person:
-            abort(404) # Person not found
-
-        person_posts = get_posts_by_person_db(person_id)
-        friends = get_friends_db(person_id)
-        all_events_attendance = get_all_events_with_attendees_db()
-
+        page = load_person_page_db(person_id)
     except Exception as e:
          flash(f"Failed to load profile data: {e}", "danger")
          # Redirect to home or show an error page might be better than aborting
-         return render_template('person.html', person=person, person_posts=[], friends=[], all_events_attendance=[], error=True)
+         return render_template('person.html', person=None, person_posts=[], friends=[], events_panel=None, error=True)
 
+    if not page:
+        abort(404) # Person not found
 
-    return render_template(
-        'person.html',
-        person=person,
-        person_posts=person_posts,
-        friends=friends,
-        all_events_attendance=all_events_attendance
-    )
+    validators = page.pop("validators")
+    return conditional_response(validators, REVALIDATE_CACHE_CONTROL, lambda: render_template('person.html', **page))
 
 @app.route('/event/<string:event_id>')
 def event_detail_page(event_id):
@@ -542,36 +1213,141 @@ def event_detail_page(event_id):
     if not GOOGLE_MAPS_API_KEY:
         flash("Google Maps API Key is not configured. Map functionality will be disabled.", "warning")
 
-    event_data = None
+    page = None
     try:
-        event_data = get_event_details_with_locations_attendees_db(event_id)
-        if not event_data:
+        page = load_event_page_db(event_id)
+        if not page:
             abort(404) # Event not found
     except Exception as e:
         flash(f"Failed to load event data: {e}", "danger")
         # Log the error for debugging
-        print(f"Error fetching event {event_id}: {e}")
-        traceback.print_exc()
+        log.exception("Error fetching event %s: %s", event_id, e)
         # Render the page with an error state or redirect
         return render_template('event_detail.html', event=None, error=True, google_maps_api_key=GOOGLE_MAPS_API_KEY)
 
-    return render_template('event_detail.html', event=event_data, google_maps_api_key=GOOGLE_MAPS_API_KEY)
+    return conditional_response(
+        page["validators"], SHARED_CACHE_CONTROL,
+        lambda: render_template('event_detail.html', event=page["event"], google_maps_api_key=GOOGLE_MAPS_API_KEY),
+    )
 
 
-@app.route('/api/posts', methods=['POST'])
-def add_post_api():
+@app.route('/api/feed', methods=['GET'])
+def feed_api():
     """
-    API endpoint to add a new post.
-    Expects JSON body: {"author_name": "...", "text": "...", "sentiment": "..." (optional)}
+    API endpoint returning one page of the home feed, newest first.
+    Query params:
+        after: cursor from a previous page's 'next_cursor' ("<post_timestamp>,<post_id>"), optional
+        limit: page size, optional (default FEED_PAGE_SIZE, max FEED_MAX_PAGE_SIZE)
+    Returns JSON: {"posts": [...], "next_cursor": "..." or null}
     """
     if not db:
-        return jsonify({"error": "Database connection not available"}), 503 # Service Unavailable
+        return jsonify({"error": "Database connection not available"}), 503
+
+    after = None
+    after_str = request.args.get('after')
+    if after_str:
+        try:
+            after = decode_feed_cursor(after_str)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid 'after' cursor: {e}"}), 400
+
+    try:
+        limit = int(request.args.get('limit', FEED_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "'limit' must be an integer"}), 400
+    if limit < 1 or limit > FEED_MAX_PAGE_SIZE:
+        return jsonify({"error": f"'limit' must be between 1 and {FEED_MAX_PAGE_SIZE}"}), 400
+
+    try:
+        posts, next_cursor = get_feed_page_db(after=after, limit=limit)
+    except ConnectionError as e:
+        log.error("ConnectionError during feed fetch: %s", e)
+        return jsonify({"error": "Database connection error during operation"}), 503
+    except Exception as e:
+        log.exception("Unexpected error processing feed request: %s", e)
+        return jsonify({"error": "An internal server error occurred"}), 500
+
+    # Records and timestamps are serialized (ISO 8601) by SpannerJSONProvider
+    return conditional_response(
+        page_validators(posts), SHARED_CACHE_CONTROL,
+        lambda: jsonify({"posts": posts, "next_cursor": next_cursor}),
+    )
+
+
+
+def _stream_export(rows, name):
+    """
+    Streams `rows` as NDJSON (default) or, with ?format=json, as a JSON array.
+
+    The first row is read before the response starts so that connection and
+    query errors still get a proper status code. An error after that can only
+    end the stream early; NDJSON output then ends with an {"error": ...} line.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'json'):
+        return jsonify({"error": "'format' must be 'ndjson' or 'json'"}), 400
+
+    try:
+        first = next(rows, None)
+    except ConnectionError as e:
+        log.error("ConnectionError during %s export: %s", name, e)
+        return jsonify({"error": "Database connection error during operation"}), 503
+    except Exception as e:
+        log.exception("Unexpected error starting %s export: %s", name, e)
+        return jsonify({"error": "An internal server error occurred"}), 500
+
+    def _rows():
+        if first is None:
+            return
+        yield first
+        yield from rows
+
+    if export_format == 'json':
+        return Response(stream_with_context(json_array_chunks(_rows())), mimetype="application/json")
+
+    def _ndjson():
+        try:
+            yield from ndjson_lines(_rows())
+        except Exception as e:
+            log.exception("Error during %s export, stream truncated: %s", name, e)
+            yield json.dumps({"error": "Export interrupted"}) + "\n"
+
+    return Response(stream_with_context(_ndjson()), mimetype="application/x-ndjson")
+
+
+@app.route('/api/posts/export', methods=['GET'])
+def export_posts_api():
+    """
+    API endpoint streaming every post with its author's name, newest first.
+    Query params:
+        format: 'ndjson' (default, one post per line) or 'json' (one array)
+    """
+    if not db:
+        return jsonify({"error": "Database connection not available"}), 503
+    return _stream_export(iter_all_posts_with_author_db(), "posts")
+
+
+@app.route('/api/events/export', methods=['GET'])
+def export_events_api():
+    """
+    API endpoint streaming every event with its attendees, newest first.
+    Query params:
+        format: 'ndjson' (default, one event per line) or 'json' (one array)
+    """
+    if not db:
+        return jsonify({"error": "Database connection not available"}), 503
+    return _stream_export(iter_all_events_with_attendees_db(), "events")
 
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "Invalid JSON payload"}), 400
+
+# --- Payload Validation ---
+# Shared by the single-item and batch endpoints. Each returns (cleaned, None)
+# for a valid payload or (None, error message) for an invalid one.
+def validate_post_payload(data):
+    """Validates a post payload: {"author_name": "...", "text": "...", "sentiment": "..." (optional)}."""
+    if not isinstance(data, dict) or not data:
+        return None, "Invalid JSON payload"
     if 'author_name' not in data or 'text' not in data:
-        return jsonify({"error": "Missing 'author_name' or 'text' in request body"}), 400
+        return None, "Missing 'author_name' or 'text' in request body"
 
     author_name = data['author_name']
     text = data['text']
@@ -579,11 +1355,148 @@ def add_post_api():
 
     # Basic input validation
     if not isinstance(author_name, str) or not author_name.strip():
-         return jsonify({"error": "'author_name' must be a non-empty string"}), 400
+        return None, "'author_name' must be a non-empty string"
     if not isinstance(text, str) or not text.strip():
-         return jsonify({"error": "'text' must be a non-empty string"}), 400
+        return None, "'text' must be a non-empty string"
     if sentiment is not None and not isinstance(sentiment, str):
-         return jsonify({"error": "'sentiment' must be a string if provided"}), 400
+        return None, "'sentiment' must be a string if provided"
+
+    return {"author_name": author_name, "text": text, "sentiment": sentiment}, None
+
+def validate_event_payload(data):
+    """
+    Validates an event payload (see add_event_api for the format).
+
+    Returns the cleaned event with 'event_date' parsed to a UTC datetime.
+    """
+    if not isinstance(data, dict) or not data:
+        return None, "Invalid JSON payload"
+
+    # --- Input Validation (Simplified) ---
+    required_fields = ["event_name", "description", "event_date", "locations", "attendee_names"]
+    missing_fields = [field for field in required_fields if field not in data]
+    if missing_fields:
+        return None, f"Missing required fields: {', '.join(missing_fields)}"
+
+    event_name = data['event_name']
+    description = data['description']
+    event_date_str = data['event_date']
+    locations_data = data['locations']
+    attendee_names = data['attendee_names']
+
+    # Basic type checks
+    if not isinstance(event_name, str) or not event_name.strip():
+        return None, "'event_name' must be a non-empty string"
+    if not isinstance(description, str):
+        return None, "'description' must be a string"
+    if not isinstance(event_date_str, str) or not event_date_str.strip():
+        return None, "'event_date' must be a non-empty string"
+    if not isinstance(attendee_names, list) or not attendee_names: # Ensure it's a non-empty list
+        return None, "'attendee_names' must be a non-empty list of strings"
+    for name in attendee_names:
+        if not isinstance(name, str) or not name.strip():
+            return None, "Each name in 'attendee_names' must be a non-empty string"
+    if not isinstance(locations_data, list):
+        return None, "'locations' must be a list"
+    if not locations_data:
+        return None, "'locations' list cannot be empty"
+
+    for i, loc in enumerate(locations_data):
+        if not isinstance(loc, dict):
+            return None, f"Each item in 'locations' must be an object (error at index {i})"
+        loc_req_fields = ["name", "latitude", "longitude"]
+        missing_loc_fields = [f for f in loc_req_fields if f not in loc or not str(loc[f]).strip()] # Check for presence and non-empty string for name
+        if missing_loc_fields:
+            return None, f"Location at index {i} missing required fields or has empty values: {', '.join(missing_loc_fields)}"
+        try:
+            float(loc["latitude"])
+            float(loc["longitude"])
+        except (ValueError, TypeError):
+            return None, f"Location at index {i} has invalid latitude/longitude. Must be numbers."
+        # Optional fields like description and address can be checked if needed
+        if "description" in loc and not isinstance(loc["description"], str):
+            return None, f"Location at index {i} 'description' must be a string if provided."
+        if "address" in loc and not isinstance(loc["address"], str):
+            return None, f"Location at index {i} 'address' must be a string if provided."
+
+    # --- Process Inputs (Simplified) ---
+    try:
+        # Parse timestamp (ISO 8601 format expected)
+        event_date = datetime.fromisoformat(event_date_str.replace('Z', '+00:00'))
+
+        # Spanner prefers timezone-aware datetimes.
+        # Ensure it's aware (fromisoformat usually handles this if tz is present)
+        if event_date.tzinfo is None or event_date.tzinfo.utcoffset(event_date) is None:
+             # If input was naive, assume UTC as a sensible default
+             log.warning("Received naive datetime string '%s'. Assuming UTC.", event_date_str)
+             event_date = event_date.replace(tzinfo=timezone.utc)
+        else:
+             # Convert to UTC if it had a different offset
+             event_date = event_date.astimezone(timezone.utc)
+    except ValueError as e:
+        return None, f"Invalid timestamp format for 'event_date'. Use ISO 8601 (e.g., YYYY-MM-DDTHH:MM:SSZ or YYYY-MM-DDTHH:MM:SS+HH:MM). Details: {e}"
+
+    return {
+        "event_name": event_name,
+        "description": description,
+        "event_date": event_date,
+        "locations": locations_data,
+        "attendee_names": attendee_names,
+    }, None
+
+def _batch_items_from_request():
+    """
+    Reads the items of a batch request.
+
+    Accepts a JSON array, or NDJSON (one JSON object per line) when the
+    Content-Type is application/x-ndjson.
+
+    Returns:
+        tuple[list or None, str or None]: The items, or None and an error message.
+    """
+    if request.mimetype == "application/x-ndjson":
+        items = []
+        for line_number, line in enumerate(request.get_data(as_text=True).splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                return None, f"Invalid JSON on line {line_number}: {e}"
+    else:
+        items = request.get_json(silent=True)
+        if not isinstance(items, list):
+            return None, "Expected a JSON array of items or an application/x-ndjson body"
+
+    if not items:
+        return None, "Batch must contain at least one item"
+    if len(items) > BATCH_MAX_ITEMS:
+        return None, f"Batch too large: {len(items)} items (max {BATCH_MAX_ITEMS})"
+    return items, None
+
+def _batch_response(results):
+    """Builds the summary response for a batch: 201 if every item was created, else 207 (Multi-Status)."""
+    created = sum(1 for result in results if result["status"] == "created")
+    summary = {"total": len(results), "created": created, "failed": len(results) - created}
+    return jsonify({"results": results, "summary": summary}), 201 if created == len(results) else 207
+
+
+@app.route('/api/posts', methods=['POST'])
+def add_post_api():
+    """
+    API endpoint to add a new post.
+    Expects JSON body: {"author_name": "...", "text": "...", "sentiment": "..." (optional)}
+    """
+    if not db:
+        return jsonify({"error": "Database connection not available"}), 503 # Service Unavailable
+
+    post, error = validate_post_payload(request.get_json())
+    if error:
+        return jsonify({"error": error}), 400
+
+    author_name = post['author_name']
+    text = post['text']
+    sentiment = post['sentiment']
 
     try:
         # 1. Find the author_id using the provided name
@@ -621,14 +1534,81 @@ def add_post_api():
 
     except ConnectionError as e:
          # Handle case where db connection failed specifically in this request path
-         print(f"ConnectionError during post add: {e}")
+         log.error("ConnectionError during post add: %s", e)
          return jsonify({"error": "Database connection error during operation"}), 503
     except Exception as e:
         # Catch any other unexpected errors (e.g., from get_person_by_name_db)
-        print(f"Unexpected error processing add post request: {e}")
-        traceback.print_exc() # Log detailed error for server admin
+        log.exception("Unexpected error processing add post request: %s", e)
+        return jsonify({"error": "An internal server error occurred"}), 500
+
+
+@app.route('/api/posts:batch', methods=['POST'])
+def add_posts_batch_api():
+    """
+    API endpoint to add many posts in one request.
+
+    Expects a JSON array of post objects (same format as /api/posts), or NDJSON
+    with one post per line. Every item is validated first, all author names are
+    resolved with one query, and the valid posts are committed in chunks.
+
+    Returns one result per item, in request order:
+        {"index": 0, "status": "created", "post_id": "..."} or
+        {"index": 1, "status": "error", "error": "..."}
+    with status 201 if all items were created, 207 otherwise.
+    """
+    if not db:
+        return jsonify({"error": "Database connection not available"}), 503
+
+    items, error = _batch_items_from_request()
+    if error:
+        return jsonify({"error": error}), 400
+
+    results = [None] * len(items)
+    valid = [] # (index, cleaned post)
+    for index, data in enumerate(items):
+        post, error = validate_post_payload(data)
+        if error:
+            results[index] = {"index": index, "status": "error", "error": error}
+        else:
+            valid.append((index, post))
+
+    try:
+        ids_by_name = get_person_ids_by_names_db([post['author_name'] for _, post in valid])
+
+        to_insert = [] # (index, row dict)
+        for index, post in valid:
+            author_id = ids_by_name.get(post['author_name'])
+            if not author_id:
+                results[index] = {"index": index, "status": "error", "error": f"Author '{post['author_name']}' not found"}
+                continue
+            to_insert.append((index, {
+                "post_id": str(uuid.uuid4()),
+                "author_id": author_id,
+                "text": post['text'],
+                "sentiment": post['sentiment'],
+            }))
+
+        outcomes = add_posts_db([row for _, row in to_insert]) if to_insert else {}
+    except ConnectionError as e:
+         log.error("ConnectionError during batch post add: %s", e)
+         return jsonify({"error": "Database connection error during operation"}), 503
+    except Exception as e:
+        log.exception("Unexpected error processing batch post request: %s", e)
         return jsonify({"error": "An internal server error occurred"}), 500
 
+    for index, row in to_insert:
+        outcome = outcomes[row['post_id']]
+        if isinstance(outcome, Exception):
+            results[index] = {"index": index, "status": "error", "error": "Failed to save post to the database"}
+        else:
+            results[index] = {
+                "index": index,
+                "status": "created",
+                "post_id": row['post_id'],
+                "author_id": row['author_id'],
+                "commit_timestamp": outcome.commit_timestamp.isoformat() if outcome.commit_timestamp else None,
+            }
+    return _batch_response(results)
 
 
 @app.route('/api/events', methods=['POST'])
@@ -648,86 +1628,28 @@ def add_event_api():
     if not db:
         return jsonify({"error": "Database connection not available"}), 503
 
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "Invalid JSON payload"}), 400
-
-    # --- Input Validation (Simplified) ---
-    required_fields = ["event_name", "description", "event_date", "locations", "attendee_names"]
-    missing_fields = [field for field in required_fields if field not in data]
-    if missing_fields:
-        return jsonify({"error": f"Missing required fields: {', '.join(missing_fields)}"}), 400
-
-    event_name = data['event_name'] 
-    description = data['description']
-    event_date_str = data['event_date']
-    locations_data = data['locations']
-    attendee_names = data['attendee_names']
-
-    # Basic type checks
-    if not isinstance(event_name, str) or not event_name.strip(): 
-         return jsonify({"error": "'event_name' must be a non-empty string"}), 400 
-    if not isinstance(description, str):
-         return jsonify({"error": "'description' must be a string"}), 400
-    if not isinstance(event_date_str, str) or not event_date_str.strip():
-         return jsonify({"error": "'event_date' must be a non-empty string"}), 400
-    if not isinstance(attendee_names, list) or not attendee_names: # Ensure it's a non-empty list
-         return jsonify({"error": "'attendee_names' must be a non-empty list of strings"}), 400
-    for name in attendee_names:
-        if not isinstance(name, str) or not name.strip():
-            return jsonify({"error": "Each name in 'attendee_names' must be a non-empty string"}), 400
-    if not isinstance(locations_data, list):
-        return jsonify({"error": "'locations' must be a list"}), 400
-    if not locations_data: 
-        return jsonify({"error": "'locations' list cannot be empty"}), 400
-
-    for i, loc in enumerate(locations_data):
-        if not isinstance(loc, dict):
-            return jsonify({"error": f"Each item in 'locations' must be an object (error at index {i})"}), 400
-        loc_req_fields = ["name", "latitude", "longitude"]
-        missing_loc_fields = [f for f in loc_req_fields if f not in loc or not str(loc[f]).strip()] # Check for presence and non-empty string for name
-        if missing_loc_fields:
-            return jsonify({"error": f"Location at index {i} missing required fields or has empty values: {', '.join(missing_loc_fields)}"}), 400
-        try:
-            float(loc["latitude"])
-            float(loc["longitude"])
-        except (ValueError, TypeError):
-            return jsonify({"error": f"Location at index {i} has invalid latitude/longitude. Must be numbers."}), 400
-        # Optional fields like description and address can be checked if needed
-        if "description" in loc and not isinstance(loc["description"], str):
-            return jsonify({"error": f"Location at index {i} 'description' must be a string if provided."}), 400
-        if "address" in loc and not isinstance(loc["address"], str):
-            return jsonify({"error": f"Location at index {i} 'address' must be a string if provided."}), 400
-
-    # --- Process Inputs (Simplified) ---
-    try:
-        # Parse timestamp (ISO 8601 format expected)
-        event_date = datetime.fromisoformat(event_date_str.replace('Z', '+00:00'))
-
-        # Spanner prefers timezone-aware datetimes.
-        # Ensure it's aware (fromisoformat usually handles this if tz is present)
-        if event_date.tzinfo is None or event_date.tzinfo.utcoffset(event_date) is None:
-             # If input was naive, assume UTC as a sensible default
-             print(f"Warning: Received naive datetime string '{event_date_str}'. Assuming UTC.")
-             event_date = event_date.replace(tzinfo=timezone.utc)
-        else:
-             # Convert to UTC if it had a different offset
-             event_date = event_date.astimezone(timezone.utc)
-
+    event, error = validate_event_payload(request.get_json())
+    if error:
+        return jsonify({"error": error}), 400
 
-    except ValueError as e:
-        return jsonify({"error": f"Invalid timestamp format for 'event_date'. Use ISO 8601 (e.g., YYYY-MM-DDTHH:MM:SSZ or YYYY-MM-DDTHH:MM:SS+HH:MM). Details: {e}"}), 400
+    event_name = event['event_name']
+    description = event['description']
+    event_date = event['event_date']
+    locations_data = event['locations']
+    attendee_names = event['attendee_names']
 
     try:
-        # 1. Find person_ids for all attendee names
-        attendee_ids_to_add = []
-        processed_attendees_info = []
-        for attendee_name_str in attendee_names:
-            attendee_id = get_person_by_name_db(attendee_name_str)
-            if not attendee_id:
-                return jsonify({"error": f"Attendee '{attendee_name_str}' not found"}), 404 # Not Found
-            attendee_ids_to_add.append(attendee_id)
-            processed_attendees_info.append({"id": attendee_id, "name": attendee_name_str})
+        # 1. Find person_ids for all attendee names in one lookup
+        ids_by_name = get_person_ids_by_names_db(attendee_names)
+        unknown_names = [name for name in dict.fromkeys(attendee_names) if name not in ids_by_name]
+        if unknown_names:
+            return jsonify({
+                "error": f"Attendees not found: {', '.join(unknown_names)}",
+                "unknown_names": unknown_names
+            }), 404 # Not Found
+
+        attendee_ids_to_add = [ids_by_name[name] for name in attendee_names]
+        processed_attendees_info = [{"id": ids_by_name[name], "name": name} for name in attendee_names]
 
         if not attendee_ids_to_add: # Should be caught by earlier validation, but good check
             return jsonify({"error": "No valid attendees found or provided."}), 400
@@ -754,7 +1676,8 @@ def add_event_api():
                 "description": description,
                 "event_date": event_date.isoformat(), # Return in ISO format
                 "locations": locations_data, # Echo back the locations provided
-                "attendees": processed_attendees_info # List of {id, name}
+                "attendees": processed_attendees_info, # List of {id, name}
+                "commit_timestamp": success.commit_timestamp.isoformat() if success.commit_timestamp else None
             }
             return jsonify(event_data), 201 # 201 Created status code
         else:
@@ -762,14 +1685,108 @@ def add_event_api():
             return jsonify({"error": "Failed to save event and attendee to the database"}), 500 # Internal Server Error
 
     except ConnectionError as e:
-         print(f"ConnectionError during event add: {e}")
+         log.error("ConnectionError during event add: %s", e)
          return jsonify({"error": "Database connection error during operation"}), 503
     except Exception as e:
         # Catch other unexpected errors
-        print(f"Unexpected error processing add event request: {e}")
-        traceback.print_exc()
+        log.exception("Unexpected error processing add event request: %s", e)
+        return jsonify({"error": "An internal server error occurred"}), 500
+
+@app.route('/api/events:batch', methods=['POST'])
+def add_events_batch_api():
+    """
+    API endpoint to add many events in one request.
+
+    Expects a JSON array of event objects (same format as /api/events), or
+    NDJSON with one event per line. Every item is validated first, the attendee
+    names of all events are resolved with one query, and the valid events are
+    committed in chunks; an event and its locations/attendees are always
+    written by the same commit.
+
+    Returns one result per item, in request order:
+        {"index": 0, "status": "created", "event_id": "..."} or
+        {"index": 1, "status": "error", "error": "...", "unknown_names": [...]}
+    with status 201 if all items were created, 207 otherwise.
+    """
+    if not db:
+        return jsonify({"error": "Database connection not available"}), 503
+
+    items, error = _batch_items_from_request()
+    if error:
+        return jsonify({"error": error}), 400
+
+    results = [None] * len(items)
+    valid = [] # (index, cleaned event)
+    for index, data in enumerate(items):
+        event, error = validate_event_payload(data)
+        if error:
+            results[index] = {"index": index, "status": "error", "error": error}
+        else:
+            valid.append((index, event))
+
+    try:
+        ids_by_name = get_person_ids_by_names_db([name for _, event in valid for name in event['attendee_names']])
+
+        to_insert = [] # (index, row dict)
+        for index, event in valid:
+            unknown_names = [name for name in dict.fromkeys(event['attendee_names']) if name not in ids_by_name]
+            if unknown_names:
+                results[index] = {
+                    "index": index,
+                    "status": "error",
+                    "error": f"Attendees not found: {', '.join(unknown_names)}",
+                    "unknown_names": unknown_names,
+                }
+                continue
+            to_insert.append((index, {
+                "event_id": str(uuid.uuid4()),
+                "event_name": event['event_name'],
+                "description": event['description'],
+                "event_date": event['event_date'],
+                "locations": event['locations'],
+                "attendee_ids": [ids_by_name[name] for name in event['attendee_names']],
+            }))
+
+        outcomes = add_events_db([row for _, row in to_insert]) if to_insert else {}
+    except ConnectionError as e:
+         log.error("ConnectionError during batch event add: %s", e)
+         return jsonify({"error": "Database connection error during operation"}), 503
+    except Exception as e:
+        log.exception("Unexpected error processing batch event request: %s", e)
         return jsonify({"error": "An internal server error occurred"}), 500
 
+    for index, row in to_insert:
+        outcome = outcomes[row['event_id']]
+        if isinstance(outcome, Exception):
+            results[index] = {"index": index, "status": "error", "error": "Failed to save event and attendee to the database"}
+        else:
+            results[index] = {
+                "index": index,
+                "status": "created",
+                "event_id": row['event_id'],
+                "event_date": row['event_date'].isoformat(),
+                "commit_timestamp": outcome.commit_timestamp.isoformat() if outcome.commit_timestamp else None,
+            }
+    return _batch_response(results)
+
+
+
+# --- Metrics ---
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus scrape endpoint: per-query latency histograms, rows, bytes,
+    retries and errors, plus the hit/miss counters of the in-process caches.
+
+    Only served with METRICS_TOKEN set, to requests that send it as
+    'Authorization: Bearer <token>' (Prometheus: `authorization.credentials`).
+    """
+    if METRICS_TOKEN is None:
+        abort(404)
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), METRICS_TOKEN.encode()):
+        return Response("Unauthorized\n", status=401, mimetype="text/plain", headers={"WWW-Authenticate": "Bearer"})
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
 
 # --- Error Handlers ---
 @app.errorhandler(404)
@@ -779,26 +1796,35 @@ def page_not_found(e):
 @app.errorhandler(500)
 def internal_server_error(e):
      # Log the error e
-     print(f"Internal Server Error: {e}")
+     log.error("Internal Server Error: %s", e)
      return render_template('500.html'), 500 # You'll need to create 500.html
 
 @app.errorhandler(503)
 def service_unavailable(e):
      # Log the error e
-     print(f"Service Unavailable Error: {e}")
+     log.error("Service Unavailable Error: %s", e)
      return render_template('503.html'), 503 # You'll need to create 503.html
 
 
-
+def preload_templates():
+    """
+    Compiles every Jinja template up front, so workers forked from a preloaded
+    server (see gunicorn.conf.py) share the compiled templates instead of each
+    compiling them on its first requests.
+    """
+    names = app.jinja_env.list_templates(extensions=["html"])
+    for name in names:
+        app.jinja_env.get_template(name)
+    log.info("Preloaded %d templates.", len(names))
 
 
 if __name__ == '__main__':
     # Check if db connection was successful before running
     if not db:
-        print("\n--- Cannot start Flask app: Spanner database connection failed during initialization. ---")
-        print("--- Please check GCP project, instance ID, database ID, permissions, and network connectivity. ---")
+        log.critical("Cannot start Flask app: Spanner database connection failed during initialization. "
+                     "Please check GCP project, instance ID, database ID, permissions, and network connectivity.")
     else:
-        print("\n--- Starting Flask Development Server ---")
+        log.info("Starting Flask Development Server")
         # Use debug=True only in development! It reloads code and provides better error pages.
         # Use host='0.0.0.0' to make it accessible on your network (e.g., from a VM)
-        app.run(debug=True, host=APP_HOST, port=APP_PORT) # Changed port to avoid conflicts
\ No newline at end of file
+        app.run(debug=True, host=APP_HOST, port=APP_PORT) # Changed port to avoid conflicts
@@ -0,0 +1,105 @@
+# asgi.py
+#
+# ASGI serving mode for the Instavibe web app:
+#
+#   uvicorn asgi:app --host 0.0.0.0 --port 8080
+#
+# The long-lived Introvert Ally SSE streams are served by native async routes;
+# everything else is the unchanged Flask app, mounted as WSGI.
+
+import logging
+import os
+
+import anyio
+from a2wsgi import WSGIMiddleware
+from itsdangerous import BadSignature
+from starlette.applications import Starlette
+from starlette.responses import StreamingResponse
+from starlette.routing import Mount, Route
+
+from app import app as flask_app
+from ally_routes import sse_message, plan_stream_messages, post_status_messages
+
+log = logging.getLogger(__name__)
+
+# --- ASGI Configuration ---
+# Agent SDK and Spanner calls are blocking, so each step of a stream runs on a
+# worker thread and the event loop awaits it. A thread is only occupied while
+# the next event is being produced, never while a slow client is being written
+# to, and this limit is separate from the WSGI pool that serves page requests.
+STREAM_THREADS = int(os.environ.get("ASGI_STREAM_THREADS", "256"))
+WSGI_THREADS = int(os.environ.get("ASGI_WSGI_THREADS", "32"))
+
+_stream_limiter = anyio.CapacityLimiter(STREAM_THREADS)
+_DONE = object()
+
+
+def _flask_session(request):
+    """
+    Reads the Flask session from the request cookie.
+
+    The session is read-only here: once an SSE response has started, its
+    Set-Cookie header has already been sent, so nothing written during the
+    stream could reach the client anyway.
+    """
+    cookie = request.cookies.get(flask_app.config["SESSION_COOKIE_NAME"])
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    if not cookie or serializer is None:
+        return {}
+    try:
+        return serializer.loads(cookie, max_age=int(flask_app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return {}
+
+
+async def _iterate_in_thread(messages):
+    """
+    Drives a blocking message generator from the event loop, one step per thread hop.
+
+    The generator is closed on a worker thread if the client disconnects.
+    """
+    try:
+        while True:
+            message = await anyio.to_thread.run_sync(next, messages, _DONE, limiter=_stream_limiter)
+            if message is _DONE:
+                break
+            yield message
+    finally:
+        await anyio.to_thread.run_sync(messages.close, limiter=_stream_limiter)
+
+
+def _sse_response(messages):
+    return StreamingResponse(
+        messages,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _single_message(message):
+    yield message
+
+
+async def stream_plan(request):
+    """Async counterpart of ally_routes.stream_introvert_ally_plan."""
+    ally_params = _flask_session(request).get('ally_request_params')
+    if not ally_params:
+        return _sse_response(_single_message(sse_message("error", {'message': 'Missing plan parameters in session.'})))
+    return _sse_response(_iterate_in_thread(plan_stream_messages(ally_params)))
+
+
+async def stream_post_status(request):
+    """Async counterpart of ally_routes.stream_post_status."""
+    post_params = _flask_session(request).get('ally_post_params')
+    if not post_params:
+        return _sse_response(_single_message(sse_message("error", {'message': 'Missing posting parameters in session.'})))
+    return _sse_response(_iterate_in_thread(post_status_messages(post_params)))
+
+
+app = Starlette(
+    routes=[
+        Route("/introvert-ally/stream-plan", endpoint=stream_plan),
+        Route("/introvert-ally/stream-post-status", endpoint=stream_post_status),
+        Mount("/", app=WSGIMiddleware(flask_app, workers=WSGI_THREADS)),
+    ],
+)
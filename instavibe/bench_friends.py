@@ -0,0 +1,165 @@
+# bench_friends.py
+#
+# Benchmarks the friend-list query against a synthetic social graph that grows
+# in steps, comparing the former OR-join with the indexed UNION ALL used by
+# app.FRIENDS_QUERY. Run it against a scratch database created by setup.py:
+#
+#   SPANNER_DATABASE_ID=graphdb-bench python setup.py
+#   SPANNER_DATABASE_ID=graphdb-bench python bench_friends.py --people 100000 --degree 20 --steps 4
+#
+# Synthetic rows use deterministic IDs, so re-running tops up the same graph
+# instead of duplicating it. After each step the script prints per-query
+# latency percentiles and the rows each query scanned (from a profiled run):
+# the union should stay flat while the OR-join grows with the table. With
+# FRIEND_ADJACENCY=true the graph is also written to FriendAdjacency and the
+# interleaved adjacency query is measured as well.
+
+import argparse
+import os
+import random
+import time
+import uuid
+
+from google.cloud import spanner
+from google.cloud.spanner_v1 import param_types, ExecuteSqlRequest
+
+from friend_adjacency import FRIEND_ADJACENCY, friendship_table_rows
+
+INSTANCE_ID = os.environ.get("SPANNER_INSTANCE_ID", "instavibe-graph-instance")
+DATABASE_ID = os.environ.get("SPANNER_DATABASE_ID", "graphdb")
+PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
+
+_ID_NAMESPACE = uuid.UUID("6f1c2b7e-5a43-4d2e-9a51-0d1f8e3c7b20")
+
+# The friend-list query before and after it was rewritten as index seeks.
+OR_JOIN_SQL = """
+    SELECT DISTINCT friend.person_id, friend.name
+    FROM Friendship AS f
+    JOIN Person AS friend ON
+        (f.person_id_a = @person_id AND f.person_id_b = friend.person_id) OR
+        (f.person_id_b = @person_id AND f.person_id_a = friend.person_id)
+    WHERE f.person_id_a = @person_id OR f.person_id_b = @person_id
+    ORDER BY friend.name
+"""
+
+UNION_SQL = """
+    SELECT friend.person_id, friend.name, MAX(f.friendship_time) AS friendship_time
+    FROM (
+        SELECT person_id_b AS friend_id, friendship_time
+        FROM Friendship
+        WHERE person_id_a = @person_id
+        UNION ALL
+        SELECT person_id_a AS friend_id, friendship_time
+        FROM Friendship@{FORCE_INDEX=FriendshipByPersonB}
+        WHERE person_id_b = @person_id
+    ) AS f
+    JOIN@{JOIN_METHOD=APPLY_JOIN} Person AS friend ON friend.person_id = f.friend_id
+    GROUP BY friend.person_id, friend.name
+    ORDER BY friend.name
+"""
+
+ADJACENCY_SQL = """
+    SELECT friend.person_id, friend.name, adj.friendship_time
+    FROM FriendAdjacency AS adj
+    JOIN@{JOIN_METHOD=APPLY_JOIN} Person AS friend ON friend.person_id = adj.friend_id
+    WHERE adj.person_id = @person_id
+    ORDER BY friend.name
+"""
+
+QUERIES = {"or_join": OR_JOIN_SQL, "union": UNION_SQL}
+if FRIEND_ADJACENCY:
+    QUERIES["adjacency"] = ADJACENCY_SQL
+
+
+def person_id(i):
+    return str(uuid.uuid5(_ID_NAMESPACE, f"bench-person-{i}"))
+
+
+def seed(database, start, stop, degree, rng, batch_rows=2000):
+    """
+    Adds people [start, stop) and about `degree` friendships per person.
+
+    Each new person befriends random earlier people, so the graph stays
+    connected and friendships are spread over both key columns.
+    """
+    people = [(person_id(i), f"Bench Person {i}", 18 + i % 60, spanner.COMMIT_TIMESTAMP) for i in range(start, stop)]
+    friendships = set()
+    for i in range(max(start, 1), stop):
+        for _ in range(degree // 2):
+            a, b = sorted((person_id(i), person_id(rng.randrange(i))))
+            if a != b:
+                friendships.add((a, b))
+
+    # Friendship (and FriendAdjacency) rows exactly as the other writers build them
+    tables = {"Person": (["person_id", "name", "age", "create_time"], people)}
+    for a, b in friendships:
+        for table, columns, rows in friendship_table_rows(a, b):
+            tables.setdefault(table, (columns, []))[1].extend(rows)
+
+    for table, (columns, rows) in tables.items():
+        for offset in range(0, len(rows), batch_rows):
+            with database.batch() as batch:
+                batch.insert_or_update(table=table, columns=columns, values=rows[offset:offset + batch_rows])
+    return len(people), len(friendships)
+
+
+def _percentile(sorted_values, fraction):
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def measure(database, sql, person_ids):
+    """Runs `sql` once per person ID; returns (latencies in ms, sorted) and the rows scanned by a profiled run."""
+    types = {"person_id": param_types.STRING}
+    latencies = []
+    for pid in person_ids:
+        started = time.perf_counter()
+        with database.snapshot() as snapshot:
+            list(snapshot.execute_sql(sql, params={"person_id": pid}, param_types=types))
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+
+    rows_scanned = None
+    with database.snapshot() as snapshot:
+        results = snapshot.execute_sql(
+            sql, params={"person_id": person_ids[0]}, param_types=types,
+            query_mode=ExecuteSqlRequest.QueryMode.PROFILE,
+        )
+        list(results)
+        if results.stats is not None:
+            rows_scanned = results.stats.query_stats.get("rows_scanned")
+    return latencies, rows_scanned
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the friend-list query on a growing synthetic graph.")
+    parser.add_argument("--people", type=int, default=100_000, help="People in the final graph")
+    parser.add_argument("--degree", type=int, default=20, help="Average friendships per person")
+    parser.add_argument("--steps", type=int, default=4, help="Measure after each of this many equal growth steps")
+    parser.add_argument("--samples", type=int, default=100, help="Friend lookups per query and step")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for the graph and the sampled people")
+    args = parser.parse_args()
+
+    if DATABASE_ID == "graphdb" and not os.environ.get("BENCH_ALLOW_DEFAULT_DATABASE"):
+        parser.error("Refusing to load synthetic data into the default 'graphdb' database; "
+                     "set SPANNER_DATABASE_ID to a scratch database (or BENCH_ALLOW_DEFAULT_DATABASE=1).")
+
+    database = spanner.Client(project=PROJECT_ID).instance(INSTANCE_ID).database(DATABASE_ID)
+    rng = random.Random(args.seed)
+
+    print(f"{'people':>9} {'query':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rows scanned':>13}")
+    seeded = 0
+    for step in range(1, args.steps + 1):
+        target = args.people * step // args.steps
+        seed(database, seeded, target, args.degree, rng)
+        seeded = target
+
+        sample = [person_id(rng.randrange(seeded)) for _ in range(args.samples)]
+        for name, sql in QUERIES.items():
+            latencies, rows_scanned = measure(database, sql, sample)
+            print(f"{seeded:>9} {name:>9} {_percentile(latencies, 0.50):>8.1f} {_percentile(latencies, 0.95):>8.1f} "
+                  f"{_percentile(latencies, 0.99):>8.1f} {rows_scanned if rows_scanned is not None else '-':>13}")
+
+
+if __name__ == "__main__":
+    main()
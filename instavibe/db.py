@@ -2,46 +2,18 @@
 
 import os
 import traceback
-from datetime import datetime,
+from datetime import datetime
 import json # For example usage printing
 
-from google.cloud import spanner
 from google.cloud.spanner_v1 import param_types
 from google.api_core import exceptions
 
-# --- Spanner Configuration ---
-INSTANCE_ID = os.environ.get("SPANNER_INSTANCE_ID", "instavibe-graph-instance")
-DATABASE_ID = os.environ.get("SPANNER_DATABASE_ID", "graphdb")
-PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
-
-if not PROJECT_ID:
-    print("Warning: GOOGLE_CLOUD_PROJECT environment variable not set.")
+from spanner_data import get_database, Query, fetch_all
+from spanner_data.graph import is_symmetric_edge
 
 # --- Spanner Client Initialization ---
-db = None
-spanner_client = None
-try:
-    if PROJECT_ID:
-        spanner_client = spanner.Client(project=PROJECT_ID)
-        instance = spanner_client.instance(INSTANCE_ID)
-        database = instance.database(DATABASE_ID)
-        print(f"Attempting to connect to Spanner: {instance.name}/databases/{database.name}")
-
-        if not database.exists():
-             print(f"Error: Database '{database.name}' does not exist in instance '{instance.name}'.")
-             db = None
-        else:
-            print("Spanner database connection check successful.")
-            db = database
-    else:
-        print("Skipping Spanner client initialization due to missing GOOGLE_CLOUD_PROJECT.")
-
-except exceptions.NotFound:
-    print(f"Error: Spanner instance '{INSTANCE_ID}' not found in project '{PROJECT_ID}'.")
-    db = None
-except Exception as e:
-    print(f"An unexpected error occurred during Spanner initialization: {e}")
-    db = None
+# Shares the pooled database handle with the web app (see spanner_data).
+db = get_database()
 
 # --- Utility Function (Graph Query Specific) ---
 
@@ -51,7 +23,8 @@ def run_graph_query(db_instance, graph_sql, params=None, param_types=None, expec
 
     Args:
         db_instance: The Spanner database object.
-        graph_sql (str): The GQL query string (starting with 'Graph ...').
+        graph_sql (str or Query): The GQL query string (starting with 'Graph ...'),
+                                  or a Query that carries its param_types and fields.
         params (dict, optional): Dictionary of query parameters.
         param_types (dict, optional): Dictionary mapping param names to Spanner types.
         expected_fields (list[str], optional): Expected column names in order.
@@ -63,31 +36,23 @@ def run_graph_query(db_instance, graph_sql, params=None, param_types=None, expec
         print("Error: Database connection is not available.")
         return None
 
-    results_list = []
+    if isinstance(graph_sql, Query):
+        query = graph_sql
+        expected_fields = query.fields
+    else:
+        query = Query(sql=graph_sql, fields=tuple(expected_fields or ()), param_types=param_types or {})
+
+    if not expected_fields:
+        print("Error: expected_fields must be provided to run_graph_query.")
+        return None
+
     print(f"--- Executing Graph Query ---")
     # print(f"GQL: {graph_sql}") # Uncomment for verbose query logging
 
     try:
-        with db_instance.snapshot() as snapshot:
-            # execute_sql handles both SQL and Graph Queries
-            results = snapshot.execute_sql(
-                graph_sql,
-                params=params,
-                param_types=param_types
-            )
-
-            field_names = expected_fields
-            if not field_names:
-                 print("Error: expected_fields must be provided to run_graph_query.")
-                 return None
-
-            for row in results:
-                if len(field_names) != len(row):
-                     print(f"Warning: Mismatch between field names ({len(field_names)}) and row values ({len(row)}). Skipping row: {row}")
-                     continue
-                results_list.append(dict(zip(field_names, row)))
-
-            # print(f"Graph Query successful, fetched {len(results_list)} rows.") # Uncomment for verbose success logging
+        # execute_sql handles both SQL and Graph Queries
+        results_list = fetch_all(db_instance, query, params=params)
+        # print(f"Graph Query successful, fetched {len(results_list)} rows.") # Uncomment for verbose success logging
 
     except (exceptions.NotFound, exceptions.PermissionDenied, exceptions.InvalidArgument) as spanner_err:
         # InvalidArgument might occur if graph syntax is wrong or graph doesn't exist
@@ -101,6 +66,68 @@ def run_graph_query(db_instance, graph_sql, params=None, param_types=None, expec
     return results_list
 
 
+# --- Graph Queries ---
+# Not registered: the web app does not import this module, so its startup
+# warm-up (app.warm_up_queries) would never see them anyway.
+
+# Find Person node, follow 'Attended' edge to Event node
+PERSON_ATTENDED_EVENTS_GRAPH_QUERY = Query(
+    name="graph_person_attended_events",
+    sql="""
+        Graph SocialGraph
+        MATCH (p:Person)-[att:Attended]->(e:Event)
+        WHERE p.person_id = @person_id
+        RETURN e.event_id, e.name, e.event_date, att.attendance_time
+        ORDER BY e.event_date DESC
+    """,
+    fields=("event_id", "name", "event_date", "attendance_time"), # Must match RETURN
+    param_types={"person_id": param_types.STRING},
+)
+
+# Find Person nodes that 'Wrote' a Post node
+ALL_POSTS_GRAPH_QUERY = Query(
+    name="graph_all_posts",
+    sql="""
+        Graph SocialGraph
+        MATCH (author:Person)-[w:Wrote]->(post:Post)
+        RETURN post.post_id, post.author_id, post.text, post.sentiment, post.post_timestamp, author.name AS author_name
+        ORDER BY post.post_timestamp DESC
+        LIMIT @limit
+    """,
+    fields=("post_id", "author_id", "text", "sentiment", "post_timestamp", "author_name"), # Must match RETURN
+    param_types={"limit": param_types.INT64},
+)
+
+# Friendship edges backed by the Friendship table are stored once per pair, so
+# they are matched undirected. When the deployed graph backs them with
+# FriendAdjacency (see friend_adjacency.py) every pair is stored in both
+# directions, and a directed match is a single local seek. The variant is picked
+# from the graph definition, not from this process's configuration.
+PERSON_FRIENDS_GRAPH_QUERY = Query(
+    name="graph_person_friends",
+    sql="""
+        Graph SocialGraph
+        MATCH (p:Person {person_id: @person_id})-[f:Friendship]-(friend:Person)
+        RETURN DISTINCT friend.person_id, friend.name
+        ORDER BY friend.name
+    """,
+    fields=("person_id", "name"), # Must match RETURN
+    param_types={"person_id": param_types.STRING},
+)
+
+PERSON_FRIENDS_DIRECTED_GRAPH_QUERY = Query(
+    name="graph_person_friends_directed",
+    sql="""
+        Graph SocialGraph
+        MATCH (p:Person {person_id: @person_id})-[f:Friendship]->(friend:Person)
+        RETURN friend.person_id, friend.name
+        ORDER BY friend.name
+    """,
+    fields=("person_id", "name"), # Must match RETURN
+    param_types={"person_id": param_types.STRING},
+)
+
+
 # --- Data Fetching Functions using Graph Queries ---
 
 def get_person_attended_events_json(db_instance, person_id):
@@ -117,19 +144,7 @@ def get_person_attended_events_json(db_instance, person_id):
     """
     if not db_instance: return None
 
-    # Graph Query: Find Person node, follow 'Attended' edge to Event node
-    graph_sql = """
-        Graph SocialGraph
-        MATCH (p:Person)-[att:Attended]->(e:Event)
-        WHERE p.person_id = @person_id
-        RETURN e.event_id, e.name, e.event_date, att.attendance_time
-        ORDER BY e.event_date DESC
-    """
-    params = {"person_id": person_id}
-    param_types_map = {"person_id": param_types.STRING}
-    fields = ["event_id", "name", "event_date", "attendance_time"] # Must match RETURN
-
-    results = run_graph_query(db_instance, graph_sql, params=params, param_types=param_types_map, expected_fields=fields)
+    results = run_graph_query(db_instance, PERSON_ATTENDED_EVENTS_GRAPH_QUERY, params={"person_id": person_id})
 
     if results is None:
         return None
@@ -158,19 +173,7 @@ def get_all_posts_json(db_instance, limit=100):
     """
     if not db_instance: return None
 
-    # Graph Query: Find Person nodes that 'Wrote' a Post node
-    graph_sql = """
-        Graph SocialGraph
-        MATCH (author:Person)-[w:Wrote]->(post:Post)
-        RETURN post.post_id, post.author_id, post.text, post.sentiment, post.post_timestamp, author.name AS author_name
-        ORDER BY post.post_timestamp DESC
-        LIMIT @limit
-    """
-    params = {"limit": limit}
-    param_types_map = {"limit": param_types.INT64}
-    fields = ["post_id", "author_id", "text", "sentiment", "post_timestamp", "author_name"] # Must match RETURN
-
-    results = run_graph_query(db_instance, graph_sql, params=params, param_types=param_types_map, expected_fields=fields)
+    results = run_graph_query(db_instance, ALL_POSTS_GRAPH_QUERY, params={"limit": limit})
 
     if results is None:
         return None
@@ -197,19 +200,8 @@ def get_person_friends_json(db_instance, person_id):
     """
     if not db_instance: return None
 
-    # Graph Query: Use undirected match for Friendship edge
-    # Assumes the graph engine correctly interprets the underlying Friendship table structure
-    graph_sql = """
-        Graph SocialGraph
-        MATCH (p:Person {person_id: @person_id})-[f:Friendship]-(friend:Person)
-        RETURN DISTINCT friend.person_id, friend.name
-        ORDER BY friend.name
-    """
-    params = {"person_id": person_id}
-    param_types_map = {"person_id": param_types.STRING}
-    fields = ["person_id", "name"] # Must match RETURN
-
-    results = run_graph_query(db_instance, graph_sql, params=params, param_types=param_types_map, expected_fields=fields)
+    query = PERSON_FRIENDS_DIRECTED_GRAPH_QUERY if is_symmetric_edge(db_instance, "Friendship") else PERSON_FRIENDS_GRAPH_QUERY
+    results = run_graph_query(db_instance, query, params={"person_id": person_id})
 
     # No date conversion needed here
     return results
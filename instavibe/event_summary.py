@@ -0,0 +1,98 @@
+# event_summary.py
+#
+# EventSummary is a denormalized read model of Event, Attendance and Person for
+# the events sidebar: one row per event with its attendee count and the first
+# EVENT_SUMMARY_ATTENDEES attendees by name. The web app writes an event's
+# summary in the same commit as the event; setup.py backfills existing events.
+
+from itertools import groupby
+
+from google.cloud import spanner
+from google.cloud.spanner_v1 import param_types
+
+# Attendees stored per summary row; the sidebar shows these plus "and N more".
+EVENT_SUMMARY_ATTENDEES = 10
+
+EVENT_SUMMARY_COLUMNS = ["event_id", "name", "event_date", "attendee_count", "attendee_ids", "attendee_names", "update_time"]
+
+# The next @limit events after @after_event_id with their attendees, one row
+# per (event, attendee), grouped by event. Paging on the primary key keeps
+# every read a bounded range, however many events there are.
+_BACKFILL_PAGE_SQL = """
+    SELECT e.event_id, e.name, e.event_date, p.person_id, p.name AS person_name
+    FROM (
+        SELECT event_id, name, event_date
+        FROM Event
+        WHERE event_id > @after_event_id
+        ORDER BY event_id
+        LIMIT @limit
+    ) AS e
+    LEFT JOIN Attendance@{FORCE_INDEX=AttendanceByEvent} AS a ON e.event_id = a.event_id
+    LEFT JOIN Person AS p ON a.person_id = p.person_id
+    ORDER BY e.event_id
+"""
+_BACKFILL_PAGE_TYPES = {"after_event_id": param_types.STRING, "limit": param_types.INT64}
+
+
+def event_summary_row(event_id, name, event_date, attendees):
+    """
+    Builds the EventSummary row of one event.
+
+    Args:
+        event_id (str): The event's ID.
+        name (str): The event's name.
+        event_date (datetime): When the event takes place.
+        attendees (list[tuple[str, str]]): (person_id, name) of every attendee.
+
+    Returns:
+        tuple: The row values in EVENT_SUMMARY_COLUMNS order.
+    """
+    shown = sorted(attendees, key=lambda attendee: (attendee[1] or "", attendee[0]))[:EVENT_SUMMARY_ATTENDEES]
+    return (
+        event_id, name, event_date, len(attendees),
+        [person_id for person_id, _ in shown],
+        [person_name for _, person_name in shown],
+        spanner.COMMIT_TIMESTAMP,
+    )
+
+
+def backfill_event_summaries(database, chunk_size=500):
+    """
+    Rebuilds the EventSummary row of every event from the base tables.
+
+    Events are read one page of `chunk_size` at a time, in primary key order,
+    and each page is written before the next is read, so memory use does not
+    grow with the table. Rows are written with insert_or_update, so the
+    backfill can be re-run at any time to repair the read model.
+
+    Args:
+        database: A Spanner database.
+        chunk_size (int): Events per read and summary rows per commit.
+
+    Returns:
+        int: The number of summary rows written.
+    """
+    written = 0
+    after_event_id = ""
+    while True:
+        with database.snapshot() as snapshot:
+            rows = list(snapshot.execute_sql(
+                _BACKFILL_PAGE_SQL,
+                params={"after_event_id": after_event_id, "limit": chunk_size},
+                param_types=_BACKFILL_PAGE_TYPES,
+            ))
+        if not rows:
+            break
+
+        summaries = []
+        for (event_id, name, event_date), event_rows in groupby(rows, key=lambda row: tuple(row[:3])):
+            attendees = [(row[3], row[4]) for row in event_rows if row[3] is not None]
+            summaries.append(event_summary_row(event_id, name, event_date, attendees))
+        with database.batch() as batch:
+            batch.insert_or_update(table="EventSummary", columns=EVENT_SUMMARY_COLUMNS, values=summaries)
+        written += len(summaries)
+
+        after_event_id = summaries[-1][0]
+        if len(summaries) < chunk_size:
+            break
+    return written
@@ -0,0 +1,43 @@
+# feed_cursor.py
+#
+# The opaque cursor of the home feed's keyset pagination (see the feed queries
+# in app.py): '<post_timestamp>,<post_id>' of the last post already shown. The
+# feed is ordered by post_timestamp DESC, then post_id, and only lists posts
+# that have a post_timestamp, so every post on a page has a valid cursor.
+
+from datetime import datetime, timezone
+
+
+def encode_feed_cursor(post):
+    """
+    Builds the cursor that resumes the feed after `post`.
+
+    Raises:
+        ValueError: If the post has no post_timestamp; it cannot be in the feed.
+    """
+    post_timestamp = post['post_timestamp']
+    if post_timestamp is None:
+        raise ValueError(f"Post {post['post_id']} has no post_timestamp.")
+    if isinstance(post_timestamp, datetime):
+        post_timestamp = post_timestamp.isoformat()
+    return f"{post_timestamp},{post['post_id']}"
+
+
+def decode_feed_cursor(cursor):
+    """
+    Parses a feed cursor produced by encode_feed_cursor.
+
+    Returns:
+        tuple[datetime, str]: The timestamp and post_id of the last post seen.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    timestamp_str, sep, post_id = cursor.rpartition(",")
+    if not sep or not timestamp_str or not post_id:
+        raise ValueError("Cursor must look like '<post_timestamp>,<post_id>'.")
+    # A literal '+' in an unencoded query string arrives as a space.
+    after_timestamp = datetime.fromisoformat(timestamp_str.strip().replace(' ', '+').replace('Z', '+00:00'))
+    if after_timestamp.tzinfo is None:
+        after_timestamp = after_timestamp.replace(tzinfo=timezone.utc)
+    return after_timestamp, post_id
@@ -0,0 +1,113 @@
+# friend_adjacency.py
+#
+# Friendship stores each friendship once, as (person_id_a, person_id_b) with
+# person_id_a < person_id_b, so finding someone's friends means looking in
+# both directions. With FRIEND_ADJACENCY enabled, every friendship is also
+# written twice to FriendAdjacency, once from each side, as child rows
+# interleaved in Person: a person's friends are then one contiguous range of
+# their own row's children, and each hop of a multi-hop traversal is a local
+# seek. The SocialGraph Friendship edge is defined over this table.
+#
+# Writers build their rows with `friendship_table_rows`, so both tables change
+# in the same commit; `backfill_friend_adjacency` covers existing friendships.
+#
+# Readers never look at FRIEND_ADJACENCY: they follow the deployed graph
+# definition (see spanner_data/graph.py), which only setup.py changes.
+# Switching the flag means re-running setup.py with the new value:
+#
+#   - On: setup.py fills FriendAdjacency from Friendship, then points the
+#     Friendship edge at it.
+#   - Off: the edge goes back to Friendship and writers stop maintaining
+#     FriendAdjacency. Its rows are left in place but go stale, and nothing
+#     reads them. Turning the flag on again rebuilds the table from
+#     Friendship before the graph uses it.
+#
+# Running processes pick up the new edge within SPANNER_GRAPH_DEFINITION_TTL
+# seconds. Writers read the flag at startup, so restart them with the new value.
+
+import os
+
+from google.cloud import spanner
+from google.cloud.spanner_v1 import param_types
+
+FRIEND_ADJACENCY = os.environ.get("FRIEND_ADJACENCY", "false").lower() in ("1", "true", "yes")
+
+FRIENDSHIP_COLUMNS = ["person_id_a", "person_id_b", "friendship_time"]
+FRIEND_ADJACENCY_COLUMNS = ["person_id", "friend_id", "friendship_time"]
+
+# The next @limit friendships after (@after_a, @after_b) in primary key order.
+# The leading bound on person_id_a alone keeps it a range seek; the OR only
+# breaks ties within one person_id_a.
+_BACKFILL_PAGE_SQL = """
+    SELECT person_id_a, person_id_b, friendship_time
+    FROM Friendship
+    WHERE person_id_a >= @after_a AND (person_id_a > @after_a OR person_id_b > @after_b)
+    ORDER BY person_id_a, person_id_b
+    LIMIT @limit
+"""
+_BACKFILL_PAGE_TYPES = {"after_a": param_types.STRING, "after_b": param_types.STRING, "limit": param_types.INT64}
+
+
+def friendship_table_rows(person_id_1, person_id_2, friendship_time=spanner.COMMIT_TIMESTAMP):
+    """
+    Rows for one friendship, in either argument order.
+
+    Returns:
+        list[tuple[str, list[str], list[tuple]]]: (table, columns, rows) triples:
+        the Friendship row and, with FRIEND_ADJACENCY enabled, both
+        FriendAdjacency rows.
+    """
+    person_id_a, person_id_b = sorted((person_id_1, person_id_2))
+    table_rows = [("Friendship", FRIENDSHIP_COLUMNS, [(person_id_a, person_id_b, friendship_time)])]
+    if FRIEND_ADJACENCY:
+        table_rows.append(("FriendAdjacency", FRIEND_ADJACENCY_COLUMNS, [
+            (person_id_a, person_id_b, friendship_time),
+            (person_id_b, person_id_a, friendship_time),
+        ]))
+    return table_rows
+
+
+def backfill_friend_adjacency(database, chunk_size=1000, replace=False):
+    """
+    Writes both FriendAdjacency rows of every existing friendship.
+
+    Rows are written with insert_or_update, so the backfill can be re-run at
+    any time to repair the table.
+
+    Args:
+        database: A Spanner database.
+        chunk_size (int): Friendships per read and commit.
+        replace (bool): First delete every FriendAdjacency row, including rows
+            of friendships that no longer exist. Only safe while the graph
+            does not read the table.
+
+    Returns:
+        int: The number of friendships copied.
+    """
+    if replace:
+        database.execute_partitioned_dml("DELETE FROM FriendAdjacency WHERE true")
+
+    copied = 0
+    after_a = after_b = ""
+    while True:
+        # One page in memory at a time, written before the next is read
+        with database.snapshot() as snapshot:
+            friendships = list(snapshot.execute_sql(
+                _BACKFILL_PAGE_SQL,
+                params={"after_a": after_a, "after_b": after_b, "limit": chunk_size},
+                param_types=_BACKFILL_PAGE_TYPES,
+            ))
+        if not friendships:
+            break
+        rows = []
+        for person_id_a, person_id_b, friendship_time in friendships:
+            rows.append((person_id_a, person_id_b, friendship_time))
+            rows.append((person_id_b, person_id_a, friendship_time))
+        with database.batch() as batch:
+            batch.insert_or_update(table="FriendAdjacency", columns=FRIEND_ADJACENCY_COLUMNS, values=rows)
+        copied += len(friendships)
+
+        after_a, after_b = friendships[-1][0], friendships[-1][1]
+        if len(friendships) < chunk_size:
+            break
+    return copied
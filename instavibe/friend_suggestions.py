@@ -0,0 +1,261 @@
+# friend_suggestions.py
+#
+# Materializes friend-of-friend suggestions into the FriendSuggestion table:
+# for every person, the people two hops away in the friendship graph, with
+# the number of mutual friends and of events both attended. Serving a
+# person's suggestions is then one read of an index interleaved in Person
+# (see get_friend_suggestions in agents/social/instavibe.py).
+#
+# People are processed in chunks, and a chunk only reads the rows it needs:
+# its people's friends and friends of friends, then the names and attendance
+# of those people and their candidates, all by key. Memory and the size of
+# every read grow with the chunk, not with the database.
+#
+# Run it periodically, e.g. as a scheduled job:
+#
+#   python friend_suggestions.py             # recompute once
+#   python friend_suggestions.py --every 900 # recompute every 15 minutes
+
+import argparse
+import heapq
+import logging
+import time
+from collections import Counter, defaultdict
+
+from google.cloud import spanner
+from google.cloud.spanner_v1 import param_types
+
+from spanner_data import Query
+from spanner_data.query import execute
+from spanner_data.graph import is_symmetric_edge
+
+log = logging.getLogger(__name__)
+
+# Suggestions kept per person.
+MAX_SUGGESTIONS_PER_PERSON = 20
+# A shared event counts for this fraction of a mutual friend in the score.
+SHARED_EVENT_WEIGHT = 0.5
+
+FRIEND_SUGGESTION_COLUMNS = ["person_id", "candidate_id", "candidate_name", "mutual_friends", "shared_events", "score", "computed_time"]
+
+_PERSON_IDS = {"person_ids": param_types.Array(param_types.STRING)}
+
+# The next chunk of people, in primary key order.
+PEOPLE_CHUNK_QUERY = Query(
+    name="suggestions_people_chunk",
+    sql="""
+        SELECT person_id, name
+        FROM Person
+        WHERE person_id > @after
+        ORDER BY person_id
+        LIMIT @limit
+    """,
+    fields=("person_id", "name"),
+    param_types={"after": param_types.STRING, "limit": param_types.INT64},
+)
+
+# Friendship stores each pair once: the people's own rows are a primary key
+# seek, the rows naming them second a FriendshipByPersonB seek.
+FRIEND_PAIRS_QUERY = Query(
+    name="suggestions_friend_pairs",
+    sql="""
+        SELECT person_id_a AS person_id, person_id_b AS friend_id
+        FROM Friendship
+        WHERE person_id_a IN UNNEST(@person_ids)
+        UNION ALL
+        SELECT person_id_b AS person_id, person_id_a AS friend_id
+        FROM Friendship@{FORCE_INDEX=FriendshipByPersonB}
+        WHERE person_id_b IN UNNEST(@person_ids)
+    """,
+    fields=("person_id", "friend_id"),
+    param_types=_PERSON_IDS,
+)
+
+# FriendAdjacency stores both directions under each person (see friend_adjacency.py).
+ADJACENCY_FRIEND_PAIRS_QUERY = Query(
+    name="suggestions_adjacency_friend_pairs",
+    sql="""
+        SELECT person_id, friend_id
+        FROM FriendAdjacency
+        WHERE person_id IN UNNEST(@person_ids)
+    """,
+    fields=("person_id", "friend_id"),
+    param_types=_PERSON_IDS,
+)
+
+ATTENDANCE_QUERY = Query(
+    name="suggestions_attendance",
+    sql="""
+        SELECT person_id, event_id
+        FROM Attendance
+        WHERE person_id IN UNNEST(@person_ids)
+    """,
+    fields=("person_id", "event_id"),
+    param_types=_PERSON_IDS,
+)
+
+PERSON_NAMES_QUERY = Query(
+    name="suggestions_person_names",
+    sql="""
+        SELECT person_id, name
+        FROM Person
+        WHERE person_id IN UNNEST(@person_ids)
+    """,
+    fields=("person_id", "name"),
+    param_types=_PERSON_IDS,
+)
+
+
+def rank_friend_suggestions(friendships, attendance, max_per_person=MAX_SUGGESTIONS_PER_PERSON, person_ids=None):
+    """
+    Ranks the 2-hop candidates of every person.
+
+    Args:
+        friendships (Iterable[tuple[str, str]]): Friend pairs, in either or
+            both directions. Must hold every friendship of the ranked people
+            and of their friends.
+        attendance (Iterable[tuple[str, str]]): (person_id, event_id) pairs.
+        max_per_person (int): Suggestions kept per person.
+        person_ids (Iterable[str], optional): Only rank these people
+            (default: everyone in `friendships`).
+
+    Yields:
+        tuple[str, list[tuple[float, str, int, int]]]: A person and their best
+        (score, candidate_id, mutual_friends, shared_events), best first.
+    """
+    friends = defaultdict(set)
+    for person_id_a, person_id_b in friendships:
+        friends[person_id_a].add(person_id_b)
+        friends[person_id_b].add(person_id_a)
+    events = defaultdict(set)
+    for person_id, event_id in attendance:
+        events[person_id].add(event_id)
+
+    for person_id in list(friends) if person_ids is None else person_ids:
+        direct = friends.get(person_id, set())
+        mutual = Counter()
+        for friend_id in direct:
+            for candidate_id in friends.get(friend_id, ()):
+                if candidate_id != person_id and candidate_id not in direct:
+                    mutual[candidate_id] += 1
+
+        own_events = events.get(person_id, set())
+        scored = []
+        for candidate_id, mutual_friends in mutual.items():
+            shared_events = len(own_events & events.get(candidate_id, set())) if own_events else 0
+            scored.append((mutual_friends + SHARED_EVENT_WEIGHT * shared_events, candidate_id, mutual_friends, shared_events))
+        yield person_id, heapq.nlargest(max_per_person, scored)
+
+
+def _friend_pairs(snapshot, pairs_query, person_ids):
+    """(person_id, friend_id) pairs for every friendship of `person_ids`."""
+    if not person_ids:
+        return []
+    return [(row["person_id"], row["friend_id"]) for row in execute(snapshot, pairs_query, {"person_ids": list(person_ids)})]
+
+
+def _read_chunk(snapshot, pairs_query, chunk_ids, max_per_person):
+    """
+    Ranks the candidates of one chunk of people from keyed reads.
+
+    Returns:
+        tuple[dict, dict]: {person_id: ranked suggestions} for the chunk, and
+        {person_id: name} for their candidates.
+    """
+    friendships = _friend_pairs(snapshot, pairs_query, chunk_ids)
+    friend_ids = {friend_id for _, friend_id in friendships}
+    friendships += _friend_pairs(snapshot, pairs_query, friend_ids)
+
+    chunk = set(chunk_ids)
+    candidate_ids = {
+        candidate_id for person_id, candidate_id in friendships
+        if person_id in friend_ids and candidate_id not in chunk
+    }
+    # Only people who may be ranked need their events: the chunk and its candidates
+    wanted = list(chunk | candidate_ids)
+    attendance = [(row["person_id"], row["event_id"]) for row in execute(snapshot, ATTENDANCE_QUERY, {"person_ids": wanted})]
+
+    suggestions = dict(rank_friend_suggestions(friendships, attendance, max_per_person, person_ids=chunk_ids))
+    ranked_ids = list({candidate_id for ranked in suggestions.values() for _, candidate_id, _, _ in ranked})
+    names = {}
+    if ranked_ids:
+        names = {row["person_id"]: row["name"] for row in execute(snapshot, PERSON_NAMES_QUERY, {"person_ids": ranked_ids})}
+    return suggestions, names
+
+
+def refresh_friend_suggestions(database, chunk_size=100, max_per_person=MAX_SUGGESTIONS_PER_PERSON):
+    """
+    Recomputes every person's FriendSuggestion rows, one chunk of people at a time.
+
+    Each chunk is read from one snapshot. Its people's old rows are deleted
+    and the new ones inserted in the same commit, so readers see either the
+    previous or the new suggestions.
+
+    Args:
+        database: A Spanner database.
+        chunk_size (int): People per read and commit.
+        max_per_person (int): Suggestions kept per person.
+
+    Returns:
+        int: The number of suggestion rows written.
+    """
+    # Same storage the SocialGraph's Friendship edges are defined on
+    pairs_query = ADJACENCY_FRIEND_PAIRS_QUERY if is_symmetric_edge(database, "Friendship") else FRIEND_PAIRS_QUERY
+    written = 0
+    after = ""
+    while True:
+        with database.snapshot(multi_use=True) as snapshot:
+            people = list(execute(snapshot, PEOPLE_CHUNK_QUERY, {"after": after, "limit": chunk_size}))
+            if not people:
+                break
+            chunk_ids = [person["person_id"] for person in people]
+            suggestions, names = _read_chunk(snapshot, pairs_query, chunk_ids, max_per_person)
+
+        rows = [
+            (person_id, candidate_id, names.get(candidate_id), mutual_friends, shared_events, score, spanner.COMMIT_TIMESTAMP)
+            for person_id in chunk_ids
+            for score, candidate_id, mutual_friends, shared_events in suggestions.get(person_id, [])
+        ]
+        # Every person in the chunk is cleared, including people who no longer have candidates
+        stale = spanner.KeySet(ranges=[spanner.KeyRange(start_closed=[person_id], end_closed=[person_id]) for person_id in chunk_ids])
+        with database.batch() as batch:
+            batch.delete("FriendSuggestion", stale)
+            if rows:
+                batch.insert(table="FriendSuggestion", columns=FRIEND_SUGGESTION_COLUMNS, values=rows)
+        written += len(rows)
+        after = chunk_ids[-1]
+        if len(people) < chunk_size:
+            break
+    return written
+
+
+def main():
+    from logging_setup import configure_logging
+    from spanner_data import get_database
+
+    parser = argparse.ArgumentParser(description="Recompute the FriendSuggestion table.")
+    parser.add_argument("--every", type=float, default=0, help="Repeat every this many seconds (default: run once)")
+    args = parser.parse_args()
+
+    configure_logging(default_format="text")
+    database = get_database()
+    if database is None:
+        log.critical("Spanner database connection not established. Aborting.")
+        raise SystemExit(1)
+
+    while True:
+        started = time.monotonic()
+        try:
+            written = refresh_friend_suggestions(database)
+            log.info("Wrote %d friend suggestions in %.1fs.", written, time.monotonic() - started)
+        except Exception as e:
+            log.exception("Error refreshing friend suggestions: %s", e)
+            if not args.every:
+                raise SystemExit(1)
+        if not args.every:
+            break
+        time.sleep(max(args.every - (time.monotonic() - started), 0))
+
+
+if __name__ == "__main__":
+    main()
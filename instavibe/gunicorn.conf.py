@@ -0,0 +1,69 @@
+# gunicorn.conf.py
+#
+# Production server for the Instavibe web app (used by the Dockerfile):
+#
+#   gunicorn -c gunicorn.conf.py
+#
+# SERVER_MODE=wsgi (default) serves the Flask app with threaded workers;
+# SERVER_MODE=asgi serves asgi:app (async SSE streams) with uvicorn workers.
+
+import os
+
+SERVER_MODE = os.environ.get("SERVER_MODE", "wsgi").lower()
+
+# --- Binding ---
+# Cloud Run provides PORT; APP_HOST/APP_PORT match the dev server settings.
+bind = f"{os.environ.get('APP_HOST', '0.0.0.0')}:{os.environ.get('PORT', os.environ.get('APP_PORT', '8080'))}"
+
+# --- Workers ---
+# Requests mostly wait on Spanner and the agents, so concurrency comes from
+# threads; processes only need to cover the CPU work (templates, JSON).
+# Each worker has its own session pool: keep GUNICORN_THREADS at or below
+# SPANNER_POOL_SIZE so a request never waits for a pooled session.
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+if SERVER_MODE == "asgi":
+    wsgi_app = "asgi:app"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "app:app"
+    worker_class = "gthread"
+    threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+
+# --- Preloading ---
+# Import the app and compile its templates once in the master. The master
+# never opens Spanner: gRPC channels, pooled sessions and the pool's keepalive
+# thread do not survive a fork, so each worker connects in post_fork.
+preload_app = True
+os.environ["SPANNER_DEFER_CONNECT"] = "true"
+
+# --- Timeouts & Shutdown ---
+# gthread workers heartbeat from their main loop, so a long SSE stream does not
+# trip `timeout`. On SIGTERM (or recycling), workers stop accepting and get
+# `graceful_timeout` seconds to finish in-flight requests, including streams.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "60"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+
+# --- Worker Recycling ---
+# Restart workers after a jittered number of requests to bound memory growth
+# (caches, fragmented heaps) without restarting all of them at once.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+# --- Logging ---
+# The app logs through logging_setup; gunicorn's access log is off by default.
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.environ.get("LOG_LEVEL", "info").lower()
+
+
+def when_ready(server):
+    """Runs in the master once the preloaded app is imported, before workers fork."""
+    import app
+    app.preload_templates()
+
+
+def post_fork(server, worker):
+    """Opens this worker's own Spanner client, channel and session pool."""
+    import app
+    app.connect_database()
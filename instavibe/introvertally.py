@@ -1,11 +1,13 @@
 from vertexai import agent_engines
 from dotenv import load_dotenv
-import pprint
 import json 
+import logging
 import os
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 #REPLACE ME initiate agent_engine
 
 
@@ -52,8 +54,7 @@ def call_agent_for_plan(user_name, planned_date, location_n_perference, selected
     }}
     """
 
-    print(f"--- Sending Prompt to Agent ---") 
-    print(prompt_message) 
+    log.debug("Sending prompt to agent: %s", prompt_message)
     yield {"type": "thought", "data": f"Sending detailed planning prompt to agent for {user_name}'s event."}
 
     accumulated_json_str = ""
@@ -63,8 +64,7 @@ def call_agent_for_plan(user_name, planned_date, location_n_perference, selected
         for event_idx, event in enumerate(
             #REPLACE ME Query remote agent get plan
         ):
-            print(f"\n--- Event {event_idx} Received ---") # Console
-            pprint.pprint(event) # Console
+            log.debug("Agent event %d received: %s", event_idx, event)
             try:
                 content = event.get('content', {})
                 parts = content.get('parts', [])
@@ -96,13 +96,13 @@ def call_agent_for_plan(user_name, planned_date, location_n_perference, selected
 
     # Attempt to extract JSON if it's wrapped in markdown
     if "```json" in accumulated_json_str:
-        print("Detected JSON in markdown code block. Extracting...") 
+        log.debug("Detected JSON in markdown code block. Extracting...")
        
         try:
             # Extract content between ```json and ```
             json_block = accumulated_json_str.split("```json", 1)[1].rsplit("```", 1)[0].strip()
             accumulated_json_str = json_block
-            print(f"Extracted JSON block: {accumulated_json_str}") 
+            log.debug("Extracted JSON block: %s", accumulated_json_str)
         except IndexError:
             # print("Error extracting JSON from markdown block. Will try to parse as is.") # Console
             yield {"type": "thought", "data": "Could not extract JSON from markdown block, will attempt to parse the full response."}
@@ -185,7 +185,7 @@ def post_plan_event(user_name, confirmed_plan, edited_invite_message, agent_sess
     """
 
     yield {"type": "thought", "data": f"Sending posting instructions to agent for {user_name}'s event."}
-    print(f"prompt_message: {prompt_message}") 
+    log.debug("Sending posting prompt to agent: %s", prompt_message)
     
     accumulated_response_text = ""
 
@@ -193,8 +193,7 @@ def post_plan_event(user_name, confirmed_plan, edited_invite_message, agent_sess
         for event_idx, event in enumerate(
             #REPLACE ME Query remote agent for confirmation
         ):
-            print(f"\n--- Post Event - Agent Event {event_idx} Received ---") # Console
-            pprint.pprint(event) # Console
+            log.debug("Post event - agent event %d received: %s", event_idx, event)
             try:
                 content = event.get('content', {})
                 parts = content.get('parts', [])
@@ -0,0 +1,119 @@
+# loadtest.py
+#
+# Closed-loop HTTP load test for comparing serving modes, e.g. the dev server
+# against gunicorn:
+#
+#   python app.py                                   # dev server on :8080
+#   gunicorn -c gunicorn.conf.py --bind :8081       # production server on :8081
+#   python loadtest.py http://localhost:8080 http://localhost:8081 -c 32 -d 30
+#
+# Each target is hit by the same number of concurrent clients for the same
+# duration; the script prints throughput and latency percentiles per target.
+
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ["/", "/api/feed?limit=20", "/api/feed?limit=50"]
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def _client_loop(target, paths, deadline, latencies, errors, lock):
+    """One simulated client: requests `paths` round-robin over a keep-alive connection."""
+    parts = urlsplit(target)
+    connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    connection = connection_class(parts.netloc, timeout=30)
+    local_latencies = []
+    local_errors = 0
+    i = 0
+    while time.monotonic() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 500:
+                local_errors += 1
+            else:
+                local_latencies.append(time.perf_counter() - started)
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            connection.close()
+            connection = connection_class(parts.netloc, timeout=30)
+    connection.close()
+    with lock:
+        latencies.extend(local_latencies)
+        errors[0] += local_errors
+
+
+def run(target, paths, concurrency, duration):
+    """
+    Runs `concurrency` clients against `target` for `duration` seconds.
+
+    Returns:
+        dict: Requests, errors, throughput (req/s) and latency percentiles (ms).
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    started = time.monotonic()
+    clients = [
+        threading.Thread(target=_client_loop, args=(target, paths, deadline, latencies, errors, lock), daemon=True)
+        for _ in range(concurrency)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        "target": target,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare throughput and latency of Instavibe servers.")
+    parser.add_argument("targets", nargs="+", help="Base URLs, e.g. http://localhost:8080")
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="Concurrent clients per target")
+    parser.add_argument("-d", "--duration", type=float, default=20, help="Seconds per target")
+    parser.add_argument("-p", "--path", action="append", dest="paths", help="Path to request (repeatable)")
+    parser.add_argument("-w", "--warmup", type=float, default=3, help="Unmeasured warm-up seconds per target")
+    args = parser.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+
+    results = []
+    for target in args.targets:
+        target = target.rstrip("/")
+        if args.warmup > 0:
+            run(target, paths, args.concurrency, args.warmup)
+        results.append(run(target, paths, args.concurrency, args.duration))
+
+    print(f"{'target':<32} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        print(f"{r['target']:<32} {r['requests']:>9} {r['errors']:>7} {r['rps']:>9.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+    if len(results) > 1 and results[0]["rps"]:
+        for r in results[1:]:
+            print(f"{r['target']}: {r['rps'] / results[0]['rps']:.2f}x the throughput of {results[0]['target']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# logging_setup.py
+
+import json
+import logging
+import os
+import random
+import sys
+from datetime import datetime, timezone
+
+# --- Logging Configuration ---
+# LOG_LEVEL gates everything: per-query and per-SSE-event messages are DEBUG,
+# so the default INFO level emits nothing on those hot paths.
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# "json" writes one structured object per line (parsed by Cloud Logging);
+# "text" is easier to read in a local terminal. Unset means the caller's default.
+LOG_FORMAT = os.environ.get("LOG_FORMAT")
+# Keep only a fraction of the sub-WARNING records, per route or per logger,
+# e.g. "route:ally.stream_introvert_ally_plan=0.01,spanner_data=0.1".
+# A sampled-in request keeps all of its records. Warnings and errors are never sampled out.
+LOG_SAMPLING = os.environ.get("LOG_SAMPLING", "")
+
+# Attributes every LogRecord has; anything else was passed via `extra=` and is
+# emitted as a structured field.
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_configured = False
+
+
+def _parse_sampling(spec):
+    """Parses 'key=rate,key=rate' into a dict, ignoring malformed entries."""
+    rates = {}
+    for item in spec.split(","):
+        key, _, rate = item.strip().partition("=")
+        if not key or not rate:
+            continue
+        try:
+            rates[key] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, with `extra=` fields included."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "severity": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Drops a configured fraction of sub-WARNING records.
+
+    Rates are looked up by the Flask endpoint of the current request
+    ('route:<endpoint>') first, then by the longest matching logger-name
+    prefix. Within a request the decision is made once, so a request is
+    either logged completely or not at all.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.route_rates = {k[len("route:"):]: v for k, v in rates.items() if k.startswith("route:")}
+        self.logger_rates = {k: v for k, v in rates.items() if not k.startswith("route:")}
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+
+        if self.route_rates:
+            from flask import g, has_request_context, request
+            if has_request_context() and request.endpoint in self.route_rates:
+                sampled = g.get("_log_sampled")
+                if sampled is None:
+                    sampled = g._log_sampled = random.random() < self.route_rates[request.endpoint]
+                return sampled
+
+        name = record.name
+        while name:
+            rate = self.logger_rates.get(name)
+            if rate is not None:
+                return random.random() < rate
+            name = name.rpartition(".")[0]
+        return True
+
+
+def configure_logging(default_format="json"):
+    """
+    Installs the root handler described by LOG_LEVEL, LOG_FORMAT and LOG_SAMPLING.
+
+    Safe to call more than once; only the first call has an effect.
+
+    Args:
+        default_format (str): "json" or "text", used when LOG_FORMAT is not set.
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    handler = logging.StreamHandler(sys.stdout)
+    if (LOG_FORMAT or default_format).lower() == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+    rates = _parse_sampling(LOG_SAMPLING)
+    if rates:
+        handler.addFilter(SamplingFilter(rates))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
@@ -0,0 +1,367 @@
+# seeder.py
+#
+# Bulk loader for the base tables. Rows are streamed per table, cut into
+# chunks that stay well below Spanner's per-commit mutation limit, and
+# committed with database.batch() from a thread pool. Tables are written in
+# stages so parents and foreign-key targets exist before the rows that
+# reference them (Person/Event/Location before EventLocation, FriendAdjacency
+# and EventSummary). Writes use insert_or_update, so re-running a chunk is
+# harmless; with a checkpoint file, a re-run skips the chunks already
+# committed.
+#
+# setup.py seeds the curated demo data through `seed_tables`. Run directly,
+# this script seeds a deterministic synthetic dataset for load tests into a
+# scratch database created by setup.py:
+#
+#   SPANNER_DATABASE_ID=graphdb-staging python setup.py
+#   SPANNER_DATABASE_ID=graphdb-staging python seeder.py --people 1000000 --checkpoint seed.json
+#
+# Interrupted runs are resumed by repeating the same command.
+
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from google.api_core import exceptions
+from google.cloud import spanner
+
+from event_summary import EVENT_SUMMARY_COLUMNS, event_summary_row
+from friend_adjacency import FRIEND_ADJACENCY, friendship_table_rows
+
+log = logging.getLogger(__name__)
+
+# Spanner rejects commits over 80,000 mutations (columns written, including
+# secondary index entries); chunks aim well below that.
+MUTATIONS_PER_COMMIT = int(os.environ.get("SEED_MUTATIONS_PER_COMMIT", "20000"))
+SEED_WORKERS = int(os.environ.get("SEED_WORKERS", "8"))
+COMMIT_ATTEMPTS = 5
+
+# Tables of a stage may be written in parallel; a stage starts once the previous one is committed.
+SEED_STAGES = (
+    ("Person", "Event", "Location"),
+    ("Post", "Friendship", "FriendAdjacency", "Attendance", "EventLocation", "EventSummary"),
+    ("Mention",),
+)
+
+TABLE_COLUMNS = {
+    "Person": ["person_id", "name", "age", "create_time"],
+    "Event": ["event_id", "name", "description", "event_date", "create_time"],
+    "Location": ["location_id", "name", "description", "latitude", "longitude", "address", "create_time"],
+    "Post": ["post_id", "author_id", "text", "sentiment", "post_timestamp", "create_time"],
+    "Attendance": ["person_id", "event_id", "attendance_time"],
+    "Mention": ["post_id", "mentioned_person_id", "mention_time"],
+    "EventLocation": ["event_id", "location_id", "create_time"],
+    "EventSummary": EVENT_SUMMARY_COLUMNS,
+}
+
+_RETRYABLE = (exceptions.Aborted, exceptions.ServiceUnavailable, exceptions.DeadlineExceeded, exceptions.ResourceExhausted)
+
+
+class SeedCheckpoint:
+    """
+    The chunks committed so far, persisted as JSON after every commit.
+
+    A checkpoint belongs to one run: if the file was written for different
+    `run` parameters it is ignored and overwritten.
+    """
+
+    def __init__(self, path, run):
+        self.path = path
+        self._lock = threading.RLock()
+        self._state = {"run": run, "meta": {}, "done": {}}
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if state.get("run") == run:
+                self._state = state
+                log.info("Resuming from checkpoint %s.", path)
+            else:
+                log.warning("Checkpoint %s was written for a different run; starting over.", path)
+        self._done = {table: set(indexes) for table, indexes in self._state["done"].items()}
+
+    @property
+    def meta(self):
+        """Free-form values that must stay the same across resumed runs."""
+        return self._state["meta"]
+
+    def is_done(self, table, index):
+        return index in self._done.get(table, ())
+
+    def mark_done(self, table, index):
+        with self._lock:
+            self._done.setdefault(table, set()).add(index)
+            self.save()
+
+    def save(self):
+        with self._lock:
+            self._state["done"] = {table: sorted(indexes) for table, indexes in self._done.items()}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._state, f)
+            os.replace(tmp_path, self.path)
+
+
+def rows_per_commit(columns, mutations_per_commit=MUTATIONS_PER_COMMIT):
+    """Rows of a table with `columns` that fit in one commit."""
+    return max(1, mutations_per_commit // len(columns))
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _commit_chunk(database, table, columns, rows):
+    for attempt in range(1, COMMIT_ATTEMPTS + 1):
+        try:
+            with database.batch() as batch:
+                batch.insert_or_update(table=table, columns=columns, values=rows)
+            return
+        except _RETRYABLE as e:
+            if attempt == COMMIT_ATTEMPTS:
+                raise
+            delay = min(2 ** attempt, 30) * random.uniform(0.5, 1.0)
+            log.warning("Commit of %s rows into %s failed (%s); retrying in %.1fs.", len(rows), table, e, delay)
+            time.sleep(delay)
+
+
+def seed_tables(database, tables, workers=SEED_WORKERS, mutations_per_commit=MUTATIONS_PER_COMMIT, checkpoint=None):
+    """
+    Writes rows to several tables in chunked, parallel commits.
+
+    Args:
+        database: A Spanner database.
+        tables (dict[str, tuple[list[str], Iterable[tuple]]]): Table name to
+            (columns, rows); rows may be a generator and are consumed lazily.
+        workers (int): Commits in flight at once.
+        mutations_per_commit (int): Upper bound on the cells written per commit.
+        checkpoint (SeedCheckpoint, optional): Skips chunks committed by an
+            earlier run and records new ones. Rows must then be generated in
+            the same order on every run.
+
+    Returns:
+        dict[str, int]: The number of rows written per table, skipped chunks excluded.
+
+    Raises:
+        Exception: The first failed commit, after the commits in flight finished.
+    """
+    known = {table for stage in SEED_STAGES for table in stage}
+    stages = [[table for table in stage if table in tables] for stage in SEED_STAGES]
+    stages.append([table for table in tables if table not in known])
+
+    written = {table: 0 for table in tables}
+    counts_lock = threading.Lock()
+
+    def _write(table, columns, index, rows):
+        _commit_chunk(database, table, columns, rows)
+        if checkpoint is not None:
+            checkpoint.mark_done(table, index)
+        with counts_lock:
+            written[table] += len(rows)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="seed") as pool:
+        for stage in stages:
+            if not stage:
+                continue
+            started = time.monotonic()
+            pending = set()
+            try:
+                for table in stage:
+                    columns, rows = tables[table]
+                    for index, chunk in enumerate(_chunks(rows, rows_per_commit(columns, mutations_per_commit))):
+                        if checkpoint is not None and checkpoint.is_done(table, index):
+                            continue
+                        # Bound the rows held in memory to a few chunks per worker
+                        while len(pending) >= workers * 2:
+                            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in finished:
+                                future.result()
+                        pending.add(pool.submit(_write, table, columns, index, chunk))
+            finally:
+                finished, _ = wait(pending)
+            for future in finished:
+                future.result()
+            log.info("Seeded %s in %.1fs: %s", ", ".join(stage), time.monotonic() - started,
+                     ", ".join(f"{written[table]} {table}" for table in stage))
+    return written
+
+
+# --- Synthetic data ---
+
+_ID_NAMESPACE = uuid.UUID("0b8f5d2a-3c1e-4f7a-9d26-5e4c8a1b7f30")
+_POST_TEXTS = (
+    "Great day at the park!", "Trying out a new recipe tonight.", "Anyone up for a game night?",
+    "Just finished a fantastic book.", "Traffic was terrible this morning.", "Loving this weather.",
+    "Can't believe how fast this week went.", "Best coffee in town, hands down.",
+)
+_SENTIMENTS = ("positive", "neutral", "negative")
+
+
+def _id(kind, *parts):
+    return str(uuid.uuid5(_ID_NAMESPACE, ":".join((kind,) + tuple(str(part) for part in parts))))
+
+
+class SyntheticDataset:
+    """
+    A deterministic synthetic social graph: the same parameters always yield
+    the same rows in the same order, which is what makes resuming possible.
+    Rows are generated lazily, one table at a time.
+    """
+
+    def __init__(self, people, degree=20, posts_per_person=5, events=None, attendees_per_event=50,
+                 mention_rate=0.2, seed=7, as_of=None):
+        self.people = people
+        self.degree = degree
+        self.posts_per_person = posts_per_person
+        self.events = events if events is not None else max(1, people // 100)
+        self.attendees_per_event = min(attendees_per_event, people)
+        self.mention_rate = mention_rate
+        self.seed = seed
+        self.as_of = as_of or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def _rng(self, *parts):
+        return random.Random(":".join(str(part) for part in (self.seed,) + parts))
+
+    def person_id(self, i):
+        return _id("person", i)
+
+    def person_name(self, i):
+        return f"Seed Person {i}"
+
+    def event_id(self, k):
+        return _id("event", k)
+
+    def _event_date(self, k):
+        return self.as_of - timedelta(hours=k * 24 / max(self.events / 365, 1))
+
+    def _friend_pairs(self, i):
+        # Each person befriends random earlier people, so every pair is produced once
+        rng = self._rng("friends", i)
+        return sorted({rng.randrange(i) for _ in range(min(self.degree // 2, i))})
+
+    def _attendees(self, k):
+        return self._rng("attendees", k).sample(range(self.people), self.attendees_per_event)
+
+    def _posts(self, i):
+        rng = self._rng("posts", i)
+        for n in range(self.posts_per_person):
+            row = (
+                _id("post", i, n), self.person_id(i), rng.choice(_POST_TEXTS), rng.choice(_SENTIMENTS),
+                self.as_of - timedelta(seconds=rng.randrange(365 * 24 * 3600)), spanner.COMMIT_TIMESTAMP,
+            )
+            mentioned = rng.randrange(self.people) if rng.random() < self.mention_rate else None
+            yield row, mentioned
+
+    def _location(self, k):
+        rng = self._rng("location", k)
+        return (_id("location", k), f"Seed Venue {k}", None, rng.uniform(-60, 60), rng.uniform(-180, 180),
+                f"{k} Synthetic St", spanner.COMMIT_TIMESTAMP)
+
+    def _friendship_rows(self, table):
+        for i in range(1, self.people):
+            for j in self._friend_pairs(i):
+                for name, _, rows in friendship_table_rows(self.person_id(i), self.person_id(j)):
+                    if name == table:
+                        yield from rows
+
+    def tables(self):
+        """Table name to (columns, row generator) for `seed_tables`."""
+        tables = {
+            "Person": (TABLE_COLUMNS["Person"], (
+                (self.person_id(i), self.person_name(i), 18 + i % 60, spanner.COMMIT_TIMESTAMP)
+                for i in range(self.people)
+            )),
+            "Event": (TABLE_COLUMNS["Event"], (
+                (self.event_id(k), f"Seed Event {k}", f"Synthetic event {k}.", self._event_date(k), spanner.COMMIT_TIMESTAMP)
+                for k in range(self.events)
+            )),
+            "Location": (TABLE_COLUMNS["Location"], (self._location(k) for k in range(self.events))),
+            "EventLocation": (TABLE_COLUMNS["EventLocation"], (
+                (self.event_id(k), _id("location", k), spanner.COMMIT_TIMESTAMP) for k in range(self.events)
+            )),
+            "Attendance": (TABLE_COLUMNS["Attendance"], (
+                (self.person_id(i), self.event_id(k), spanner.COMMIT_TIMESTAMP)
+                for k in range(self.events) for i in self._attendees(k)
+            )),
+            "EventSummary": (TABLE_COLUMNS["EventSummary"], (
+                event_summary_row(self.event_id(k), f"Seed Event {k}", self._event_date(k),
+                                  [(self.person_id(i), self.person_name(i)) for i in self._attendees(k)])
+                for k in range(self.events)
+            )),
+            "Post": (TABLE_COLUMNS["Post"], (
+                row for i in range(self.people) for row, _ in self._posts(i)
+            )),
+            "Mention": (TABLE_COLUMNS["Mention"], (
+                (row[0], self.person_id(mentioned), spanner.COMMIT_TIMESTAMP)
+                for i in range(self.people) for row, mentioned in self._posts(i) if mentioned is not None
+            )),
+        }
+        # Friendship, plus FriendAdjacency when enabled
+        for table, columns, _ in friendship_table_rows("a", "b"):
+            tables[table] = (columns, self._friendship_rows(table))
+        return tables
+
+
+def main():
+    from logging_setup import configure_logging
+    from spanner_data.database import get_database, DATABASE_ID
+
+    parser = argparse.ArgumentParser(description="Seed a synthetic social graph for load tests.")
+    parser.add_argument("--people", type=int, required=True, help="People to create")
+    parser.add_argument("--degree", type=int, default=20, help="Average friendships per person")
+    parser.add_argument("--posts-per-person", type=int, default=5, help="Posts written by each person")
+    parser.add_argument("--events", type=int, default=None, help="Events to create (default: one per 100 people)")
+    parser.add_argument("--attendees-per-event", type=int, default=50, help="Attendees of each event")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed of the dataset")
+    parser.add_argument("--workers", type=int, default=SEED_WORKERS, help="Commits in flight at once")
+    parser.add_argument("--mutations-per-commit", type=int, default=MUTATIONS_PER_COMMIT, help="Upper bound on cells per commit")
+    parser.add_argument("--checkpoint", help="JSON file recording committed chunks; re-run with the same file to resume")
+    args = parser.parse_args()
+
+    configure_logging(default_format="text")
+    if DATABASE_ID == "graphdb" and not os.environ.get("SEED_ALLOW_DEFAULT_DATABASE"):
+        parser.error("Refusing to load synthetic data into the default 'graphdb' database; "
+                     "set SPANNER_DATABASE_ID to a scratch database (or SEED_ALLOW_DEFAULT_DATABASE=1).")
+    database = get_database()
+    if database is None:
+        log.critical("Spanner database connection not established. Aborting.")
+        raise SystemExit(1)
+
+    checkpoint = None
+    as_of = None
+    if args.checkpoint:
+        run = {
+            "people": args.people, "degree": args.degree, "posts_per_person": args.posts_per_person,
+            "events": args.events, "attendees_per_event": args.attendees_per_event, "seed": args.seed,
+            "mutations_per_commit": args.mutations_per_commit, "friend_adjacency": FRIEND_ADJACENCY,
+        }
+        checkpoint = SeedCheckpoint(args.checkpoint, run)
+        # Keep generated dates identical when a run is resumed on a later day
+        if "as_of" in checkpoint.meta:
+            as_of = datetime.fromisoformat(checkpoint.meta["as_of"])
+
+    dataset = SyntheticDataset(
+        args.people, degree=args.degree, posts_per_person=args.posts_per_person, events=args.events,
+        attendees_per_event=args.attendees_per_event, seed=args.seed, as_of=as_of,
+    )
+    if checkpoint is not None:
+        checkpoint.meta["as_of"] = dataset.as_of.isoformat()
+        checkpoint.save()
+
+    started = time.monotonic()
+    written = seed_tables(database, dataset.tables(), workers=args.workers,
+                          mutations_per_commit=args.mutations_per_commit, checkpoint=checkpoint)
+    log.info("Seeded %d rows in %.1fs.", sum(written.values()), time.monotonic() - started)
+
+
+if __name__ == "__main__":
+    main()
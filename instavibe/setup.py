@@ -3,10 +3,21 @@ import uuid
 from datetime import datetime, timedelta, timezone
 from dateutil import parser as dateutil_parser
 import time
+import logging
 
 from google.cloud import spanner
 from google.api_core import exceptions
 
+from logging_setup import configure_logging
+from event_summary import backfill_event_summaries
+from friend_suggestions import refresh_friend_suggestions
+from seeder import TABLE_COLUMNS, seed_tables
+from friend_adjacency import FRIEND_ADJACENCY, FRIEND_ADJACENCY_COLUMNS, FRIENDSHIP_COLUMNS, friendship_table_rows, backfill_friend_adjacency
+from spanner_data.graph import is_symmetric_edge, forget_graph_definition
+
+configure_logging(default_format="text")
+log = logging.getLogger(__name__)
+
 # --- Configuration ---
 INSTANCE_ID = os.environ.get("SPANNER_INSTANCE_ID","instavibe-graph-instance")
 DATABASE_ID = os.environ.get("SPANNER_DATABASE_ID","graphdb")
@@ -18,52 +29,49 @@ try:
     spanner_client = spanner.Client(project=PROJECT_ID)
     instance = spanner_client.instance(INSTANCE_ID)
     database = instance.database(DATABASE_ID)
-    print(f"Targeting Spanner: {instance.name}/databases/{database.name}")
+    log.info("Targeting Spanner: %s/databases/%s", instance.name, database.name)
     if not database.exists():
-        print(f"Error: Database '{DATABASE_ID}' does not exist. Please create it first.")
+        log.error("Database '%s' does not exist. Please create it first.", DATABASE_ID)
         database = None
     else:
-        print("Database connection successful.")
+        log.info("Database connection successful.")
 except exceptions.NotFound:
-    print(f"Error: Spanner instance '{INSTANCE_ID}' not found or missing permissions.")
+    log.error("Spanner instance '%s' not found or missing permissions.", INSTANCE_ID)
     spanner_client = None; instance = None; database = None
 except Exception as e:
-    print(f"Error initializing Spanner client: {e}")
+    log.error("Error initializing Spanner client: %s", e)
     spanner_client = None; instance = None; database = None
 
 def run_ddl_statements(db_instance, ddl_list, operation_description):
     """Helper function to run DDL statements and handle potential errors."""
     if not db_instance:
-        print(f"Skipping DDL ({operation_description}) - database connection not available.")
+        log.warning("Skipping DDL (%s) - database connection not available.", operation_description)
         return False
-    print(f"\n--- Running DDL: {operation_description} ---")
-    print("Statements:")
+    log.info("--- Running DDL: %s ---", operation_description)
+    log.info("Statements:")
     # Print statements cleanly
     for i, stmt in enumerate(ddl_list):
-        print(f"  [{i+1}] {stmt.strip()}") # Add numbering for clarity
+        log.info("  [%d] %s", i+1, stmt.strip()) # Add numbering for clarity
     try:
         operation = db_instance.update_ddl(ddl_list)
-        print("Waiting for DDL operation to complete...")
+        log.info("Waiting for DDL operation to complete...")
         operation.result(360) # Wait up to 6 minutes
-        print(f"DDL operation '{operation_description}' completed successfully.")
+        log.info("DDL operation '%s' completed successfully.", operation_description)
         return True
     except (exceptions.FailedPrecondition, exceptions.AlreadyExists) as e:
-        print(f"Warning/Info during DDL '{operation_description}': {type(e).__name__} - {e}")
-        print("Continuing script execution (schema object might already exist or precondition failed).")
+        log.warning("Warning/Info during DDL '%s': %s - %s", operation_description, type(e).__name__, e)
+        log.info("Continuing script execution (schema object might already exist or precondition failed).")
         return True
     except exceptions.InvalidArgument as e:
-        print(f"ERROR during DDL '{operation_description}': {type(e).__name__} - {e}")
-        print(">>> This indicates a DDL syntax error. The schema was NOT created/updated correctly. Stopping script. <<<")
+        log.error("ERROR during DDL '%s': %s - %s", operation_description, type(e).__name__, e)
+        log.error(">>> This indicates a DDL syntax error. The schema was NOT created/updated correctly. Stopping script. <<<")
         return False # Make syntax errors fatal
     except exceptions.DeadlineExceeded:
-        print(f"ERROR during DDL '{operation_description}': DeadlineExceeded - Operation took too long.")
+        log.error("ERROR during DDL '%s': DeadlineExceeded - Operation took too long.", operation_description)
         return False
     except Exception as e:
-        print(f"ERROR during DDL '{operation_description}': {type(e).__name__} - {e}")
-        # Optionally print full traceback for debugging
-        import traceback
-        traceback.print_exc()
-        print("Stopping script due to unexpected DDL error.")
+        log.exception("ERROR during DDL '%s': %s - %s", operation_description, type(e).__name__, e)
+        log.error("Stopping script due to unexpected DDL error.")
         return False
 
 def setup_base_schema_and_indexes(db_instance):
@@ -138,28 +146,106 @@ def setup_base_schema_and_indexes(db_instance):
             CONSTRAINT FK_Location FOREIGN KEY (location_id) REFERENCES Location (location_id)
         ) PRIMARY KEY (event_id, location_id)
         """,
+        # Denormalized read model for the events sidebar (see event_summary.py)
+        """
+        CREATE TABLE IF NOT EXISTS EventSummary (
+            event_id STRING(36) NOT NULL,
+            name STRING(MAX),
+            event_date TIMESTAMP,
+            attendee_count INT64 NOT NULL,
+            attendee_ids ARRAY<STRING(36)>,      -- First attendees by name
+            attendee_names ARRAY<STRING(MAX)>,
+            update_time TIMESTAMP NOT NULL OPTIONS(allow_commit_timestamp=true)
+        ) PRIMARY KEY (event_id),
+          INTERLEAVE IN PARENT Event ON DELETE CASCADE
+        """,
+        # Friend-of-friend suggestions, recomputed by friend_suggestions.py
+        """
+        CREATE TABLE IF NOT EXISTS FriendSuggestion (
+            person_id STRING(36) NOT NULL,
+            candidate_id STRING(36) NOT NULL,  -- References Person.person_id
+            candidate_name STRING(MAX),
+            mutual_friends INT64 NOT NULL,
+            shared_events INT64 NOT NULL,
+            score FLOAT64 NOT NULL,
+            computed_time TIMESTAMP NOT NULL OPTIONS(allow_commit_timestamp=true)
+        ) PRIMARY KEY (person_id, candidate_id),
+          INTERLEAVE IN PARENT Person ON DELETE CASCADE
+        """,
         # --- 2. Indexes ---
         "CREATE INDEX IF NOT EXISTS PersonByName ON Person(name)",
         "CREATE INDEX IF NOT EXISTS EventByDate ON Event(event_date DESC)",
         "CREATE INDEX IF NOT EXISTS PostByTimestamp ON Post(post_timestamp DESC)",
         "CREATE INDEX IF NOT EXISTS PostByAuthor ON Post(author_id, post_timestamp DESC)",
-        "CREATE INDEX IF NOT EXISTS FriendshipByPersonB ON Friendship(person_id_b, person_id_a)",
+        "CREATE INDEX IF NOT EXISTS FriendshipByPersonB ON Friendship(person_id_b, person_id_a) STORING (friendship_time)",
         "CREATE INDEX IF NOT EXISTS AttendanceByEvent ON Attendance(event_id, person_id)",
         "CREATE INDEX IF NOT EXISTS MentionByPerson ON Mention(mentioned_person_id, post_id)",
         "CREATE INDEX IF NOT EXISTS EventLocationByLocationId ON EventLocation(location_id, event_id)", # Index for linking table
+        # Covers the sidebar query, which then reads no base table rows
+        "CREATE INDEX IF NOT EXISTS EventSummaryByDate ON EventSummary(event_date DESC) STORING (name, attendee_count, attendee_ids, attendee_names, update_time)",
+        # A person's best suggestions first, stored next to their Person row
+        "CREATE INDEX IF NOT EXISTS FriendSuggestionByScore ON FriendSuggestion(person_id, score DESC) STORING (candidate_name, mutual_friends, shared_events, computed_time), INTERLEAVE IN Person",
 
     ]
+    if FRIEND_ADJACENCY:
+        # Both directions of every friendship, stored under each person (see friend_adjacency.py)
+        ddl_statements.append("""
+        CREATE TABLE IF NOT EXISTS FriendAdjacency (
+            person_id STRING(36) NOT NULL,
+            friend_id STRING(36) NOT NULL,  -- References Person.person_id
+            friendship_time TIMESTAMP NOT NULL OPTIONS(allow_commit_timestamp=true)
+        ) PRIMARY KEY (person_id, friend_id),
+          INTERLEAVE IN PARENT Person ON DELETE CASCADE
+        """)
     return run_ddl_statements(db_instance, ddl_statements, "Create Base Tables and Indexes")
 
+# --- Migrations for databases created by earlier versions of this script ---
+def existing_tables(db_instance):
+    """Names of the tables that currently exist in the database."""
+    with db_instance.snapshot() as snapshot:
+        rows = snapshot.execute_sql("SELECT table_name FROM information_schema.tables WHERE table_schema = ''")
+        return {row[0] for row in rows}
+
+
+def migrate_friendship_index(db_instance):
+    """
+    Adds friendship_time to an existing FriendshipByPersonB index.
+
+    CREATE INDEX IF NOT EXISTS leaves an index created before it stored
+    friendship_time untouched, and FRIENDS_QUERY forces this index. The
+    column is added in place, so the index stays usable throughout.
+    """
+    with db_instance.snapshot() as snapshot:
+        rows = list(snapshot.execute_sql("""
+            SELECT column_name FROM information_schema.index_columns
+            WHERE table_schema = '' AND table_name = 'Friendship' AND index_name = 'FriendshipByPersonB'
+        """))
+    columns = {row[0] for row in rows}
+    if not columns or "friendship_time" in columns:
+        return True # No such index to migrate, or it already stores the column
+    return run_ddl_statements(db_instance, [
+        "ALTER INDEX FriendshipByPersonB ADD STORED COLUMN friendship_time",
+    ], "Store friendship_time in FriendshipByPersonB")
+
+
 # --- NEW: Function to create the property graph ---
 def setup_graph_definition(db_instance):
-    """Creates the Property Graph definition based on existing tables."""
+    """Creates (or updates) the Property Graph definition based on existing tables."""
     # NOTE: Graph name cannot contain hyphens if unquoted. Using SocialGraph.
+    if FRIEND_ADJACENCY:
+        # One edge per direction: match friends with a directed -[:Friendship]->
+        friendship_edge = """FriendAdjacency AS Friendship
+              SOURCE KEY (person_id) REFERENCES Person (person_id)
+              DESTINATION KEY (friend_id) REFERENCES Person (person_id),"""
+    else:
+        friendship_edge = """Friendship
+              SOURCE KEY (person_id_a) REFERENCES Person (person_id)
+              DESTINATION KEY (person_id_b) REFERENCES Person (person_id),"""
     ddl_statements = [
         # --- Create the Property Graph Definition (Using SOURCE/DESTINATION) ---
-        # "DROP PROPERTY GRAPH IF EXISTS SocialGraph", # Optional for dev
-        """
-        CREATE PROPERTY GRAPH IF NOT EXISTS SocialGraph
+        # OR REPLACE, so switching FRIEND_ADJACENCY rewires the Friendship edge
+        f"""
+        CREATE OR REPLACE PROPERTY GRAPH SocialGraph
           NODE TABLES (
             Person KEY (person_id),
             Event KEY (event_id),
@@ -167,9 +253,7 @@ def setup_graph_definition(db_instance):
             Location KEY (location_id) -- New Node Table
           )
           EDGE TABLES (
-            Friendship 
-              SOURCE KEY (person_id_a) REFERENCES Person (person_id)
-              DESTINATION KEY (person_id_b) REFERENCES Person (person_id),
+            {friendship_edge}
 
             
             Attendance AS Attended 
@@ -201,8 +285,8 @@ def generate_uuid(): return str(uuid.uuid4())
 
 def insert_relational_data(db_instance):
     """Generates and inserts the curated data into the new relational tables."""
-    if not db_instance: print("Skipping data insertion - db connection unavailable."); return False
-    print("\n--- Defining Fixed Curated Data for Relational Insertion ---")
+    if not db_instance: log.warning("Skipping data insertion - db connection unavailable."); return False
+    log.info("--- Defining Fixed Curated Data for Relational Insertion ---")
 
     people_map = {} # name -> id
     event_map = {}  # name -> id
@@ -213,6 +297,7 @@ def insert_relational_data(db_instance):
     events_rows = []
     posts_rows = []
     friendship_rows = []
+    friend_adjacency_rows = [] # Only with FRIEND_ADJACENCY
     attendance_rows = []
     mention_rows = []
     locations_rows = [] # For Location table
@@ -227,7 +312,7 @@ def insert_relational_data(db_instance):
         "Ian": {"age": 25}, "Julia": {"age": 38}, "Kevin": {"age": 22}, "Laura": {"age": 45},
         "Mike": {"age": 36}, "Nora": {"age": 29}, "Oscar": {"age": 32}
     }
-    print(f"Preparing {len(people_data)} people.")
+    log.info("Preparing %s people.", len(people_data))
     for name, data in people_data.items():
         person_id = generate_uuid()
         people_map[name] = person_id
@@ -246,14 +331,14 @@ def insert_relational_data(db_instance):
         "Escape Room: The Lost Temple": {"date": (now - timedelta(days=1, hours=5)).isoformat(), "description": "Can you solve the puzzles and escape the Lost Temple in 60 minutes?", "locations": [{"name": "Enigma Escapes", "description": "The Lost Temple room.", "latitude": 30.267153, "longitude": -97.743057, "address": "321 Puzzle Pl, Austin"}]},
         "Music in the Park Festival": {"date": (now - timedelta(days=0, hours=18)).isoformat(), "description": "A two-day music festival featuring local bands and artists across multiple stages.", "locations": [{"name": "Main Stage - Meadow", "description": "Headline acts.", "latitude": 34.0600, "longitude": -118.2500, "address": "City Park, Meadow Area"}, {"name": "Acoustic Tent - By The Lake", "description": "Intimate performances.", "latitude": 34.0615, "longitude": -118.2520, "address": "City Park, Lakeside"}, {"name": "Food Truck Alley - East Path", "description": "Various food vendors.", "latitude": 34.0590, "longitude": -118.2480, "address": "City Park, East Pathway"}]}
     }
-    print(f"Preparing {len(event_data)} events.")
+    log.info("Preparing %s events.", len(event_data))
     for name, data in event_data.items():
         event_id = generate_uuid()
         event_map[name] = event_id
         try:
              ts_str = data.get("date")
              if not ts_str:
-                 print(f"Warning: Missing date for event '{name}', skipping.")
+                 log.warning("Missing date for event '%s', skipping.", name)
                  continue
              ts = dateutil_parser.isoparse(ts_str)
              # Ensure it's timezone-aware (Spanner prefers UTC)
@@ -291,13 +376,13 @@ def insert_relational_data(db_instance):
                         "event_id": event_id, "location_id": location_id, "create_time": spanner.COMMIT_TIMESTAMP
                     })
         except (TypeError, ValueError, OverflowError) as e: # Catch specific errors
-            print(f"Warning: Could not parse date for event '{name}' (value: {data.get('date')}, error: {e}), skipping.")
+            log.warning("Could not parse date for event '%s' (value: %s, error: %s), skipping.", name, data.get('date'), e)
 
 
     # 3. Prepare Friendships Data
     friendship_data = [("Alice", "Bob"), ("Alice", "Charlie"), ("Alice", "Hannah"), ("Alice", "Fiona"), ("Bob", "Diana"), ("Bob", "Ian"), ("Charlie", "Diana"), ("Charlie", "Ethan"), ("Diana", "Fiona"), ("Ethan", "Fiona"), ("Ethan", "George"), ("Ethan", "Ian"), ("Fiona", "Hannah"), ("Fiona", "Julia"), ("Fiona", "Ian"), ("Fiona", "Kevin"), ("Fiona", "Laura"), ("Fiona", "Mike"), ("Fiona", "Nora"), ("Fiona", "Oscar"), ("George", "Hannah"), ("George", "Ian"), ("Hannah", "Julia"), ("Ian", "Kevin"), ("Julia", "Kevin"), ("Julia", "Laura"), ("Kevin", "Mike"), ("Laura", "Nora"), ("Mike", "Oscar"), ("Nora", "Oscar")] # Removed one ("Oscar", "Nora") from original list which was a duplicate pair after sorting
     unique_friendship_pairs = set()
-    print(f"Preparing friendships from {len(friendship_data)} potential pairs.")
+    log.info("Preparing friendships from %s potential pairs.", len(friendship_data))
     for p1_name, p2_name in friendship_data:
         if p1_name in people_map and p2_name in people_map:
              id1, id2 = people_map[p1_name], people_map[p2_name]
@@ -305,19 +390,19 @@ def insert_relational_data(db_instance):
              # Ensure person_id_a is lexicographically smaller than person_id_b for consistent PK
              person_id_a, person_id_b = tuple(sorted((id1, id2)))
              if (person_id_a, person_id_b) not in unique_friendship_pairs:
-                 friendship_rows.append({
-                    "person_id_a": person_id_a, "person_id_b": person_id_b,
-                    "friendship_time": spanner.COMMIT_TIMESTAMP
-                 })
+                 # Same rows as any other writer: Friendship plus, optionally, both adjacency rows
+                 for table_name, cols, rows in friendship_table_rows(person_id_a, person_id_b):
+                     target = friendship_rows if table_name == "Friendship" else friend_adjacency_rows
+                     target.extend(dict(zip(cols, row)) for row in rows)
                  unique_friendship_pairs.add((person_id_a, person_id_b))
         else:
-            print(f"Warning: Skipping friendship due to missing person ('{p1_name}' or '{p2_name}').")
-    print(f"Prepared {len(friendship_rows)} unique friendship rows.")
+            log.warning("Skipping friendship due to missing person ('%s' or '%s').", p1_name, p2_name)
+    log.info("Prepared %s unique friendship rows.", len(friendship_rows))
 
 
     # 4. Prepare Attendance Data
     attendance_data = [("Alice", "Charity Bake Sale"), ("Alice", "Tech Meetup: Future of AI"), ("Bob", "Charity Bake Sale"), ("Bob", "Central Park Picnic"), ("Charlie", "Tech Meetup: Future of AI"), ("Diana", "Central Park Picnic"), ("Diana", "Indie Film Screening"), ("Ethan", "Tech Meetup: Future of AI"), ("Ethan", "Neighborhood Potluck"), ("Fiona", "Central Park Picnic"), ("Fiona", "Escape Room: The Lost Temple"), ("George", "Neighborhood Potluck"), ("George", "Escape Room: The Lost Temple"), ("Hannah", "Charity Bake Sale"), ("Hannah", "Indie Film Screening"), ("Ian", "Tech Meetup: Future of AI"), ("Ian", "Neighborhood Potluck"), ("Julia", "Central Park Picnic"), ("Julia", "Escape Room: The Lost Temple"), ("Kevin", "Indie Film Screening"), ("Laura", "Neighborhood Potluck")]
-    print(f"Preparing {len(attendance_data)} attendance records.")
+    log.info("Preparing %s attendance records.", len(attendance_data))
     for person_name, event_name in attendance_data:
         if person_name in people_map and event_name in event_map:
             attendance_rows.append({
@@ -325,7 +410,7 @@ def insert_relational_data(db_instance):
                 "attendance_time": spanner.COMMIT_TIMESTAMP
             })
         else:
-            print(f"Warning: Skipping attendance record due to missing person ('{person_name}') or event ('{event_name}').")
+            log.warning("Skipping attendance record due to missing person ('%s') or event ('%s').", person_name, event_name)
 
     # 5. Prepare Posts and Mentions Data
     # --- PASTE FULL posts_data list here ---
@@ -565,12 +650,12 @@ def insert_relational_data(db_instance):
     ] # <-- Make sure this contains the full list
     #---------------------------------------------
 
-    print(f"Preparing {len(posts_data)} posts and associated mentions.")
+    log.info("Preparing %s posts and associated mentions.", len(posts_data))
     post_counter = 0
     for post_info in posts_data:
         person_name = post_info.get("person") # Assume this is correct
         if not person_name or person_name not in people_map:
-            print(f"Warning: Skipping post from unknown or missing person '{person_name}': {post_info.get('text', 'N/A')[:50]}...")
+            log.warning("Skipping post from unknown or missing person '%s': %s...", person_name, post_info.get('text', 'N/A')[:50])
             continue
 
         post_id = generate_uuid()
@@ -598,7 +683,7 @@ def insert_relational_data(db_instance):
                 "create_time": spanner.COMMIT_TIMESTAMP
             })
         except (TypeError, ValueError, KeyError, OverflowError) as e:
-            print(f"Warning: Skipping post due to data/time calculation issue ({e}): {post_info.get('text', 'N/A')[:50]}...")
+            log.warning("Skipping post due to data/time calculation issue (%s): %s...", e, post_info.get('text', 'N/A')[:50])
             continue # Skip this post entirely if data is bad
 
         # Process mention only if post was successfully prepared
@@ -611,120 +696,127 @@ def insert_relational_data(db_instance):
                     "mention_time": spanner.COMMIT_TIMESTAMP # Use commit timestamp for simplicity
                 })
             else:
-                 print(f"Warning: Skipping mention for unknown person '{mentioned_person_name}' in post by '{person_name}'.")
-
-    print(f"Prepared {len(posts_rows)} post rows, {len(mention_rows)} mention rows, {len(locations_rows)} location rows, and {len(event_locations_rows)} event-location link rows.")
-
-
-
-    # --- 6. Insert Data into Spanner using a Transaction ---
-    print("\n--- Inserting Data into Relational Tables ---")
-    inserted_counts = {}
-
-    # Define the function to be run in the transaction
-    def insert_data_txn(transaction):
-        total_rows_attempted = 0
-        # Define structure: Table Name -> (Columns List, Rows Data List of Dicts)
-        table_map = {
-            "Person": (["person_id", "name", "age", "create_time"], people_rows),
-            "Event": (["event_id", "name", "description", "event_date", "create_time"], events_rows),
-            "Location": (["location_id", "name", "description", "latitude", "longitude", "address", "create_time"], locations_rows),
-            "Post": (["post_id", "author_id", "text", "sentiment", "post_timestamp", "create_time"], posts_rows),
-            "Friendship": (["person_id_a", "person_id_b", "friendship_time"], friendship_rows),
-            "Attendance": (["person_id", "event_id", "attendance_time"], attendance_rows),
-            "Mention": (["post_id", "mentioned_person_id", "mention_time"], mention_rows),
-            "EventLocation": (["event_id", "location_id", "create_time"], event_locations_rows)
-        }
-
-        for table_name, (cols, rows_dict_list) in table_map.items():
-            if rows_dict_list:
-                print(f"Inserting {len(rows_dict_list)} rows into {table_name}...")
-                # Convert list of dicts into list of tuples matching column order
-                values_list = []
-                for row_dict in rows_dict_list:
-                    try:
-                        # Ensure all columns exist in the dict (or handle None)
-                        # and are in the correct order
-                        values_tuple = tuple(row_dict.get(c) for c in cols)
-                        values_list.append(values_tuple)
-                    except Exception as e:
-                        print(f"Error preparing row for {table_name}: {e} - Row: {row_dict}")
-                        # Decide if you want to skip this row or fail the transaction
-                        # For now, let it potentially fail the transaction later if types mismatch etc.
-
-                if values_list: # Only insert if we have valid rows prepared
-                    transaction.insert(
-                        table=table_name,
-                        columns=cols,
-                        values=values_list # Pass the list of tuples
-                    )
-                    inserted_counts[table_name] = len(values_list)
-                    total_rows_attempted += len(values_list)
-                else:
-                    inserted_counts[table_name] = 0
-            else:
-                inserted_counts[table_name] = 0
-        print(f"Transaction attempting to insert {total_rows_attempted} rows across all tables.")
+                 log.warning("Skipping mention for unknown person '%s' in post by '%s'.", mentioned_person_name, person_name)
 
-    # Execute the transaction
-    try:
-        print("Executing data insertion transaction...")
-        # Only run if there's actually data to insert
-        all_data_lists = [
-            people_rows, events_rows, locations_rows, posts_rows,
-            friendship_rows, attendance_rows, mention_rows, event_locations_rows
-        ]
-        if any(len(data_list) > 0 for data_list in all_data_lists):
-            db_instance.run_in_transaction(insert_data_txn)
-            print("Transaction committed successfully.")
-            for table, count in inserted_counts.items():
-                if count > 0: print(f"  -> Inserted {count} rows into {table}.")
-            return True
-        else:
-            print("No data prepared for insertion.")
+    log.info("Prepared %s post rows, %s mention rows, %s location rows, and %s event-location link rows.", len(posts_rows), len(mention_rows), len(locations_rows), len(event_locations_rows))
+
+
+
+    # --- 6. Insert Data into Spanner in chunked, parallel commits (see seeder.py) ---
+    log.info("--- Inserting Data into Relational Tables ---")
+    # Table Name -> (Columns List, Rows Data List of Dicts); seed_tables orders the tables by their dependencies
+    table_map = {
+        "Person": (TABLE_COLUMNS["Person"], people_rows),
+        "Event": (TABLE_COLUMNS["Event"], events_rows),
+        "Location": (TABLE_COLUMNS["Location"], locations_rows),
+        "Post": (TABLE_COLUMNS["Post"], posts_rows),
+        "Friendship": (FRIENDSHIP_COLUMNS, friendship_rows),
+        "FriendAdjacency": (FRIEND_ADJACENCY_COLUMNS, friend_adjacency_rows),
+        "Attendance": (TABLE_COLUMNS["Attendance"], attendance_rows),
+        "Mention": (TABLE_COLUMNS["Mention"], mention_rows),
+        "EventLocation": (TABLE_COLUMNS["EventLocation"], event_locations_rows),
+    }
+    # Convert lists of dicts into tuples matching the column order
+    tables = {
+        table_name: (cols, [tuple(row_dict.get(c) for c in cols) for row_dict in rows_dict_list])
+        for table_name, (cols, rows_dict_list) in table_map.items()
+        if rows_dict_list
+    }
+    if not tables:
+        log.info("No data prepared for insertion.")
         return True # Successful because nothing needed to be done
-    except exceptions.Aborted as e:
-         # Handle potential transaction aborts (e.g., contention) - retrying might be needed
-         print(f"ERROR: Data insertion transaction aborted: {e}. Consider retrying.")
-         return False
+
+    try:
+        inserted_counts = seed_tables(db_instance, tables)
+        for table, count in inserted_counts.items():
+            if count > 0: log.info("  -> Inserted %s rows into %s.", count, table)
+        return True
     except Exception as e:
-        print(f"ERROR during data insertion transaction: {type(e).__name__} - {e}")
-        # Optionally print more details for debugging complex errors
-        import traceback
-        traceback.print_exc()
-        print("Data insertion failed. Database schema might exist but data is missing/incomplete.")
+        log.exception("ERROR during data insertion: %s - %s", type(e).__name__, e)
+        log.error("Data insertion failed. Database schema might exist but data is missing/incomplete.")
         return False
 
 
 # --- Main Execution ---
 if __name__ == "__main__":
-    print("Starting Spanner Relational Schema Setup Script...")
+    log.info("Starting Spanner Relational Schema Setup Script...")
     start_time = time.time()
 
     if not database:
-        print("\nCritical Error: Spanner database connection not established. Aborting.")
+        log.critical("Spanner database connection not established. Aborting.")
+        exit(1)
+
+    # Decides below whether this run upgrades a database that already has friendships
+    try:
+        tables_before = existing_tables(database)
+    except Exception as e:
+        log.exception("ERROR reading the existing schema: %s - %s", type(e).__name__, e)
         exit(1)
 
     # --- Step 1: Create schema (No Drops) ---
     # Added IF NOT EXISTS to CREATE INDEX statements for robustness
     if not setup_base_schema_and_indexes(database):
-        print("\nAborting script due to errors during base schema/index creation.")
+        log.error("Aborting script due to errors during base schema/index creation.")
+        exit(1)
+
+    # --- Step 1b: Bring indexes created by earlier versions up to date ---
+    try:
+        migrated = migrate_friendship_index(database)
+    except Exception as e:
+        log.exception("ERROR while migrating FriendshipByPersonB: %s - %s", type(e).__name__, e)
+        migrated = False
+    if not migrated:
+        log.error("Aborting script due to errors during the FriendshipByPersonB migration.")
         exit(1)
 
+    # --- Step 1c: Turning FRIEND_ADJACENCY on: fill FriendAdjacency first ---
+    # Needed when friendships exist but the graph does not read FriendAdjacency
+    # yet: the table was just created, or was left stale by a run with the flag
+    # off (then it is rebuilt). Done before Step 2 points the graph at it; the
+    # seeder below writes both tables itself.
+    adjacency_in_use = "FriendAdjacency" in tables_before and is_symmetric_edge(database, "Friendship")
+    if FRIEND_ADJACENCY and "Friendship" in tables_before and not adjacency_in_use:
+        try:
+            friendship_count = backfill_friend_adjacency(database, replace="FriendAdjacency" in tables_before)
+            log.info("Backfilled FriendAdjacency rows for %s friendships.", friendship_count)
+        except Exception as e:
+            log.exception("ERROR during FriendAdjacency backfill: %s - %s", type(e).__name__, e)
+            log.error("Script finished with errors during the FriendAdjacency backfill.")
+            exit(1)
+
     # --- Step 2: Create graph definition ---
     # Run this in a separate DDL operation
     if not setup_graph_definition(database):
-        print("\nAborting script due to errors during graph definition creation.")
+        log.error("Aborting script due to errors during graph definition creation.")
         exit(1)
+    forget_graph_definition() # Later steps must see the edge as just defined
 
     # --- Step 3: Insert data into the base tables ---
     if not insert_relational_data(database):
-        print("\nScript finished with errors during data insertion.")
+        log.error("Script finished with errors during data insertion.")
+        exit(1)
+
+    # --- Step 4: Build the EventSummary read model from the base tables ---
+    try:
+        summary_count = backfill_event_summaries(database)
+        log.info("Backfilled %s EventSummary rows.", summary_count)
+    except Exception as e:
+        log.exception("ERROR during EventSummary backfill: %s - %s", type(e).__name__, e)
+        log.error("Script finished with errors during the EventSummary backfill.")
+        exit(1)
+
+    # --- Step 5: Materialize friend suggestions (refreshed later by friend_suggestions.py) ---
+    try:
+        suggestion_count = refresh_friend_suggestions(database)
+        log.info("Wrote %s friend suggestions.", suggestion_count)
+    except Exception as e:
+        log.exception("ERROR while computing friend suggestions: %s - %s", type(e).__name__, e)
+        log.error("Script finished with errors while computing friend suggestions.")
         exit(1)
 
     end_time = time.time()
-    print("\n-----------------------------------------")
-    print("Script finished successfully!")
-    print(f"Database '{DATABASE_ID}' on instance '{INSTANCE_ID}' has been set up with the relational schema and populated.")
-    print(f"Total time: {end_time - start_time:.2f} seconds")
-    print("-----------------------------------------")
+    log.info("-----------------------------------------")
+    log.info("Script finished successfully!")
+    log.info("Database '%s' on instance '%s' has been set up with the relational schema and populated.", DATABASE_ID, INSTANCE_ID)
+    log.info("Total time: %.2f seconds", end_time - start_time)
+    log.info("-----------------------------------------")
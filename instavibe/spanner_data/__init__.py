@@ -0,0 +1,45 @@
+"""Shared Spanner data-access layer for the Instavibe web app and agents."""
+
+from spanner_data.database import get_database
+from spanner_data.query import Query, decode_rows, execute, iter_rows, fetch_all, fetch_one
+from spanner_data.page import load_page
+from spanner_data.registry import register, get_query, registered_queries, warm_up
+from spanner_data.records import Record, record_type
+from spanner_data.staleness import Staleness, STRONG, max_staleness, exact_staleness
+from spanner_data.cache import TTLCache, MISSING, cache_stats
+from spanner_data.write import CommitResult, insert_rows, insert_in_chunks
+from spanner_data.metrics import observe, query_metrics, render_prometheus
+from spanner_data.export import json_default, ndjson_lines, json_array_chunks
+
+__all__ = [
+    "get_database",
+    "Query",
+    "decode_rows",
+    "execute",
+    "iter_rows",
+    "fetch_all",
+    "fetch_one",
+    "load_page",
+    "register",
+    "get_query",
+    "registered_queries",
+    "warm_up",
+    "Record",
+    "record_type",
+    "Staleness",
+    "STRONG",
+    "max_staleness",
+    "exact_staleness",
+    "TTLCache",
+    "MISSING",
+    "cache_stats",
+    "CommitResult",
+    "insert_rows",
+    "insert_in_chunks",
+    "observe",
+    "query_metrics",
+    "render_prometheus",
+    "json_default",
+    "ndjson_lines",
+    "json_array_chunks",
+]
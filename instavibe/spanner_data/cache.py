@@ -0,0 +1,97 @@
+# spanner_data/cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+_caches = {}
+_registry_lock = threading.Lock()
+
+
+class TTLCache:
+    """
+    A thread-safe, size-bounded LRU cache whose entries expire after `ttl` seconds.
+
+    The cache is per process, so an invalidation only reaches the replica that
+    performed the write; other replicas converge within `ttl`. Cached values are
+    shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, name, maxsize=1024, ttl=60):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        with _registry_lock:
+            _caches[name] = self
+
+    def get(self, key):
+        """Returns the cached value for `key`, or MISSING if absent or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """Stores `value`, evicting the least recently used entries beyond `maxsize`."""
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """
+        Returns the cached value for `key`, calling `loader()` on a miss.
+
+        None results are not cached, so a lookup for something that does not
+        exist yet is retried on the next call.
+        """
+        value = self.get(key)
+        if value is MISSING:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def cache_stats():
+    """Returns the hit/miss/eviction counters of every cache in the process, keyed by name."""
+    with _registry_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
@@ -0,0 +1,102 @@
+# spanner_data/database.py
+
+import os
+import threading
+import time
+import logging
+from dotenv import load_dotenv
+
+from google.cloud import spanner
+from google.api_core import exceptions
+
+log = logging.getLogger(__name__)
+
+load_dotenv()
+
+# --- Spanner Configuration ---
+INSTANCE_ID = os.environ.get("SPANNER_INSTANCE_ID", "instavibe-graph-instance")
+DATABASE_ID = os.environ.get("SPANNER_DATABASE_ID", "graphdb")
+PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
+
+# --- Session Pool Configuration ---
+# "pinging" keeps idle sessions alive from a background thread, "fixed" only
+# pre-creates them. Size the pool to the number of concurrent requests a
+# replica is expected to serve (threads x workers).
+POOL_KIND = os.environ.get("SPANNER_POOL_KIND", "pinging")
+POOL_SIZE = int(os.environ.get("SPANNER_POOL_SIZE", "10"))
+POOL_TIMEOUT = int(os.environ.get("SPANNER_POOL_TIMEOUT", "10"))  # seconds to wait for a free session
+POOL_PING_INTERVAL = int(os.environ.get("SPANNER_POOL_PING_INTERVAL", "300"))  # Spanner drops sessions idle > 1h
+# Ask Spanner for commit stats (mutation counts) on batched writes.
+COMMIT_STATS = os.environ.get("SPANNER_COMMIT_STATS", "true").lower() == "true"
+
+_database = None
+_keepalive_thread = None
+_init_lock = threading.Lock()
+
+
+def _create_pool():
+    """Builds the session pool described by the SPANNER_POOL_* settings."""
+    if POOL_KIND == "fixed":
+        return spanner.FixedSizePool(size=POOL_SIZE, default_timeout=POOL_TIMEOUT)
+    if POOL_KIND == "pinging":
+        return spanner.PingingPool(size=POOL_SIZE, default_timeout=POOL_TIMEOUT, ping_interval=POOL_PING_INTERVAL)
+    raise ValueError(f"Unknown SPANNER_POOL_KIND '{POOL_KIND}'. Use 'pinging' or 'fixed'.")
+
+
+def _keepalive_loop(pool):
+    """Refreshes idle sessions so the pool never hands out an expired one."""
+    while True:
+        time.sleep(POOL_PING_INTERVAL / 4)
+        try:
+            pool.ping()
+        except Exception as e:
+            log.warning("Spanner session pool ping failed: %s", e)
+
+
+def _start_keepalive(pool):
+    global _keepalive_thread
+    if not isinstance(pool, spanner.PingingPool) or _keepalive_thread is not None:
+        return
+    _keepalive_thread = threading.Thread(target=_keepalive_loop, args=(pool,), name="spanner-pool-ping", daemon=True)
+    _keepalive_thread.start()
+
+
+def get_database():
+    """
+    Returns the process-wide Spanner database handle backed by a shared session pool.
+
+    The client, instance and pool are created on first use and reused by every
+    caller afterwards. Binding the pool creates its sessions up front, so the
+    first requests served by a new replica do not pay for session creation.
+    No admin `database.exists()` RPC is issued; a missing database surfaces as
+    `NotFound` on the first query instead.
+
+    Returns:
+        google.cloud.spanner_v1.database.Database or None: The pooled database,
+        or None if the client could not be initialized.
+    """
+    global _database
+    if _database is not None:
+        return _database
+
+    with _init_lock:
+        if _database is not None:
+            return _database
+        if not PROJECT_ID:
+            log.warning("Skipping Spanner client initialization due to missing GOOGLE_CLOUD_PROJECT.")
+            return None
+        try:
+            spanner_client = spanner.Client(project=PROJECT_ID)
+            instance = spanner_client.instance(INSTANCE_ID)
+            pool = _create_pool()
+            database = instance.database(DATABASE_ID, pool=pool)
+            database.log_commit_stats = COMMIT_STATS
+            _start_keepalive(pool)
+            log.info("Spanner session pool (%s, size=%d) bound to %s/databases/%s", POOL_KIND, POOL_SIZE, instance.name, database.name)
+            _database = database
+        except exceptions.NotFound:
+            log.error("Spanner instance '%s' or database '%s' not found in project '%s'.", INSTANCE_ID, DATABASE_ID, PROJECT_ID)
+        except Exception as e:
+            log.error("An unexpected error occurred during Spanner initialization: %s", e)
+    return _database
+
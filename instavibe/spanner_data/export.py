@@ -0,0 +1,54 @@
+# spanner_data/export.py
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from spanner_data.records import Record
+
+
+def json_default(value):
+    """`json.dumps` fallback for the Spanner types that JSON has no literal for."""
+    if isinstance(value, Record):
+        return value.to_json()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def ndjson_lines(rows):
+    """
+    Encodes rows as newline-delimited JSON, one line per row.
+
+    Rows are encoded as they are pulled from `rows`, so streaming a generator
+    such as `iter_rows` keeps memory constant regardless of the result size.
+
+    Args:
+        rows (Iterable[dict]): The rows to encode.
+
+    Yields:
+        str: One JSON document followed by a newline per row.
+    """
+    for row in rows:
+        yield json.dumps(row, default=json_default) + "\n"
+
+
+def json_array_chunks(rows):
+    """
+    Encodes rows as one JSON array, yielded piece by piece.
+
+    Args:
+        rows (Iterable[dict]): The rows to encode.
+
+    Yields:
+        str: The opening bracket, each element (comma separated) and the
+             closing bracket.
+    """
+    yield "["
+    separator = ""
+    for row in rows:
+        yield separator + json.dumps(row, default=json_default)
+        separator = ","
+    yield "]"
@@ -0,0 +1,95 @@
+# spanner_data/graph.py
+
+import json
+import logging
+import os
+import threading
+import time
+
+from google.cloud.spanner_v1 import param_types
+
+from spanner_data.query import Query, fetch_all
+
+log = logging.getLogger(__name__)
+
+GRAPH_NAME = "SocialGraph"
+# How long a process trusts the graph definition it read. Re-running setup.py
+# with a different FRIEND_ADJACENCY rewires the Friendship edge; readers follow
+# within this many seconds.
+GRAPH_DEFINITION_TTL = float(os.environ.get("SPANNER_GRAPH_DEFINITION_TTL", "300"))
+
+# Tables a symmetric edge can be backed by: every relation is stored once per
+# direction, so a directed match already finds all of a node's neighbours.
+SYMMETRIC_EDGE_TABLES = frozenset({"FriendAdjacency"})
+
+PROPERTY_GRAPH_METADATA_QUERY = Query(
+    name="property_graph_metadata",
+    sql="""
+        SELECT property_graph_metadata_json
+        FROM information_schema.property_graphs
+        WHERE property_graph_name = @graph_name
+    """,
+    fields=("metadata",),
+    param_types={"graph_name": param_types.STRING},
+)
+
+_edge_tables = {}
+_edge_tables_lock = threading.Lock()
+
+
+def edge_base_tables(database, graph_name=GRAPH_NAME):
+    """
+    Maps the edge labels of a property graph to the tables backing them.
+
+    Read from the deployed graph definition and kept for GRAPH_DEFINITION_TTL
+    seconds per database and graph.
+
+    Args:
+        database: The Spanner database object.
+        graph_name (str): The property graph to inspect.
+
+    Returns:
+        dict[str, str] or None: {edge table name: base table name}, or None
+                                if the definition could not be read.
+    """
+    key = (getattr(database, "name", id(database)), graph_name)
+    with _edge_tables_lock:
+        cached = _edge_tables.get(key)
+    if cached is not None and time.monotonic() - cached[0] < GRAPH_DEFINITION_TTL:
+        return cached[1]
+
+    try:
+        rows = fetch_all(database, PROPERTY_GRAPH_METADATA_QUERY, params={"graph_name": graph_name})
+    except Exception as e:
+        # Not cached, so a transient failure is retried by the next caller
+        log.warning("Could not read the definition of graph %s: %s", graph_name, e)
+        return None
+    if not rows:
+        log.warning("Graph %s does not exist", graph_name)
+        return None
+
+    metadata = rows[0]["metadata"]
+    if isinstance(metadata, str):
+        metadata = json.loads(metadata)
+    tables = {edge["name"]: edge.get("baseTableName", edge["name"]) for edge in metadata.get("edgeTables", [])}
+    with _edge_tables_lock:
+        _edge_tables[key] = (time.monotonic(), tables)
+    return tables
+
+
+def forget_graph_definition():
+    """Drops the cached graph definitions, e.g. after changing the graph in this process."""
+    with _edge_tables_lock:
+        _edge_tables.clear()
+
+
+def is_symmetric_edge(database, edge_name, graph_name=GRAPH_NAME):
+    """
+    Whether an edge is stored in both directions in the deployed graph.
+
+    When it is, match it directed (`-[e]->`): one seek per node and no
+    duplicates. Otherwise it has to be matched undirected (`-[e]-`). False if
+    the graph definition could not be read, which is the always-correct choice.
+    """
+    tables = edge_base_tables(database, graph_name)
+    return bool(tables) and tables.get(edge_name) in SYMMETRIC_EDGE_TABLES
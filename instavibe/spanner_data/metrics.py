@@ -0,0 +1,204 @@
+# spanner_data/metrics.py
+
+import bisect
+import threading
+import time
+
+from google.api_core import exceptions
+from google.api_core.retry import Retry, if_exception_type
+
+from spanner_data.cache import cache_stats
+
+try:
+    from opentelemetry import trace
+    _tracer = trace.get_tracer("spanner_data")
+except ImportError:  # Tracing is optional; metrics work without it
+    trace = None
+    _tracer = None
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+class _QueryMetrics:
+    """Counters for one named query. Guarded by `_metrics_lock`."""
+    __slots__ = ("bucket_counts", "count", "seconds", "rows", "bytes", "retries", "errors")
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.retries = 0
+        self.errors = {}  # error class name -> count
+
+
+def _metrics_for(name):
+    metrics = _metrics.get(name)
+    if metrics is None:
+        metrics = _metrics[name] = _QueryMetrics()
+    return metrics
+
+
+def _row_bytes(values):
+    """Approximate payload size of a row: string/bytes length, 8 bytes for anything else."""
+    return sum(len(v) if isinstance(v, (str, bytes)) else 8 for v in values if v is not None)
+
+
+class QueryObservation:
+    """
+    Measures one execution of a query; use through `observe`.
+
+    Attributes:
+        name (str): The metric label of the query.
+        rows (int): Rows returned so far.
+        bytes (int): Approximate bytes returned so far.
+        retry (Retry): Retry policy for the RPC that counts each retry.
+    """
+
+    def __init__(self, name, span=None):
+        self.name = name
+        self.span = span
+        self.rows = 0
+        self.bytes = 0
+        self.retries = 0
+        self.retry = Retry(predicate=if_exception_type(exceptions.ServiceUnavailable), on_error=self._on_retry)
+
+    def _on_retry(self, error):
+        self.retries += 1
+
+    def add_row(self, values):
+        self.rows += 1
+        self.bytes += _row_bytes(values)
+
+
+class observe:
+    """
+    Context manager that records latency, rows, bytes, retries and the error
+    class of a query into the per-query metrics, and wraps it in an
+    OpenTelemetry span when opentelemetry is installed.
+
+    The span is started without becoming the current span, so the context
+    manager can be held across the yields of a streaming generator.
+
+    Args:
+        name (str): The query name used as the metric label.
+        statement (str, optional): The SQL recorded on the span.
+    """
+
+    def __init__(self, name, statement=None):
+        self.name = name or "unnamed"
+        self.statement = statement
+
+    def __enter__(self):
+        span = None
+        if _tracer is not None:
+            attributes = {"db.system": "spanner", "db.operation.name": self.name}
+            if self.statement:
+                attributes["db.query.text"] = self.statement
+            span = _tracer.start_span(f"spanner {self.name}", attributes=attributes)
+        self.observation = QueryObservation(self.name, span)
+        self._started = time.perf_counter()
+        return self.observation
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._started
+        observation = self.observation
+        # A closed generator (GeneratorExit) is a consumer stopping early, not a failure
+        failed = exc is not None and isinstance(exc, Exception)
+        with _metrics_lock:
+            metrics = _metrics_for(self.name)
+            metrics.count += 1
+            metrics.seconds += seconds
+            metrics.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            metrics.rows += observation.rows
+            metrics.bytes += observation.bytes
+            metrics.retries += observation.retries
+            if failed:
+                error_class = type(exc).__name__
+                metrics.errors[error_class] = metrics.errors.get(error_class, 0) + 1
+        span = observation.span
+        if span is not None:
+            span.set_attribute("db.response.returned_rows", observation.rows)
+            span.set_attribute("spanner.retries", observation.retries)
+            if failed:
+                span.record_exception(exc)
+                span.set_status(trace.Status(trace.StatusCode.ERROR, str(exc)))
+            span.end()
+        return False
+
+
+def query_metrics():
+    """Returns a copy of the per-query counters, keyed by query name."""
+    with _metrics_lock:
+        return {
+            name: {
+                "count": m.count,
+                "seconds": m.seconds,
+                "rows": m.rows,
+                "bytes": m.bytes,
+                "retries": m.retries,
+                "errors": dict(m.errors),
+                "buckets": list(zip(LATENCY_BUCKETS + (float("inf"),), m.bucket_counts)),
+            }
+            for name, m in _metrics.items()
+        }
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def render_prometheus():
+    """
+    Renders the query and cache metrics in the Prometheus text exposition format.
+
+    Returns:
+        str: The exposition, ready to be served at /metrics.
+    """
+    lines = [
+        "# HELP spanner_query_duration_seconds Latency of Spanner queries, including result streaming.",
+        "# TYPE spanner_query_duration_seconds histogram",
+    ]
+    snapshot = query_metrics()
+    for name, m in sorted(snapshot.items()):
+        cumulative = 0
+        for bound, count in m["buckets"]:
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'spanner_query_duration_seconds_bucket{{query="{_label(name)}",le="{le}"}} {cumulative}')
+        lines.append(f'spanner_query_duration_seconds_sum{{query="{_label(name)}"}} {m["seconds"]}')
+        lines.append(f'spanner_query_duration_seconds_count{{query="{_label(name)}"}} {m["count"]}')
+
+    for metric, key, help_text in (
+        ("spanner_query_rows_total", "rows", "Rows returned by Spanner queries."),
+        ("spanner_query_bytes_total", "bytes", "Approximate bytes returned by Spanner queries."),
+        ("spanner_query_retries_total", "retries", "Retried Spanner query RPCs."),
+    ):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for name, m in sorted(snapshot.items()):
+            lines.append(f'{metric}{{query="{_label(name)}"}} {m[key]}')
+
+    lines.append("# HELP spanner_query_errors_total Failed Spanner queries by error class.")
+    lines.append("# TYPE spanner_query_errors_total counter")
+    for name, m in sorted(snapshot.items()):
+        for error_class, count in sorted(m["errors"].items()):
+            lines.append(f'spanner_query_errors_total{{query="{_label(name)}",error="{_label(error_class)}"}} {count}')
+
+    caches = cache_stats()
+    for metric, key, kind in (
+        ("spanner_data_cache_hits_total", "hits", "counter"),
+        ("spanner_data_cache_misses_total", "misses", "counter"),
+        ("spanner_data_cache_evictions_total", "evictions", "counter"),
+        ("spanner_data_cache_size", "size", "gauge"),
+    ):
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, stats in sorted(caches.items()):
+            lines.append(f'{metric}{{cache="{_label(name)}"}} {stats[key]}')
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,121 @@
+# spanner_data/page.py
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from spanner_data.query import execute
+from spanner_data.staleness import strongest
+
+# Threads shared by all page loads in the process. Each page load holds one
+# pooled session; its first read runs in the request thread and the others fan
+# out over these threads. The default leaves room for three extra reads per
+# concurrent request of a gthread worker (GUNICORN_THREADS).
+PAGE_LOAD_WORKERS = int(os.environ.get(
+    "SPANNER_PAGE_LOAD_WORKERS", str(3 * int(os.environ.get("GUNICORN_THREADS", "8")))
+))
+
+_executor = ThreadPoolExecutor(max_workers=PAGE_LOAD_WORKERS, thread_name_prefix="spanner-page")
+# Idle executor threads. A read only goes to the executor when one is free, so
+# page loads never queue behind each other; under saturation they degrade to
+# running their reads one after another in the request thread.
+_free_workers = threading.BoundedSemaphore(PAGE_LOAD_WORKERS)
+
+
+def _reset_executor():
+    # Threads do not survive fork(); give a forked child its own executor
+    global _executor, _free_workers
+    _executor = ThreadPoolExecutor(max_workers=PAGE_LOAD_WORKERS, thread_name_prefix="spanner-page")
+    _free_workers = threading.BoundedSemaphore(PAGE_LOAD_WORKERS)
+
+
+os.register_at_fork(after_in_child=_reset_executor)
+
+
+class _SharedSnapshot:
+    """
+    A multi-use snapshot shared by the threads of one page load.
+
+    The client's Snapshot is not documented as thread-safe: execute_sql
+    updates its request counters and transaction state. Those calls are
+    serialized here. The result streams they return go over the thread-safe
+    gRPC channel and are consumed concurrently, and they carry the
+    transaction id begun up front, so every read still sees one timestamp.
+    """
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+        self._lock = threading.Lock()
+
+    def execute_sql(self, *args, **kwargs):
+        with self._lock:
+            return self._snapshot.execute_sql(*args, **kwargs)
+
+
+def _read_all(snapshot, query, params):
+    return list(execute(snapshot, query, params))
+
+
+def _read_on_worker(free_workers, snapshot, query, params):
+    try:
+        return _read_all(snapshot, query, params)
+    finally:
+        free_workers.release()
+
+
+def _read_inline(snapshot, query, params):
+    future = Future()
+    try:
+        future.set_result(_read_all(snapshot, query, params))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def load_page(database, reads, staleness=None):
+    """
+    Runs every read a page needs inside one multi-use read-only snapshot.
+
+    All reads are issued concurrently and observe the same timestamp, so the
+    returned bundle is consistent and the page pays for roughly one round trip
+    instead of one per query. Reads must not depend on each other's results;
+    express such dependencies as subqueries instead.
+
+    Args:
+        database: The pooled Spanner database (see `get_database`).
+        reads (dict[str, tuple[Query, dict]]): Maps a result key to the query
+            to run and its parameter values (or None).
+        staleness (Staleness, optional): Timestamp bound for the snapshot.
+            Defaults to the strongest bound declared by the queries, so a
+            page is only served stale when every read on it allows it.
+
+    Returns:
+        dict[str, list[dict]]: The decoded rows for each key.
+
+    Raises:
+        ConnectionError: If the database is not available.
+        Exception: The first error raised by any of the reads.
+    """
+    if database is None:
+        raise ConnectionError("Spanner database connection not initialized.")
+
+    if staleness is None:
+        staleness = strongest(query.staleness for query, _ in reads.values())
+
+    with database.snapshot(multi_use=True, **staleness.snapshot_options(multi_use=True)) as snapshot:
+        # Begin explicitly so every concurrent read shares one transaction id.
+        snapshot.begin()
+        snapshot = _SharedSnapshot(snapshot)
+        free_workers = _free_workers
+        futures = {}
+        inline = []
+        for position, (key, (query, params)) in enumerate(reads.items()):
+            if position > 0 and free_workers.acquire(blocking=False):
+                futures[key] = _executor.submit(_read_on_worker, free_workers, snapshot, query, params)
+            else:
+                inline.append((key, query, params))
+        for key, query, params in inline:
+            futures[key] = _read_inline(snapshot, query, params)
+        # Wait for every read before the session goes back to the pool.
+        wait(futures.values())
+        return {key: futures[key].result() for key in reads}
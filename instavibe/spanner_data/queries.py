@@ -0,0 +1,23 @@
+# spanner_data/queries.py
+#
+# Queries used by both the web app and the agents. spanner_data ships with
+# both (see agents/social/Dockerfile), so a lookup they share is defined and
+# registered once, here.
+
+from google.cloud.spanner_v1 import param_types
+
+from spanner_data.query import Query
+from spanner_data.registry import register
+
+# Resolves many names in one read; PersonByName covers both columns.
+PERSON_IDS_BY_NAMES_QUERY = register(Query(
+    name="person_ids_by_names",
+    records=True,
+    sql="""
+        SELECT name, person_id
+        FROM Person@{FORCE_INDEX=PersonByName}
+        WHERE name IN UNNEST(@names)
+    """,
+    fields=("name", "person_id"),
+    param_types={"names": param_types.Array(param_types.STRING)},
+))
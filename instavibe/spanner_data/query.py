@@ -0,0 +1,139 @@
+# spanner_data/query.py
+
+import logging
+from dataclasses import dataclass, field
+
+from spanner_data.metrics import observe
+from spanner_data.records import record_type
+from spanner_data.staleness import Staleness, STRONG
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Query:
+    """
+    A SQL or Graph (GQL) statement plus everything needed to run and decode it.
+
+    Attributes:
+        sql (str): The statement text. Graph queries start with 'Graph ...'.
+        fields (tuple[str]): Column names in the order they appear in the
+                             SELECT / RETURN clause. Rows are decoded with these.
+        param_types (dict): Maps parameter names to Spanner types
+                            (e.g., param_types.STRING).
+        name (str, optional): Short identifier used in logs.
+        staleness (Staleness): Timestamp bound for reads of this query.
+                               Defaults to a strong read.
+        records (bool): Decode rows into compact, slotted Record objects
+                        instead of dicts. Records are read-only; keep dicts
+                        for results that callers mutate or hand to agents.
+    """
+    sql: str
+    fields: tuple = ()
+    param_types: dict = field(default_factory=dict)
+    name: str = None
+    staleness: Staleness = STRONG
+    records: bool = False
+
+    def label(self):
+        return self.name or self.sql.strip().split("\n", 1)[0][:60]
+
+
+def decode_rows(results, fields, records=False):
+    """
+    Lazily decodes a streamed result set into dictionaries or Records.
+
+    Rows are converted one at a time as they arrive from `execute_sql`, so the
+    caller decides whether to keep them. Rows whose width does not match
+    `fields` are skipped with a warning.
+
+    Args:
+        results: The StreamedResultSet returned by `execute_sql`.
+        fields (Sequence[str] or None): Column names. When empty, the names are
+                                        read from the result set metadata.
+        records (bool): Yield Record objects (see `record_type`) instead of dicts.
+
+    Yields:
+        dict or Record: One object per row.
+    """
+    field_names = tuple(fields) if fields else None
+    make_row = None
+    for row in results:
+        if make_row is None:
+            if field_names is None:
+                try:
+                    field_names = tuple(f.name for f in results.fields)
+                except AttributeError as e:
+                    raise ValueError("Could not determine field names for query results.") from e
+            if records:
+                row_type = record_type(field_names)
+                make_row = lambda values: row_type(*values)
+            else:
+                make_row = lambda values: dict(zip(field_names, values))
+        if len(field_names) != len(row):
+            log.warning("Mismatch between field names (%d) and row values (%d). Skipping row: %s", len(field_names), len(row), row)
+            continue
+        yield make_row(row)
+
+
+def execute(snapshot, query, params=None):
+    """
+    Runs `query` inside an already open snapshot or transaction.
+
+    The statement is sent when iteration starts. Latency (until the last row
+    is consumed), rows, bytes, retries and errors are recorded under the
+    query's name (see `spanner_data.metrics`).
+
+    Args:
+        snapshot: An open Snapshot (or Transaction) from the database.
+        query (Query): The statement to execute.
+        params (dict, optional): Query parameter values.
+
+    Yields:
+        dict or Record: Decoded rows, streamed from Spanner.
+    """
+    with observe(query.name, query.sql) as observation:
+        results = snapshot.execute_sql(
+            query.sql,
+            params=params,
+            param_types=query.param_types or None,
+            retry=observation.retry,
+        )
+        for row in decode_rows(results, query.fields, records=query.records):
+            observation.add_row(row.values())
+            yield row
+
+
+def iter_rows(database, query, params=None):
+    """
+    Streams the rows of `query` from a single-use read-only snapshot.
+
+    The snapshot is taken at `query.staleness`. It (and its pooled session)
+    is held until the generator is exhausted or closed.
+
+    Args:
+        database: The pooled Spanner database (see `get_database`).
+        query (Query): The statement to execute.
+        params (dict, optional): Query parameter values.
+
+    Yields:
+        dict or Record: One object per row.
+    """
+    if database is None:
+        raise ConnectionError("Spanner database connection not initialized.")
+    with database.snapshot(**query.staleness.snapshot_options()) as snapshot:
+        yield from execute(snapshot, query, params)
+
+
+def fetch_all(database, query, params=None):
+    """Runs `query` and returns all decoded rows as a list of dictionaries."""
+    return list(iter_rows(database, query, params))
+
+
+def fetch_one(database, query, params=None):
+    """Runs `query` and returns the first decoded row, or None if there is none."""
+    rows = iter_rows(database, query, params)
+    try:
+        return next(rows, None)
+    finally:
+        rows.close()
@@ -0,0 +1,77 @@
+# spanner_data/records.py
+
+import keyword
+from dataclasses import make_dataclass
+from datetime import date, datetime
+from functools import lru_cache
+
+
+class Record:
+    """
+    Base class for the compact row types built by `record_type`.
+
+    Values live in slots instead of a per-row dict, so the column names are
+    stored once per query shape rather than once per row. Records support
+    read-only mapping access (`row['name']`, `row.get('name')`, `dict(row)`)
+    as well as attribute access, so they can stand in for the dict rows used
+    by templates and helpers.
+    """
+    __slots__ = ()
+    _fields = ()
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._fields else default
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def keys(self):
+        return self._fields
+
+    def values(self):
+        return [getattr(self, name) for name in self._fields]
+
+    def items(self):
+        return [(name, getattr(self, name)) for name in self._fields]
+
+    def _asdict(self):
+        return {name: getattr(self, name) for name in self._fields}
+
+    def to_json(self):
+        """Returns a JSON-ready dict; timestamps and dates are formatted as ISO 8601 only now."""
+        return {
+            name: value.isoformat() if isinstance(value, (datetime, date)) else value
+            for name, value in self.items()
+        }
+
+
+@lru_cache(maxsize=None)
+def record_type(fields):
+    """
+    Returns the slotted Record class for a tuple of column names.
+
+    Classes are cached, so every row of a query shape shares one class.
+
+    Args:
+        fields (tuple[str]): Column names, in SELECT / RETURN order.
+
+    Raises:
+        ValueError: If a column name cannot be used as an attribute name.
+    """
+    for name in fields:
+        if not name.isidentifier() or keyword.iskeyword(name) or name.startswith("_"):
+            raise ValueError(f"Column name '{name}' cannot be used as a record field.")
+    cls = make_dataclass("Record", fields, bases=(Record,), slots=True)
+    cls._fields = tuple(fields)
+    return cls
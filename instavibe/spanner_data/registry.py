@@ -0,0 +1,104 @@
+# spanner_data/registry.py
+
+import logging
+import threading
+import time
+
+from google.cloud.spanner_v1 import ExecuteSqlRequest
+
+log = logging.getLogger(__name__)
+
+_queries = {}
+_registry_lock = threading.Lock()
+
+
+def register(query):
+    """
+    Adds a named query to the process-wide registry and returns it unchanged.
+
+    Meant to wrap module-level definitions (`FOO_QUERY = register(Query(...))`)
+    so every statement the process can send is known at startup.
+
+    Raises:
+        ValueError: If the query has no name, or another query was already
+                    registered under the same name.
+    """
+    if not query.name:
+        raise ValueError("Only named queries can be registered.")
+    with _registry_lock:
+        existing = _queries.get(query.name)
+        if existing is not None and existing != query:
+            raise ValueError(f"A different query is already registered as '{query.name}'.")
+        _queries[query.name] = query
+    return query
+
+
+def get_query(name):
+    """Returns the registered query called `name`, or None."""
+    with _registry_lock:
+        return _queries.get(name)
+
+
+def registered_queries():
+    """Returns every registered query, in registration order."""
+    with _registry_lock:
+        return list(_queries.values())
+
+
+def _plan(snapshot, query):
+    """
+    Compiles `query` on Spanner without executing it and checks its columns.
+
+    PLAN mode parses the statement, resolves it against the live schema and
+    caches the plan, but reads no data, so it is cheap even for unbounded
+    queries. Parameters are bound as typed NULLs.
+    """
+    results = snapshot.execute_sql(
+        query.sql,
+        params={name: None for name in query.param_types} or None,
+        param_types=query.param_types or None,
+        query_mode=ExecuteSqlRequest.QueryMode.PLAN,
+    )
+    for _ in results: # PLAN mode returns no rows; drain to receive the metadata
+        pass
+    if query.fields:
+        columns = tuple(f.name for f in results.fields)
+        if columns != tuple(query.fields):
+            raise ValueError(f"Query returns columns {columns}, but declares fields {tuple(query.fields)}.")
+
+
+def warm_up(database, queries=None):
+    """
+    Validates queries against the schema and warms Spanner's plan cache.
+
+    Each query is compiled once (see `_plan`), so the first real execution
+    after a deploy does not pay for query compilation, and a query that no
+    longer matches the schema is reported at startup instead of on first use.
+
+    Args:
+        database: The pooled Spanner database (see `get_database`).
+        queries (Iterable[Query], optional): Defaults to every registered query.
+
+    Returns:
+        dict[str, Exception or None]: The error for each query name, or None
+                                      if it compiled and its columns match.
+    """
+    if database is None:
+        raise ConnectionError("Spanner database connection not initialized.")
+    if queries is None:
+        queries = registered_queries()
+
+    started = time.monotonic()
+    outcomes = {}
+    with database.snapshot(multi_use=True) as snapshot:
+        snapshot.begin()
+        for query in queries:
+            try:
+                _plan(snapshot, query)
+                outcomes[query.name] = None
+            except Exception as e:
+                log.warning("Query '%s' failed validation: %s", query.label(), e)
+                outcomes[query.name] = e
+    failed = sum(1 for error in outcomes.values() if error is not None)
+    log.info("Warmed up %d/%d queries in %.2fs.", len(outcomes) - failed, len(outcomes), time.monotonic() - started)
+    return outcomes
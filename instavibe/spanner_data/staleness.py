@@ -0,0 +1,69 @@
+# spanner_data/staleness.py
+
+from dataclasses import dataclass
+from datetime import timedelta
+
+STRONG_MODE = "strong"
+MAX_STALENESS_MODE = "max_staleness"
+EXACT_STALENESS_MODE = "exact_staleness"
+
+
+@dataclass(frozen=True)
+class Staleness:
+    """
+    The timestamp bound a read-only snapshot is taken at.
+
+    Strong reads always see the latest committed data but may need a round
+    trip to the leader. Stale reads can be served by the nearest replica.
+
+    Attributes:
+        mode (str): One of "strong", "max_staleness" or "exact_staleness".
+        seconds (float): The staleness bound; ignored for strong reads.
+    """
+    mode: str = STRONG_MODE
+    seconds: float = 0
+
+    @property
+    def is_strong(self):
+        return self.mode == STRONG_MODE
+
+    def snapshot_options(self, multi_use=False):
+        """
+        Returns the keyword arguments for `database.snapshot(...)`.
+
+        Spanner only accepts `max_staleness` on single-use snapshots, so a
+        multi-use snapshot reads at an exact staleness of the same bound,
+        which never returns older data than the policy allows.
+        """
+        if self.is_strong:
+            return {}
+        bound = timedelta(seconds=self.seconds)
+        if self.mode == MAX_STALENESS_MODE and not multi_use:
+            return {"max_staleness": bound}
+        return {"exact_staleness": bound}
+
+
+STRONG = Staleness()
+
+
+def max_staleness(seconds):
+    """Reads data at most `seconds` old, at a timestamp chosen by Spanner. Zero means strong."""
+    return Staleness(MAX_STALENESS_MODE, seconds) if seconds > 0 else STRONG
+
+
+def exact_staleness(seconds):
+    """Reads data exactly `seconds` old. Zero means strong."""
+    return Staleness(EXACT_STALENESS_MODE, seconds) if seconds > 0 else STRONG
+
+
+def strongest(policies):
+    """
+    Picks one bound that satisfies every policy, for reads sharing a snapshot.
+
+    Any strong read makes the whole snapshot strong; otherwise the tightest
+    staleness bound wins.
+    """
+    policies = list(policies)
+    if not policies or any(p.is_strong for p in policies):
+        return STRONG
+    return min(policies, key=lambda p: p.seconds)
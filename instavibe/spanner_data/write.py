@@ -0,0 +1,93 @@
+# spanner_data/write.py
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from spanner_data.metrics import observe
+
+
+@dataclass(frozen=True)
+class CommitResult:
+    """
+    Outcome of a committed batch of mutations.
+
+    Attributes:
+        commit_timestamp (datetime): When Spanner committed the batch.
+        mutation_count (int or None): Mutations counted by Spanner (one per
+                                      column per row), if commit stats were
+                                      returned.
+        row_count (int): Rows written by the batch.
+    """
+    commit_timestamp: datetime
+    mutation_count: int
+    row_count: int
+
+
+def insert_rows(database, table_rows):
+    """
+    Inserts rows into one or more tables in a single blind-write commit.
+
+    Uses `database.batch()` instead of a read-write transaction: nothing is
+    read, so no locks are taken before the commit and the whole set is sent
+    in one round trip. Foreign keys are checked at commit time, so parent and
+    child rows may share the batch.
+
+    Args:
+        database: The pooled Spanner database (see `get_database`).
+        table_rows (list[tuple[str, list[str], list[tuple]]]): (table, columns,
+            rows) triples. Tables without rows are skipped.
+
+    Returns:
+        CommitResult: Commit timestamp and stats for the batch.
+    """
+    if database is None:
+        raise ConnectionError("Spanner database connection not initialized.")
+
+    tables = [table for table, _, rows in table_rows if rows]
+    row_count = 0
+    with observe(f"insert:{','.join(tables)}") as observation, database.batch() as batch:
+        for table, columns, rows in table_rows:
+            if rows:
+                batch.insert(table=table, columns=columns, values=rows)
+                row_count += len(rows)
+        observation.rows = row_count
+
+    commit_stats = getattr(batch, "commit_stats", None)
+    return CommitResult(
+        commit_timestamp=batch.committed,
+        mutation_count=commit_stats.mutation_count if commit_stats else None,
+        row_count=row_count,
+    )
+
+
+def insert_in_chunks(database, items, rows_for_item, chunk_size):
+    """
+    Inserts the rows derived from `items` in commits of at most `chunk_size` items.
+
+    Each chunk is one `insert_rows` batch, which keeps large loads under
+    Spanner's per-commit mutation limit. A failed chunk does not stop the
+    following ones.
+
+    Args:
+        database: The pooled Spanner database (see `get_database`).
+        items (list): The items to write, e.g. validated posts.
+        rows_for_item (Callable): Maps an item to its (table, columns, rows)
+            triples. Rows for the same table and columns are merged per chunk.
+        chunk_size (int): Maximum number of items per commit.
+
+    Yields:
+        tuple[list, CommitResult or Exception]: The items of each chunk and
+        either its commit result or the error that made it fail.
+    """
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        merged = {}
+        for item in chunk:
+            for table, columns, rows in rows_for_item(item):
+                merged.setdefault((table, tuple(columns)), []).extend(rows)
+        try:
+            result = insert_rows(database, [(table, list(columns), rows) for (table, columns), rows in merged.items()])
+        except Exception as e:
+            yield chunk, e
+        else:
+            yield chunk, result
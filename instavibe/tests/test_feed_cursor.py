@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from feed_cursor import decode_feed_cursor, encode_feed_cursor
+
+
+@pytest.mark.parametrize("post_timestamp", [
+    datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+    datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    datetime(2024, 5, 1, 14, 30, tzinfo=timezone(timedelta(hours=2))),
+])
+def test_cursor_round_trips(post_timestamp):
+    cursor = encode_feed_cursor({"post_timestamp": post_timestamp, "post_id": "post-1"})
+    assert decode_feed_cursor(cursor) == (post_timestamp, "post-1")
+
+
+def test_decode_accepts_unencoded_plus_and_z_suffix():
+    expected = datetime(2024, 5, 1, 12, 0, tzinfo=timezone(timedelta(hours=2)))
+    assert decode_feed_cursor("2024-05-01T12:00:00 02:00,p1") == (expected, "p1")
+    assert decode_feed_cursor("2024-05-01T10:00:00Z,p1") == (expected, "p1")
+
+
+def test_decode_assumes_utc_for_naive_timestamps():
+    assert decode_feed_cursor("2024-05-01T10:00:00,p1") == (datetime(2024, 5, 1, 10, tzinfo=timezone.utc), "p1")
+
+
+@pytest.mark.parametrize("cursor", ["", "p1", ",p1", "2024-05-01T10:00:00+00:00,", "None,p1", "yesterday,p1"])
+def test_decode_rejects_malformed_cursors(cursor):
+    with pytest.raises(ValueError):
+        decode_feed_cursor(cursor)
+
+
+def test_encode_rejects_posts_without_a_timestamp():
+    with pytest.raises(ValueError):
+        encode_feed_cursor({"post_timestamp": None, "post_id": "p1"})
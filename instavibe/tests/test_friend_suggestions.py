@@ -0,0 +1,138 @@
+import pytest
+
+import friend_suggestions
+from friend_suggestions import SHARED_EVENT_WEIGHT, rank_friend_suggestions
+
+# alice - bob - carol - dave, plus alice - erin - carol:
+# carol is two hops from alice through both bob and erin.
+FRIENDSHIPS = [("alice", "bob"), ("bob", "carol"), ("carol", "dave"), ("alice", "erin"), ("erin", "carol")]
+ATTENDANCE = [("alice", "e1"), ("alice", "e2"), ("carol", "e1"), ("dave", "e1"), ("dave", "e2")]
+
+
+def _ranked(friendships=FRIENDSHIPS, attendance=ATTENDANCE, **kwargs):
+    return dict(rank_friend_suggestions(friendships, attendance, **kwargs))
+
+
+def test_counts_mutual_friends_and_shared_events():
+    assert _ranked()["alice"] == [(2 + SHARED_EVENT_WEIGHT, "carol", 2, 1)]
+    # dave: carol's friends are bob and erin, neither of whom shares an event with him
+    assert sorted(_ranked()["dave"]) == [(1, "bob", 1, 0), (1, "erin", 1, 0)]
+
+
+def test_never_suggests_self_or_direct_friends():
+    for person_id, suggestions in _ranked().items():
+        friends = {b for a, b in FRIENDSHIPS if a == person_id} | {a for a, b in FRIENDSHIPS if b == person_id}
+        candidates = {candidate_id for _, candidate_id, _, _ in suggestions}
+        assert person_id not in candidates
+        assert not candidates & friends
+
+
+def test_orders_by_score_and_keeps_the_best():
+    friendships = [("p", "f1"), ("p", "f2"), ("f1", "x"), ("f2", "x"), ("f1", "y"), ("f1", "z")]
+    attendance = [("p", "e"), ("z", "e")]
+    ranked = _ranked(friendships, attendance)["p"]
+    assert [candidate_id for _, candidate_id, _, _ in ranked] == ["x", "z", "y"]
+    assert _ranked(friendships, attendance, max_per_person=2)["p"] == ranked[:2]
+
+
+def test_pairs_may_be_given_in_both_directions():
+    both = FRIENDSHIPS + [(b, a) for a, b in FRIENDSHIPS]
+    assert _ranked(both) == _ranked()
+
+
+def test_ranks_only_the_requested_people():
+    ranked = _ranked(person_ids=["alice", "nobody"])
+    assert list(ranked) == ["alice", "nobody"]
+    assert ranked["nobody"] == []
+
+
+# --- refresh_friend_suggestions, against an in-memory database ---
+
+PEOPLE = {f"p{i}": f"Person {i}" for i in range(7)}
+# A ring p0 - p1 - ... - p6 - p0 plus the chord p0 - p3
+GRAPH = [(f"p{i}", f"p{(i + 1) % 7}") for i in range(7)] + [("p0", "p3")]
+EVENTS = [("p0", "e1"), ("p2", "e1"), ("p5", "e1"), ("p1", "e2")]
+
+
+def _fake_execute(snapshot, query, params):
+    """Answers the suggestion job's queries from PEOPLE, GRAPH and EVENTS."""
+    snapshot.queries.append((query.name, params))
+    ids = set(params.get("person_ids", ()))
+    if query is friend_suggestions.PEOPLE_CHUNK_QUERY:
+        rows = sorted((p, name) for p, name in PEOPLE.items() if p > params["after"])[:params["limit"]]
+        return iter([{"person_id": p, "name": name} for p, name in rows])
+    if query is friend_suggestions.FRIEND_PAIRS_QUERY:
+        return iter([{"person_id": a, "friend_id": b} for a, b in GRAPH if a in ids]
+                    + [{"person_id": b, "friend_id": a} for a, b in GRAPH if b in ids])
+    if query is friend_suggestions.ATTENDANCE_QUERY:
+        return iter([{"person_id": p, "event_id": e} for p, e in EVENTS if p in ids])
+    if query is friend_suggestions.PERSON_NAMES_QUERY:
+        return iter([{"person_id": p, "name": PEOPLE[p]} for p in ids])
+    raise AssertionError(f"unexpected query {query.name}")
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.queries = []
+        self.deleted = []
+        self.inserted = []
+        self.commits = 0
+
+    def snapshot(self, **options):
+        return self
+
+    def batch(self):
+        self.commits += 1
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def delete(self, table, keyset):
+        self.deleted.extend(key_range.start_closed[0] for key_range in keyset.ranges)
+
+    def insert(self, table, columns, values):
+        self.inserted.extend(values)
+
+
+@pytest.fixture
+def database(monkeypatch):
+    monkeypatch.setattr(friend_suggestions, "execute", _fake_execute)
+    monkeypatch.setattr(friend_suggestions, "is_symmetric_edge", lambda database, edge: False)
+    return FakeDatabase()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 100])
+def test_refresh_matches_ranking_the_whole_graph(database, chunk_size):
+    written = friend_suggestions.refresh_friend_suggestions(database, chunk_size=chunk_size)
+
+    expected = {
+        (person_id, candidate_id, PEOPLE[candidate_id], mutual, shared, score)
+        for person_id, ranked in rank_friend_suggestions(GRAPH, EVENTS)
+        for score, candidate_id, mutual, shared in ranked
+    }
+    assert {row[:6] for row in database.inserted} == expected
+    assert written == len(expected)
+    # Every person is cleared exactly once, in chunks of chunk_size per commit
+    assert sorted(database.deleted) == sorted(PEOPLE)
+    assert database.commits == -(-len(PEOPLE) // chunk_size)
+
+
+def test_refresh_reads_only_by_key(database):
+    friend_suggestions.refresh_friend_suggestions(database, chunk_size=3)
+    for name, params in database.queries:
+        if name == "suggestions_people_chunk":
+            assert params["limit"] == 3
+        else:
+            assert params["person_ids"], name # Every other read is keyed by person
+
+
+def test_read_chunk_fetches_friends_of_friends_for_the_chunk_only(database):
+    suggestions, names = friend_suggestions._read_chunk(database, friend_suggestions.FRIEND_PAIRS_QUERY, ["p0"], 20)
+    assert list(suggestions) == ["p0"]
+    # p0's friends are p1, p6 and p3; two hops away are p2, p4 and p5
+    assert sorted(candidate_id for _, candidate_id, _, _ in suggestions["p0"]) == ["p2", "p4", "p5"]
+    assert set(names) == {"p2", "p4", "p5"}
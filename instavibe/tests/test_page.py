@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from spanner_data import Query, load_page
+from spanner_data import page
+
+
+class FakeSnapshot:
+    """Records how many threads are inside execute_sql at once."""
+
+    def __init__(self, rows, barrier=None, fail=()):
+        self.rows = rows
+        self.barrier = barrier
+        self.fail = fail
+        self.began = False
+        self.inside = 0
+        self.max_inside = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def begin(self):
+        self.began = True
+
+    def execute_sql(self, sql, params=None, param_types=None, retry=None):
+        with self._lock:
+            self.inside += 1
+            self.max_inside = max(self.max_inside, self.inside)
+            self.calls += 1
+        time.sleep(0.01) # Widen the window for overlapping calls
+        with self._lock:
+            self.inside -= 1
+        if sql in self.fail:
+            raise RuntimeError(f"read failed: {sql}")
+        return self._stream(self.rows[sql])
+
+    def _stream(self, rows):
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5) # Only passes if the streams are read concurrently
+        yield from rows
+
+
+class FakeDatabase:
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+        self.snapshot_options = None
+
+    def snapshot(self, **options):
+        self.snapshot_options = options
+        return self
+
+    def __enter__(self):
+        return self._snapshot
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def _reads(count):
+    return {
+        f"read{i}": (Query(sql=f"q{i}", fields=("value",), name=f"q{i}"), {"i": i})
+        for i in range(count)
+    }
+
+
+def test_load_page_returns_each_read_in_key_order():
+    snapshot = FakeSnapshot({f"q{i}": [(i,), (i * 10,)] for i in range(4)})
+    result = load_page(FakeDatabase(snapshot), _reads(4))
+    assert list(result) == ["read0", "read1", "read2", "read3"]
+    assert result["read2"] == [{"value": 2}, {"value": 20}]
+    assert snapshot.began
+
+
+def test_load_page_serializes_execute_sql_but_streams_concurrently():
+    # The streams wait for each other, so the page only completes if they are
+    # consumed at the same time; execute_sql itself must never overlap.
+    snapshot = FakeSnapshot({f"q{i}": [(i,)] for i in range(3)}, barrier=threading.Barrier(3))
+    result = load_page(FakeDatabase(snapshot), _reads(3))
+    assert result == {f"read{i}": [{"value": i}] for i in range(3)}
+    assert snapshot.calls == 3
+    assert snapshot.max_inside == 1
+
+
+def test_concurrent_page_loads_share_the_executor():
+    errors = []
+
+    def load():
+        try:
+            snapshot = FakeSnapshot({f"q{i}": [(i,)] for i in range(4)})
+            assert load_page(FakeDatabase(snapshot), _reads(4))["read3"] == [{"value": 3}]
+            assert snapshot.max_inside == 1
+        except Exception as e: # Surfaced in the main thread below
+            errors.append(e)
+
+    threads = [threading.Thread(target=load) for _ in range(page.PAGE_LOAD_WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_load_page_raises_a_failed_read_and_frees_the_workers():
+    snapshot = FakeSnapshot({f"q{i}": [(i,)] for i in range(3)}, fail={"q2"})
+    with pytest.raises(RuntimeError, match="q2"):
+        load_page(FakeDatabase(snapshot), _reads(3))
+    # Every executor slot taken by the page was given back
+    for _ in range(page.PAGE_LOAD_WORKERS):
+        assert page._free_workers.acquire(blocking=False)
+    for _ in range(page.PAGE_LOAD_WORKERS):
+        page._free_workers.release()
+
+
+def test_load_page_requires_a_database():
+    with pytest.raises(ConnectionError):
+        load_page(None, _reads(1))
@@ -0,0 +1,123 @@
+import json
+import threading
+
+import pytest
+from google.api_core import exceptions
+
+import seeder
+from seeder import SeedCheckpoint, SyntheticDataset, rows_per_commit, seed_tables
+
+
+class FakeDatabase:
+    """Records every committed chunk; `fail` maps (table, first row) to the error to raise."""
+
+    def __init__(self, fail=None):
+        self.commits = []
+        self.fail = dict(fail or {})
+        self._lock = threading.Lock()
+
+    def batch(self):
+        return _FakeBatch(self)
+
+
+class _FakeBatch:
+    def __init__(self, database):
+        self.database = database
+        self.mutations = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            with self.database._lock:
+                self.database.commits.extend(self.mutations)
+        return False
+
+    def insert_or_update(self, table, columns, values):
+        error = self.database.fail.pop((table, values[0]), None)
+        if error is not None:
+            raise error
+        self.mutations.append((table, list(values)))
+
+
+def _tables(people=10, posts=25):
+    return {
+        "Person": (["person_id", "name"], [(f"p{i}", f"Person {i}") for i in range(people)]),
+        "Post": (["post_id", "author_id", "text"], ((f"post{i}", f"p{i % people}", "hi") for i in range(posts))),
+    }
+
+
+def test_rows_per_commit_stays_under_the_mutation_limit():
+    assert rows_per_commit(["a", "b", "c", "d"], mutations_per_commit=10) == 2
+    assert rows_per_commit(["a", "b"], mutations_per_commit=1) == 1 # Always at least one row
+
+
+@pytest.mark.parametrize("mutations_per_commit", [3, 6, 9, 1000])
+def test_seed_tables_writes_every_row_in_bounded_chunks(mutations_per_commit):
+    database = FakeDatabase()
+    written = seed_tables(database, _tables(), workers=3, mutations_per_commit=mutations_per_commit)
+
+    assert written == {"Person": 10, "Post": 25}
+    for table, rows in database.commits:
+        columns = _tables()[table][0]
+        assert len(rows) * len(columns) <= max(mutations_per_commit, len(columns))
+    committed = {table: sorted(row for t, rows in database.commits if t == table for row in rows) for table in written}
+    assert committed["Person"] == sorted(_tables()["Person"][1])
+    assert committed["Post"] == sorted(_tables()["Post"][1])
+
+
+def test_seed_tables_commits_parents_before_children():
+    database = FakeDatabase()
+    seed_tables(database, _tables(), workers=4, mutations_per_commit=4)
+    tables = [table for table, _ in database.commits]
+    assert tables.index("Post") > len(tables) - tables[::-1].index("Person") - 1
+
+
+def test_seed_tables_retries_transient_failures(monkeypatch):
+    monkeypatch.setattr(seeder.time, "sleep", lambda seconds: None)
+    database = FakeDatabase(fail={("Person", ("p0", "Person 0")): exceptions.Aborted("retry me")})
+    assert seed_tables(database, _tables(), workers=2, mutations_per_commit=4)["Person"] == 10
+
+
+def test_checkpoint_resumes_after_a_failed_run(tmp_path):
+    path = str(tmp_path / "seed.json")
+    run = {"people": 10}
+    # Person chunks hold 2 rows; the chunk starting at p4 fails for good
+    failing = FakeDatabase(fail={("Person", ("p4", "Person 4")): exceptions.InvalidArgument("bad row")})
+    with pytest.raises(exceptions.InvalidArgument):
+        seed_tables(failing, _tables(), workers=1, mutations_per_commit=4, checkpoint=SeedCheckpoint(path, run))
+
+    with open(path) as f:
+        done = json.load(f)["done"]["Person"]
+    assert 2 not in done and done
+
+    resumed = FakeDatabase()
+    written = seed_tables(resumed, _tables(), workers=1, mutations_per_commit=4, checkpoint=SeedCheckpoint(path, run))
+    resumed_people = sorted(row for table, rows in resumed.commits if table == "Person" for row in rows)
+    assert resumed_people == [(f"p{i}", f"Person {i}") for i in range(10) if i // 2 not in done]
+    assert written["Post"] == 25
+    # A finished run leaves nothing to do
+    again = FakeDatabase()
+    assert seed_tables(again, _tables(), workers=1, mutations_per_commit=4, checkpoint=SeedCheckpoint(path, run)) == {"Person": 0, "Post": 0}
+    assert again.commits == []
+
+
+def test_checkpoint_for_another_run_is_ignored(tmp_path):
+    path = str(tmp_path / "seed.json")
+    checkpoint = SeedCheckpoint(path, {"people": 10})
+    checkpoint.mark_done("Person", 0)
+    assert SeedCheckpoint(path, {"people": 10}).is_done("Person", 0)
+    assert not SeedCheckpoint(path, {"people": 20}).is_done("Person", 0)
+
+
+def test_synthetic_dataset_is_deterministic():
+    def rows(dataset):
+        return {table: list(rows) for table, (_, rows) in dataset.tables().items()}
+
+    as_of = SyntheticDataset(1).as_of
+    first = rows(SyntheticDataset(50, degree=6, as_of=as_of))
+    assert first == rows(SyntheticDataset(50, degree=6, as_of=as_of))
+    friendships = [(a, b) for a, b, _ in first["Friendship"]]
+    assert len(friendships) == len(set(friendships))
+    assert all(a < b for a, b in friendships) # Stored once per pair, smaller id first
@@ -8,9 +8,62 @@ BASE_URL = os.environ.get("INSTAVIBE_BASE_URL")
 
 #REPLACE ME CREATE POST
 
-#REPLACE ME CREATE EVENTS
+def create_posts(posts: list[dict], base_url: str = BASE_URL):
+    """
+    Sends many posts to the InstaVibe API in one request.
+
+    Args:
+        posts: A list of posts, each a dict with "author_name", "text" and
+               optionally "sentiment".
+        base_url: The base URL of the InstaVibe API.
 
+    Returns:
+        The API's JSON response with one result per post (in order) and a
+        summary, or None if the request failed.
+    """
+    url = f"{base_url}/posts:batch"
+    try:
+        response = requests.post(url, json=posts, headers={"Content-Type": "application/json"})
+        response.raise_for_status() # 207 (some items failed) is reported per item in the body
+    except requests.exceptions.RequestException as e:
+        body = e.response.text[:500] if e.response is not None else ""
+        print(f"Error creating posts: {e} {body}".rstrip())
+        return None
+    try:
+        result = response.json()
+    except ValueError as e: # Not JSON, e.g. a proxy's error page
+        print(f"Error creating posts: response from {url} is not JSON (status {response.status_code}): {e}")
+        return None
+    print(f"Successfully sent {len(posts)} posts, status {response.status_code}")
+    return result
+
+#REPLACE ME CREATE EVENTS
 
+def create_events(events: list[dict], base_url: str = BASE_URL):
+    """
+    Sends many events to the InstaVibe API in one request.
 
+    Args:
+        events: A list of events, each a dict with "event_name", "description",
+                "event_date" (ISO 8601), "locations" and "attendee_names".
+        base_url: The base URL of the InstaVibe API.
 
-  
+    Returns:
+        The API's JSON response with one result per event (in order) and a
+        summary, or None if the request failed.
+    """
+    url = f"{base_url}/events:batch"
+    try:
+        response = requests.post(url, json=events, headers={"Content-Type": "application/json"})
+        response.raise_for_status() # 207 (some items failed) is reported per item in the body
+    except requests.exceptions.RequestException as e:
+        body = e.response.text[:500] if e.response is not None else ""
+        print(f"Error creating events: {e} {body}".rstrip())
+        return None
+    try:
+        result = response.json()
+    except ValueError as e: # Not JSON, e.g. a proxy's error page
+        print(f"Error creating events: response from {url} is not JSON (status {response.status_code}): {e}")
+        return None
+    print(f"Successfully sent {len(events)} events, status {response.status_code}")
+    return result
@@ -18,7 +18,7 @@ from google.adk.tools.function_tool import FunctionTool
 
 from google.adk.tools.mcp_tool.conversion_utils import adk_to_mcp_tool_type
 
-from instavibe import create_event,create_post
+from instavibe import create_event,create_post,create_events,create_posts
 load_dotenv()
 APP_HOST = os.environ.get("APP_HOST", "0.0.0.0")
 APP_PORT = os.environ.get("APP_PORT",8080)
@@ -26,10 +26,14 @@ APP_PORT = os.environ.get("APP_PORT",8080)
 
 event_tool = FunctionTool(create_event)
 post_tool = FunctionTool(create_post)
+events_tool = FunctionTool(create_events)
+posts_tool = FunctionTool(create_posts)
 
 available_tools = {
     event_tool.name: event_tool,
     post_tool.name: post_tool,
+    events_tool.name: events_tool,
+    posts_tool.name: posts_tool,
 }
 
 # Create a named MCP Server instance